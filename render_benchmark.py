@@ -0,0 +1,239 @@
+# Render benchmark for every visual template
+# Renders each FFmpeg template (apply_ffmpeg_template built-ins + channel_config.json
+# ffmpeg_templates) and each VideoEditor style over fixed synthetic images and silent
+# audio, then reports encode fps, wall time, peak RSS and output size as JSON.
+# Fully offline: no API keys, no network, CPU only.
+#
+# Usage:
+#   python render_benchmark.py                                  # everything, 2s/5s/10s
+#   python render_benchmark.py --durations 3 --templates slow_zoom,pulse --styles none
+#   python render_benchmark.py --output bench.json --compare last_bench.json --threshold 0.25
+#   python render_benchmark.py --keep                           # leave fixtures/renders in the temp dir
+
+import sys
+import os
+import json
+import time
+import argparse
+import platform
+import shutil
+import subprocess
+import tempfile
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src')
+sys.path.insert(0, SRC_DIR)
+
+BUILTIN_TEMPLATES = ["slow_zoom", "micro_shake", "pan_lr", "bounce", "slide_in", "rotate_subtle", "pulse", "zoom_out"]
+EDITOR_STYLES = ["noir:ffmpeg", "noir:moviepy", "stickman:ffmpeg", "stickman:numpy", "stickman:moviepy", "psych_stickman:ffmpeg"]
+RESULT_MARKER = "BENCH_RESULT "
+
+def _ffmpeg_exe():
+    try:
+        import imageio_ffmpeg
+        if os.name == 'nt':
+            return imageio_ffmpeg.get_ffmpeg_exe()
+    except Exception:
+        pass
+    return "ffmpeg"
+
+def _peak_rss_mb():
+    """Peak RSS of this process and of its largest finished child (ffmpeg), in MB."""
+    try:
+        import resource
+    except ImportError:
+        return None # Windows
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    peak = max(own, children)
+    # ru_maxrss is bytes on macOS, KB on Linux
+    return round(peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024, 1)
+
+def make_fixtures(fixture_dir, durations):
+    """Deterministic synthetic inputs: gradient+shape images and silent AAC audio per duration."""
+    from PIL import Image, ImageDraw
+    os.makedirs(fixture_dir, exist_ok=True)
+
+    images = {}
+    for name, (w, h) in {"portrait": (1080, 1920), "landscape": (1920, 1080)}.items():
+        path = os.path.join(fixture_dir, f"{name}.jpg")
+        img = Image.new('RGB', (w, h))
+        draw = ImageDraw.Draw(img)
+        for y in range(0, h, 8):
+            draw.rectangle([0, y, w, y + 8], fill=(40 + y * 150 // h, 30, 120 - y * 80 // h))
+        draw.ellipse([w * 0.3, h * 0.3, w * 0.7, h * 0.3 + w * 0.4], fill=(240, 240, 240), outline=(0, 0, 0), width=12)
+        draw.line([w * 0.5, h * 0.3 + w * 0.4, w * 0.5, h * 0.8], fill=(0, 0, 0), width=14)
+        img.save(path, quality=92)
+        images[name] = path
+
+    audio = {}
+    for d in durations:
+        path = os.path.join(fixture_dir, f"silence_{d}s.m4a")
+        subprocess.run([_ffmpeg_exe(), '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo',
+                        '-t', str(d), '-c:a', 'aac', path], check=True)
+        audio[d] = path
+    return images, audio
+
+def build_cases(args, channel_templates):
+    cases = []
+    templates = [("builtin", t) for t in BUILTIN_TEMPLATES] + [("channel_config", t) for t in channel_templates]
+    if args.templates != "all":
+        wanted = set(args.templates.split(",")) if args.templates != "none" else set()
+        templates = [(src, t) for src, t in templates if t in wanted]
+    styles = EDITOR_STYLES
+    if args.styles != "all":
+        wanted = set(args.styles.split(",")) if args.styles != "none" else set()
+        styles = [s for s in styles if s in wanted or s.split(":")[0] in wanted]
+
+    for d in args.durations:
+        for source, name in templates:
+            case = {"kind": "template", "source": source, "name": name, "duration": d}
+            if source == "channel_config":
+                case["filter"] = channel_templates[name]
+            cases.append(case)
+        for style in styles:
+            cases.append({"kind": "editor", "source": "VideoEditor", "name": style, "duration": d})
+    return cases
+
+# --- Worker side: runs in a fresh interpreter so peak RSS is per case ---
+
+def run_case(case, fixtures, profile_name):
+    from encoding_profiles import set_profile
+    profile = set_profile(profile_name)
+    images, audio = fixtures["images"], fixtures["audio"]
+    duration = case["duration"]
+    audio_path = audio[str(duration)]
+    output_path = os.path.abspath(f"bench_{case['source']}_{case['name'].replace(':', '_')}_{duration}s.mp4")
+
+    start_wall, start_cpu = time.perf_counter(), time.process_time()
+    if case["kind"] == "template" and case["source"] == "builtin":
+        import generator
+        ok = generator.apply_ffmpeg_template(case["name"], images["portrait"], audio_path, output_path, duration)
+    elif case["kind"] == "template":
+        # Same command shape as the sketch_static segment renderer
+        dynamic_filter = case["filter"].replace("d=125", f"d={profile.frames(duration)}:fps={profile.fps}")
+        cmd = [_ffmpeg_exe(), '-y', '-loop', '1', '-i', images["portrait"], '-i', audio_path,
+               '-filter_complex', f"[0:v]{dynamic_filter}[v]", '-map', '[v]', '-map', '1:a',
+               '-t', str(duration)] + profile.video_args() + profile.audio_args() + [output_path]
+        ok = subprocess.run(cmd, capture_output=True).returncode == 0
+    else:
+        from video_editor import VideoEditor
+        style, backend = case["name"].split(":")
+        scenes = [{'audio_path': audio_path, 'video_path': images["portrait"], 'text': "Benchmark scene",
+                   'vocal_action': 'talking'}]
+        ok = VideoEditor().create_video(scenes, output_path, is_short=True, style=style,
+                                        bg_color="#3A86FF", motion_backend=backend, profile=profile)
+    wall = time.perf_counter() - start_wall
+    cpu = time.process_time() - start_cpu
+
+    ok = bool(ok) and os.path.exists(output_path)
+    frames = profile.frames(duration)
+    result = dict(case)
+    result.update({
+        "ok": ok,
+        "profile": profile.name,
+        "wall_s": round(wall, 3),
+        "python_cpu_s": round(cpu, 3),
+        "frames": frames,
+        "encode_fps": round(frames / wall, 2) if ok and wall > 0 else None,
+        "peak_rss_mb": _peak_rss_mb(),
+        "output_bytes": os.path.getsize(output_path) if ok else None
+    })
+    if os.path.exists(output_path):
+        os.remove(output_path)
+    return result
+
+# --- Driver side ---
+
+def compare(results, baseline_path, threshold):
+    """Flags cases whose wall time grew by more than threshold vs a previous run."""
+    with open(baseline_path) as f:
+        baseline = {(r["kind"], r["source"], r["name"], r["duration"]): r for r in json.load(f)["results"]}
+    regressions = []
+    for r in results:
+        old = baseline.get((r["kind"], r["source"], r["name"], r["duration"]))
+        if not old or not old.get("ok") or not r.get("ok"):
+            continue
+        change = (r["wall_s"] - old["wall_s"]) / old["wall_s"]
+        if change > threshold:
+            regressions.append({"name": r["name"], "duration": r["duration"], "old_wall_s": old["wall_s"],
+                                "new_wall_s": r["wall_s"], "change": round(change, 3)})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Render benchmark for FFmpeg templates and VideoEditor styles")
+    parser.add_argument("--durations", type=lambda s: [int(x) for x in s.split(",")], default=[2, 5, 10])
+    parser.add_argument("--templates", default="all", help="Comma list, 'all' or 'none'")
+    parser.add_argument("--styles", default="all", help="Comma list of style[:backend], 'all' or 'none'")
+    parser.add_argument("--profile", default="standard", help="Encoding profile to benchmark")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    parser.add_argument("--compare", help="Previous JSON report to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed wall time growth before flagging")
+    parser.add_argument("--keep", action="store_true", help="Keep the fixtures, render cache and scratch files")
+    parser.add_argument("--worker", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        job = json.loads(args.worker)
+        result = run_case(job["case"], job["fixtures"], job["profile"])
+        print(RESULT_MARKER + json.dumps(result))
+        return 0
+
+    workdir = tempfile.mkdtemp(prefix="render_bench_")
+    try:
+        images, audio = make_fixtures(os.path.join(workdir, "fixtures"), args.durations)
+        fixtures = {"images": images, "audio": {str(d): p for d, p in audio.items()}}
+
+        try:
+            with open(os.path.join(os.path.dirname(os.path.abspath(__file__)), "channel_config.json")) as f:
+                channel_templates = json.load(f).get("ffmpeg_templates", {})
+        except Exception:
+            channel_templates = {}
+
+        # Workers never reuse renders: the segment cache would turn every repeat into a file copy
+        env = dict(os.environ, RENDER_CACHE_DIR=os.path.join(workdir, "cache"), RENDER_CACHE_MAX_MB="0")
+        results = []
+        for case in build_cases(args, channel_templates):
+            print(f"[*] {case['source']}/{case['name']} @ {case['duration']}s ...", file=sys.stderr)
+            job = json.dumps({"case": case, "fixtures": fixtures, "profile": args.profile})
+            proc = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", job],
+                                  cwd=workdir, env=env, capture_output=True, text=True, timeout=1800)
+            lines = [l for l in proc.stdout.splitlines() if l.startswith(RESULT_MARKER)]
+            if lines:
+                result = json.loads(lines[-1][len(RESULT_MARKER):])
+            else:
+                result = dict(case, ok=False, error=proc.stderr[-500:])
+            print(f"    wall={result.get('wall_s')}s fps={result.get('encode_fps')} rss={result.get('peak_rss_mb')}MB", file=sys.stderr)
+            results.append(result)
+    finally:
+        if args.keep:
+            print(f"[*] Benchmark files kept in {workdir}", file=sys.stderr)
+        else:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "profile": args.profile,
+            "durations": args.durations
+        },
+        "results": results
+    }
+    exit_code = 0
+    if args.compare:
+        report["regressions"] = compare(results, args.compare, args.threshold)
+        exit_code = 1 if report["regressions"] else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+        print(f"[OK] Benchmark report written to {args.output}", file=sys.stderr)
+    else:
+        print(text)
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Alignment - Word timings for audio that came without WordBoundary events
+(ElevenLabs, cloned voices). Speech regions come from an energy-based VAD over
+10 ms RMS windows; the known script words are then laid over the voiced time in
+proportion to their syllable counts. Results are cached per audio+text hash, so
+captions cost one short PCM decode per unique clip and nothing after that.
+"""
+
+import os
+import re
+import json
+import hashlib
+import numpy as np
+
+try:
+    from .silence_trim import decode_pcm
+    from .file_cache import hash_file
+except ImportError:
+    from silence_trim import decode_pcm
+    from file_cache import hash_file
+
+ALIGN_CACHE_DIR = os.getenv("ALIGN_CACHE_DIR", ".cache/alignment")
+ALIGN_SAMPLE_RATE = 16000
+WINDOW = 0.01        # RMS window (s)
+MIN_GAP = 0.12       # Shorter pauses are treated as part of the same phrase
+MIN_SPEECH = 0.05    # Shorter voiced blips are noise
+SNAP = 0.15          # Word boundaries this close (in voiced time) to a pause move onto it
+SNAP_PUNCT = 0.35    # ...or this close after punctuation, where a pause is expected
+
+def count_syllables(word):
+    """Vowel-group syllable estimate; digits count one syllable each."""
+    word = word.lower()
+    digits = sum(c.isdigit() for c in word)
+    letters = re.sub(r"[^a-z]", "", word)
+    if not letters:
+        return max(1, digits)
+    groups = len(re.findall(r"[aeiouy]+", letters))
+    if letters.endswith("e") and not letters.endswith(("le", "ee")) and groups > 1:
+        groups -= 1 # Silent trailing e
+    return max(1, groups) + digits
+
+def speech_regions(pcm, sample_rate=ALIGN_SAMPLE_RATE):
+    """[(start_s, end_s)] of voiced audio, from an adaptive energy threshold."""
+    win = int(sample_rate * WINDOW)
+    n_win = len(pcm) // win
+    if n_win == 0:
+        return []
+    frames = pcm[:n_win * win].reshape(n_win, win).astype(np.float32) / 32768.0
+    rms_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+    # Threshold sits between the noise floor and the speech level of this clip
+    floor, peak = np.percentile(rms_db, 10), np.percentile(rms_db, 95)
+    threshold = max(floor + 0.3 * (peak - floor), -50.0)
+
+    voiced = np.concatenate(([0], (rms_db > threshold).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(voiced))
+    regions = []
+    for start, end in zip(edges[0::2] * WINDOW, edges[1::2] * WINDOW):
+        if regions and start - regions[-1][1] < MIN_GAP:
+            regions[-1] = (regions[-1][0], end)
+        else:
+            regions.append((start, end))
+    return [(float(s), float(e)) for s, e in regions if e - s >= MIN_SPEECH]
+
+def allocate_words(words, regions, duration, pauses_after=None):
+    """
+    Spreads words over the voiced timeline in proportion to their syllables, snapping
+    word boundaries onto nearby pauses. pauses_after[k] marks punctuation after word k.
+    """
+    if not words:
+        return []
+    if not regions:
+        regions = [(0.0, duration)]
+    weights = np.array([count_syllables(w) for w in words], dtype=np.float64)
+
+    # Word boundaries as positions on the voiced timeline (pauses cut out)
+    lengths = np.array([e - s for s, e in regions])
+    starts = np.concatenate(([0.0], np.cumsum(lengths)))
+    total = starts[-1]
+    bounds = np.concatenate(([0.0], np.cumsum(weights) / weights.sum())) * total
+    gaps = starts[1:-1]
+    if len(gaps):
+        for k in range(1, len(words)):
+            nearest = gaps[np.argmin(np.abs(gaps - bounds[k]))]
+            tolerance = SNAP_PUNCT if pauses_after and pauses_after[k - 1] else SNAP
+            if abs(nearest - bounds[k]) <= tolerance and bounds[k - 1] < nearest:
+                bounds[k] = nearest
+        bounds = np.maximum.accumulate(bounds)
+
+    # Map a voiced-time position back to a real timestamp
+    def to_time(pos, at_end):
+        i = int(np.searchsorted(starts, pos, side="left" if at_end else "right")) - 1
+        i = min(max(i, 0), len(regions) - 1)
+        return float(regions[i][0] + (pos - starts[i]))
+
+    return [{"word": w, "start": round(to_time(bounds[k], False), 3), "end": round(to_time(bounds[k + 1], True), 3)}
+            for k, w in enumerate(words)]
+
+def _cache_path(key):
+    return os.path.join(ALIGN_CACHE_DIR, key[:2], key + ".json")
+
+def align_words(audio_path, text):
+    """
+    Word timings [{'word', 'start', 'end'}] for audio_path speaking `text`, in the same
+    format as Edge TTS WordBoundary metadata. Returns [] if the audio cannot be read.
+    """
+    words, pauses_after = [], []
+    for token in re.findall(r"\S+", text or ""):
+        word = re.sub(r"^[^\w']+|[^\w']+$", "", token)
+        if word:
+            words.append(word)
+            pauses_after.append(bool(re.search(r"[,.;:!?]$", token)))
+    if not words or not os.path.exists(audio_path):
+        return []
+
+    key = hashlib.sha256((hash_file(audio_path) + "|" + " ".join(words)).encode()).hexdigest()
+    path = _cache_path(key)
+    try:
+        with open(path) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        pass
+
+    try:
+        pcm = decode_pcm(audio_path, sample_rate=ALIGN_SAMPLE_RATE)
+    except Exception as e:
+        print(f"  [WARN] Alignment could not decode {audio_path}: {e}")
+        return []
+    timings = allocate_words(words, speech_regions(pcm), len(pcm) / ALIGN_SAMPLE_RATE, pauses_after)
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(timings, f)
+    os.replace(tmp_path, path)
+    return timings
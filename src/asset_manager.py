@@ -1,5 +1,7 @@
+import os
 import requests
 from .config import Config
+from .telemetry import traced, current_span
 
 class AssetManager:
     def __init__(self):
@@ -7,6 +9,7 @@ class AssetManager:
         #     raise ValueError("PEXELS_API_KEY not found")
         self.headers = {"Authorization": Config.PEXELS_API_KEY or ""}
     
+    @traced("assets.search_video")
     def search_video(self, query, orientation="portrait"):
         """Searches Pexels for a video URL."""
         url = f"https://api.pexels.com/videos/search?query={query}&per_page=1&orientation={orientation}"
@@ -31,6 +34,8 @@ class AssetManager:
         from PIL import Image
         
         for attempt in range(max_retries):
+            if attempt > 0:
+                current_span().add_retry()
             try:
                 response = requests.get(url, stream=True, timeout=15)
                 
@@ -50,6 +55,7 @@ class AssetManager:
                     for chunk in response.iter_content(chunk_size=1024):
                         if chunk:
                             f.write(chunk)
+                            current_span().add_bytes(len(chunk))
                 
                 # VERIFICATION: Try to open with PIL
                 try:
@@ -67,6 +73,7 @@ class AssetManager:
         
         return False
 
+    @traced("assets.generate_image")
     def generate_image(self, prompt, output_path, orientation="portrait"):
         """Generates an image using Pollinations.ai (Free) with enhanced styling."""
         import urllib.parse
@@ -0,0 +1,139 @@
+"""
+Audio Probe - Duration/validity check without opening a decoder.
+MP3 and ADTS AAC durations come from walking the frame headers in pure Python
+(a few ms for a TTS clip), WAV from its header. Other containers fall back to one
+ffprobe/ffmpeg call.
+Results are memoized per (path, size, mtime), so the synthesis step pays for the
+probe once and every later consumer (generator, editors, renderers) gets it free.
+"""
+
+import os
+import re
+import json
+import wave
+import shutil
+import subprocess
+import threading
+
+_MP3_BITRATES = {
+    1: [0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],  # MPEG-1 Layer III
+    2: [0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],      # MPEG-2 / 2.5 Layer III
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+_AAC_SAMPLE_RATES = [96000, 88200, 64000, 48000, 44100, 32000, 24000, 22050, 16000, 12000, 11025, 8000, 7350]
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+def _skip_id3(data):
+    if data[:3] == b"ID3" and len(data) >= 10:
+        return 10 + ((data[6] << 21) | (data[7] << 14) | (data[8] << 7) | data[9])
+    return 0
+
+def _scan_mp3(data):
+    pos = _skip_id3(data)
+    frames = []
+    t = 0.0
+    n = len(data)
+    while pos + 4 <= n:
+        b1, b2 = data[pos + 1], data[pos + 2]
+        version = (b1 >> 3) & 0x3
+        if data[pos] != 0xFF or (b1 & 0xE0) != 0xE0 or version == 1 or ((b1 >> 1) & 0x3) != 1:
+            pos += 1 # Not a Layer III header: resync
+            continue
+        br_index, sr_index = b2 >> 4, (b2 >> 2) & 0x3
+        if br_index in (0, 15) or sr_index == 3:
+            pos += 1
+            continue
+        bitrate = _MP3_BITRATES[1 if version == 3 else 2][br_index] * 1000
+        sample_rate = _MP3_SAMPLE_RATES[version][sr_index]
+        samples = 1152 if version == 3 else 576
+        length = (samples // 8) * bitrate // sample_rate + ((b2 >> 1) & 0x1)
+        # A leading Xing/Info frame (LAME VBR header) carries no audio
+        if frames or data.find(b"Xing", pos, pos + 64) < 0 and data.find(b"Info", pos, pos + 64) < 0:
+            frames.append((pos, t))
+            t += samples / sample_rate
+        pos += length
+    return frames, t
+
+def mp3_frames(data):
+    """Returns [(byte_offset, start_seconds)] for every MPEG Layer III audio frame in data."""
+    return _scan_mp3(data)[0]
+
+def _mp3_duration(data):
+    frames, total = _scan_mp3(data)
+    return total if frames else None
+
+def _adts_duration(data):
+    pos, n = _skip_id3(data), len(data)
+    samples, sample_rate = 0, None
+    while pos + 7 <= n:
+        if data[pos] != 0xFF or (data[pos + 1] & 0xF6) != 0xF0:
+            pos += 1
+            continue
+        sr_index = (data[pos + 2] >> 2) & 0xF
+        length = ((data[pos + 3] & 0x3) << 11) | (data[pos + 4] << 3) | (data[pos + 5] >> 5)
+        if sr_index >= len(_AAC_SAMPLE_RATES) or length < 7:
+            pos += 1
+            continue
+        sample_rate = _AAC_SAMPLE_RATES[sr_index]
+        samples += 1024 * ((data[pos + 6] & 0x3) + 1)
+        pos += length
+    return samples / sample_rate if sample_rate else None
+
+def _ffmpeg_binary():
+    try:
+        from moviepy.config import get_setting
+        return get_setting("FFMPEG_BINARY")
+    except Exception:
+        return "ffmpeg"
+
+def _subprocess_duration(path):
+    """One external probe for containers we do not parse (m4a, wav, ...)."""
+    ffprobe = shutil.which("ffprobe")
+    try:
+        if ffprobe:
+            result = subprocess.run([ffprobe, '-v', 'error', '-show_entries', 'format=duration', '-of', 'json', path],
+                                    capture_output=True, text=True, timeout=10)
+            if result.returncode == 0:
+                return float(json.loads(result.stdout)['format']['duration'])
+        result = subprocess.run([_ffmpeg_binary(), '-i', path], capture_output=True, text=True, timeout=10)
+        match = re.search(r"Duration:\s*(\d+):(\d+):([\d.]+)", result.stderr)
+        if match:
+            h, m, s = match.groups()
+            return float(h) * 3600 + float(m) * 60 + float(s)
+    except Exception as e:
+        print(f"  [WARN] Audio probe failed for {path}: {e}")
+    return None
+
+def probe_duration(path):
+    """Duration of an audio file in seconds, or None if it is missing or has no audio frames."""
+    try:
+        st = os.stat(path)
+    except OSError:
+        return None
+    key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _memo_lock:
+        if key in _memo:
+            return _memo[key]
+
+    duration = None
+    ext = os.path.splitext(path)[1].lower()
+    if ext in (".mp3", ".aac"):
+        with open(path, "rb") as f:
+            data = f.read()
+        duration = _mp3_duration(data) if ext == ".mp3" else _adts_duration(data)
+        if duration is None and ext == ".mp3":
+            duration = _adts_duration(data) # The silent fallback may write AAC into a .mp3 name
+    elif ext == ".wav":
+        try:
+            with wave.open(path, "rb") as f:
+                duration = f.getnframes() / f.getframerate()
+        except (wave.Error, EOFError):
+            duration = None
+    if duration is None:
+        duration = _subprocess_duration(path)
+
+    with _memo_lock:
+        _memo[key] = duration
+    return duration
@@ -1,68 +1,183 @@
-from moviepy.editor import TextClip, CompositeVideoClip
-import json
-import os
-
-def create_caption_clip(text, start_time, duration, fontsize=70, color='yellow', stroke_color='black', stroke_width=2, method='caption'):
-    """Create a single MoviePy TextClip"""
-    # Use distinct font if available, else default
-    font = "Arial-Bold" 
-    
-    # Create text clip
-    txt_clip = TextClip(
-        text, 
-        fontsize=fontsize, 
-        color=color, 
-        font=font, 
-        stroke_color=stroke_color, 
-        stroke_width=stroke_width,
-        method=method,
-        size=(1080, None) if method=='caption' else None
-    )
-    
-    txt_clip = txt_clip.set_position(('center', 'center')).set_start(start_time).set_duration(duration)
-    return txt_clip
-
-def generate_word_level_captions(audio_metadata, video_duration):
-    """
-    Generate a list of TextClips from EdgeTTS timestamp metadata.
-    audio_metadata: List of dicts (word, start, end) from EdgeTTS or localized logic.
-    """
-    if not audio_metadata:
-        return []
-        
-    clips = []
-    
-    # Process each word
-    for i, item in enumerate(audio_metadata):
+"""
+Word-level captions without ImageMagick. Each unique (word, size, color, stroke) is
+rasterized once with PIL into an in-memory glyph atlas (LRU); captions come out either
+as MoviePy clips / RGBA frames built from the atlas, or as an ASS file that ffmpeg
+burns in natively with the subtitles filter.
+"""
+
+from collections import OrderedDict
+import threading
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont, ImageColor
+from moviepy.editor import ImageClip
+
+FONT_PATHS = [
+    "arialbd.ttf",
+    "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
+]
+ASS_FONT = "Arial"
+CAPTION_WIDTH = 1080
+ATLAS_SIZE = 2048 # Glyph images kept in memory
+
+class GlyphAtlas:
+    """LRU cache of rasterized caption words as RGBA arrays."""
+
+    def __init__(self, max_entries=ATLAS_SIZE):
+        self.max_entries = max_entries
+        self.glyphs = OrderedDict()
+        self.fonts = {}
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def _font(self, fontsize):
+        if fontsize not in self.fonts:
+            font = None
+            for path in FONT_PATHS:
+                try:
+                    font = ImageFont.truetype(path, fontsize)
+                    break
+                except OSError:
+                    continue
+            self.fonts[fontsize] = font or ImageFont.load_default()
+        return self.fonts[fontsize]
+
+    def get(self, text, fontsize=70, color='yellow', stroke_color='black', stroke_width=2, max_width=CAPTION_WIDTH):
+        """RGBA uint8 array of `text`, rendered on first use and cached after that."""
+        key = (text, fontsize, color, stroke_color, stroke_width, max_width)
+        with self._lock:
+            glyph = self.glyphs.get(key)
+            if glyph is not None:
+                self.glyphs.move_to_end(key)
+                self.hits += 1
+                return glyph
+            self.misses += 1
+            glyph = self._render(text, fontsize, color, stroke_color, stroke_width, max_width)
+            self.glyphs[key] = glyph
+            if len(self.glyphs) > self.max_entries:
+                self.glyphs.popitem(last=False)
+            return glyph
+
+    def _render(self, text, fontsize, color, stroke_color, stroke_width, max_width):
+        font = self._font(fontsize)
+        left, top, right, bottom = ImageDraw.Draw(Image.new('RGBA', (1, 1))).textbbox(
+            (0, 0), text, font=font, stroke_width=stroke_width)
+        w, h = max(1, right - left), max(1, bottom - top)
+        if w > max_width and fontsize > 20:
+            # Long words shrink to fit instead of wrapping mid-word
+            return self._render(text, max(20, int(fontsize * max_width / w)), color, stroke_color, stroke_width, max_width)
+        img = Image.new('RGBA', (w, h), (0, 0, 0, 0))
+        ImageDraw.Draw(img).text((-left, -top), text, font=font, fill=color,
+                                 stroke_width=stroke_width, stroke_fill=stroke_color)
+        glyph = np.asarray(img)
+        glyph.flags.writeable = False # Shared between clips
+        return glyph
+
+_atlas = GlyphAtlas()
+
+def get_atlas():
+    return _atlas
+
+def caption_events(audio_metadata):
+    """Normalizes EdgeTTS/alignment word timings into (word, start, end, fontsize) events."""
+    events = []
+    for i, item in enumerate(audio_metadata or []):
         word = item.get('word', '')
         start = item.get('start', 0)
         end = item.get('end', 0)
-        
+
         # Correction: Ensure end time is valid
         if end <= start:
             if i < len(audio_metadata) - 1:
                 end = audio_metadata[i+1]['start']
             else:
                 end = start + 0.5 # Default duration
-        
-        duration = end - start
-        
-        # Skip empty words or punctuation-only if desired, but keep for rhythm
+        if end <= start:
+            end = start + 0.5
+
+        # Skip empty words
         if not word.strip():
             continue
-            
-        # Highlight style (Yellow with black stroke)
-        # We can alternate colors or emphasize keywords if we had keyword logic
-        color = 'yellow'
-        
-        # Create clip
-        clip = create_caption_clip(
-            word, 
-            start_time=start, 
-            duration=duration,
-            fontsize=80 if len(word) < 8 else 60, # Dynamic sizing
-            color=color
-        )
-        clips.append(clip)
-        
-    return clips
+        events.append((word, start, end, 80 if len(word) < 8 else 60)) # Dynamic sizing
+    return events
+
+def create_caption_clip(text, start_time, duration, fontsize=70, color='yellow', stroke_color='black', stroke_width=2):
+    """Create a single MoviePy clip from the glyph atlas (RGB plus alpha mask)"""
+    glyph = _atlas.get(text, fontsize, color, stroke_color, stroke_width)
+    mask = ImageClip(glyph[:, :, 3] / 255.0, ismask=True)
+    txt_clip = ImageClip(glyph[:, :, :3]).set_mask(mask)
+    return txt_clip.set_position(('center', 'center')).set_start(start_time).set_duration(duration)
+
+def render_caption_frame(events, t, size=(CAPTION_WIDTH, 1920), color='yellow', stroke_color='black', stroke_width=2):
+    """RGBA overlay frame at time t: the active word centered on a transparent canvas."""
+    w, h = size
+    frame = np.zeros((h, w, 4), dtype=np.uint8)
+    for word, start, end, fontsize in events:
+        if start <= t < end:
+            glyph = _atlas.get(word, fontsize, color, stroke_color, stroke_width, max_width=w)
+            gh, gw = glyph.shape[:2]
+            x, y = (w - gw) // 2, (h - gh) // 2
+            frame[y:y + gh, x:x + gw] = glyph
+            break
+    return frame
+
+def _ass_color(color):
+    r, g, b = ImageColor.getrgb(color)[:3]
+    return f"&H00{b:02X}{g:02X}{r:02X}"
+
+def _ass_time(seconds):
+    cs = int(round(max(0.0, seconds) * 100))
+    return f"{cs // 360000}:{cs // 6000 % 60:02d}:{cs // 100 % 60:02d}.{cs % 100:02d}"
+
+def _ass_text(word):
+    return word.replace("\\", "\\\\").replace("{", "\\{").replace("}", "\\}")
+
+def write_ass_captions(events, output_path, video_duration=None, size=(CAPTION_WIDTH, 1920),
+                       color='yellow', stroke_color='black', stroke_width=2):
+    """Writes caption events as an ASS script (one Dialogue line per word)."""
+    w, h = size
+    lines = [
+        "[Script Info]",
+        "ScriptType: v4.00+",
+        f"PlayResX: {w}",
+        f"PlayResY: {h}",
+        "WrapStyle: 2",
+        "ScaledBorderAndShadow: yes",
+        "",
+        "[V4+ Styles]",
+        "Format: Name, Fontname, Fontsize, PrimaryColour, SecondaryColour, OutlineColour, BackColour, "
+        "Bold, Italic, Underline, StrikeOut, ScaleX, ScaleY, Spacing, Angle, BorderStyle, Outline, Shadow, "
+        "Alignment, MarginL, MarginR, MarginV, Encoding",
+        f"Style: Word,{ASS_FONT},80,{_ass_color(color)},{_ass_color(color)},{_ass_color(stroke_color)},&H00000000,"
+        f"-1,0,0,0,100,100,0,0,1,{stroke_width},0,5,20,20,0,1",
+        "",
+        "[Events]",
+        "Format: Layer, Start, End, Style, Name, MarginL, MarginR, MarginV, Effect, Text",
+    ]
+    for word, start, end, fontsize in events:
+        if video_duration is not None:
+            end = min(end, video_duration)
+            if start >= end:
+                continue
+        lines.append(f"Dialogue: 0,{_ass_time(start)},{_ass_time(end)},Word,,0,0,0,,{{\\fs{fontsize}}}{_ass_text(word)}")
+    with open(output_path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+    return output_path
+
+def generate_word_level_captions(audio_metadata, video_duration, output_path=None):
+    """
+    Generate word-level captions from EdgeTTS timestamp metadata.
+    audio_metadata: List of dicts (word, start, end) from EdgeTTS or localized logic.
+    With output_path, writes an ASS file for ffmpeg and returns its path (or None);
+    otherwise returns a list of MoviePy clips.
+    """
+    events = caption_events(audio_metadata)
+    if output_path:
+        if not events:
+            return None
+        return write_ass_captions(events, output_path, video_duration)
+
+    # Highlight style (Yellow with black stroke)
+    return [create_caption_clip(word, start_time=start, duration=end - start, fontsize=fontsize)
+            for word, start, end, fontsize in events]
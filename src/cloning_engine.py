@@ -1,79 +1,207 @@
 import os
+import time
 import shutil
-from gradio_client import Client
+import threading
+import requests
 
-def clone_voice(text, output_path, reference_audio="assets/voice_sample.wav"):
+try:
+    from .file_cache import get_tts_cache, hash_file, normalize_tts_text
+except ImportError:
+    from file_cache import get_tts_cache, hash_file, normalize_tts_text
+
+# Verified public spaces as of today.
+# Some spaces might become private, so we include multiple variations.
+DEFAULT_SPACES = [
+    "coqui/xtts-v2",           # Official (sometimes busy)
+    "daswer123/xtts-api",      # Very stable API endpoint
+    "R3gm/XTTS-v2",            # Reliable public fork
+    "mrfakename/E2-F5-TTS"      # Modern alternative (very fast)
+]
+CLONE_SPACES = [s.strip() for s in os.getenv("CLONE_SPACES", "").split(",") if s.strip()] or DEFAULT_SPACES
+
+def _default_client(space):
+    from gradio_client import Client
+    token = os.environ.get("HF_TOKEN")
+    try:
+        return Client(space, token=token)
+    except TypeError:
+        return Client(space, hf_token=token) # gradio_client < 1.0
+
+def _file_input(path_or_url):
+    """Wraps a file for predict(): gradio_client >= 1.0 wants handle_file(), older takes the raw path."""
+    try:
+        from gradio_client import handle_file
+        return handle_file(path_or_url)
+    except ImportError:
+        return path_or_url
+
+class VoiceCloneSession:
     """
-    Clones a voice from a reference sample and generates audio for the given text.
-    Uses free Hugging Face spaces via gradio_client.
+    Keeps one connected gradio Client per space for the whole run, uploads the
+    reference sample to each space once and reuses the server-side copy, and caches
+    cloned clips by (text, reference sample contents).
     """
-    if not os.path.exists(reference_audio):
-        # Fallback to .mpeg if .wav wasn't created
-        alt_ref = reference_audio.replace(".wav", ".mpeg")
-        if os.path.exists(alt_ref):
-            reference_audio = alt_ref
-        else:
-            print(f"Error: Reference voice sample not found at {reference_audio}")
+
+    def __init__(self, spaces=None, client_factory=None, cache=None):
+        self.spaces = spaces or CLONE_SPACES
+        self.client_factory = client_factory or _default_client
+        self.cache = cache or get_tts_cache()
+        self.clients = {}
+        self.references = {}  # (space, reference sha) -> uploaded file handle
+        self.dead = set()     # Spaces that failed to connect this run
+        self._lock = threading.Lock()
+        self._warm_thread = None
+
+    def _client(self, space):
+        with self._lock:
+            if space in self.clients:
+                return self.clients[space]
+        client = self.client_factory(space)
+        with self._lock:
+            return self.clients.setdefault(space, client)
+
+    def _reference(self, space, client, reference_audio, ref_hash):
+        """
+        Uploads the reference sample to this space once; later calls reuse the server copy.
+        gradio_client uploads every FileData input whose path is not a URL, so the copy goes
+        to predict() as its file= URL. For private spaces it downloads and re-uploads even
+        those, so there the local sample is sent with each call instead.
+        """
+        key = (space, ref_hash)
+        with self._lock:
+            if key in self.references:
+                return self.references[key]
+        handle = None
+        upload_url = getattr(client, "upload_url", None)
+        if upload_url and not getattr(client, "_space_is_private", False):
+            try:
+                with open(reference_audio, "rb") as f:
+                    r = requests.post(upload_url, headers=getattr(client, "headers", None),
+                                      files=[("files", (os.path.basename(reference_audio), f))], timeout=60)
+                r.raise_for_status()
+                handle = _file_input(f"{client.src_prefixed}file={r.json()[0]}")
+                print(f"  [CLONE] Reference sample uploaded once to {space}")
+            except Exception as e:
+                print(f"  [WARN] Reference upload to {space} failed ({e}), sending it with each call")
+        if handle is None:
+            handle = _file_input(reference_audio)
+        with self._lock:
+            self.references[key] = handle
+        return handle
+
+    def warm_up(self, reference_audio="assets/voice_sample.wav"):
+        """Connects to the first live space and uploads the sample in the background."""
+        reference_audio = _resolve_reference(reference_audio)
+        if not reference_audio or self._warm_thread:
+            return
+
+        def warm():
+            ref_hash = hash_file(reference_audio)
+            for space in self.spaces:
+                try:
+                    self._reference(space, self._client(space), reference_audio, ref_hash)
+                    return
+                except Exception as e:
+                    print(f"  [WARN] Warm-up of {space} failed: {e}")
+                    self.dead.add(space)
+
+        self._warm_thread = threading.Thread(target=warm, name="clone-warmup", daemon=True)
+        self._warm_thread.start()
+
+    def clone(self, text, output_path, reference_audio="assets/voice_sample.wav"):
+        reference_audio = _resolve_reference(reference_audio)
+        if not reference_audio:
             return None
+        if self._warm_thread:
+            self._warm_thread.join() # Reuse the client/upload the warm-up is making
 
-    print(f"--- Cloning Voice for: '{text[:50]}...' ---")
-    
-    # Verified public spaces as of today. 
-    # Some spaces might become private, so we include multiple variations.
-    spaces = [
-        "coqui/xtts-v2",           # Official (sometimes busy)
-        "daswer123/xtts-api",      # Very stable API endpoint
-        "R3gm/XTTS-v2",            # Reliable public fork
-        "mrfakename/E2-F5-TTS"      # Modern alternative (very fast)
-    ]
-    
-    for space in spaces:
-        try:
-            print(f"[*] Attempting voice cloning via {space}...")
-            # Set a strict timeout to prevent GitHub Action hangs
-            hf_token = os.environ.get("HF_TOKEN")
-            client = Client(space, hf_token=hf_token)
-            
-            if "xtts-v2" in space.lower():
-                # XTTS-v2 standard API
-                # Using a timeout in the predict call if the space supports it/gradio allows
-                result = client.predict(
-                    text,	# Text to speak
-                    "en",	# Language
-                    reference_audio,	# Reference audio
-                    reference_audio,	# Reference audio (duplicate for some APIs)
-                    False,	# Agree to terms
-                    False,	# Use sentence splitter
-                    api_name="/predict"
-                )
-            else:
-                # E2-F5-TTS or similar
-                result = client.predict(
-                    reference_audio,
-                    "", # Reference text (optional)
-                    text,
-                    "E2-F5", # Model type
-                    0.2, # Speed
-                    api_name="/predict"
-                )
-            
-            if result and os.path.exists(result):
-                # result is usually a temporary filepath
-                shutil.copy(result, output_path)
-                print(f"  [OK] Audio cloned successfully via {space}")
-                return output_path
-                
-        except Exception as e:
-            # Check for common authentication or availability errors
-            error_msg = str(e)
-            if "401" in error_msg:
-                print(f"  [WARN] Space {space} requires authentication (401). Skipping.")
-            elif "404" in error_msg:
-                print(f"  [WARN] Space {space} not found (404). Skipping.")
-            print(f"  [RETRY] Space {space} failed, trying next in 5s...")
-            import time
-            time.sleep(5)
-            continue
-
-    print("  [ERROR] All voice cloning spaces failed.")
+        ref_hash = hash_file(reference_audio)
+        cache_key = self.cache.key(text=normalize_tts_text(text), provider="clone", reference=ref_hash)
+        if self.cache.fetch(cache_key, output_path):
+            print(f"  [CACHE] Cloned voice hit for: '{text[:30]}...'")
+            return output_path
+
+        print(f"--- Cloning Voice for: '{text[:50]}...' ---")
+        for space in self.spaces:
+            if space in self.dead:
+                continue
+            try:
+                print(f"[*] Attempting voice cloning via {space}...")
+                client = self._client(space)
+                reference = self._reference(space, client, reference_audio, ref_hash)
+
+                if "xtts-v2" in space.lower():
+                    # XTTS-v2 standard API
+                    result = client.predict(
+                        text,	# Text to speak
+                        "en",	# Language
+                        reference,	# Reference audio
+                        reference,	# Reference audio (duplicate for some APIs)
+                        False,	# Agree to terms
+                        False,	# Use sentence splitter
+                        api_name="/predict"
+                    )
+                else:
+                    # E2-F5-TTS or similar
+                    result = client.predict(
+                        reference,
+                        "", # Reference text (optional)
+                        text,
+                        "E2-F5", # Model type
+                        0.2, # Speed
+                        api_name="/predict"
+                    )
+
+                if result and os.path.exists(result):
+                    # result is usually a temporary filepath
+                    shutil.copy(result, output_path)
+                    self.cache.store(cache_key, output_path)
+                    print(f"  [OK] Audio cloned successfully via {space}")
+                    return output_path
+
+            except Exception as e:
+                # Check for common authentication or availability errors
+                error_msg = str(e)
+                if "401" in error_msg:
+                    print(f"  [WARN] Space {space} requires authentication (401). Skipping.")
+                    self.dead.add(space)
+                elif "404" in error_msg:
+                    print(f"  [WARN] Space {space} not found (404). Skipping.")
+                    self.dead.add(space)
+                with self._lock:
+                    # A broken connection is rebuilt on the next attempt
+                    self.clients.pop(space, None)
+                print(f"  [RETRY] Space {space} failed, trying next in 5s...")
+                time.sleep(5)
+                continue
+
+        print("  [ERROR] All voice cloning spaces failed.")
+        return None
+
+def _resolve_reference(reference_audio):
+    if os.path.exists(reference_audio):
+        return reference_audio
+    # Fallback to .mpeg if .wav wasn't created
+    alt_ref = reference_audio.replace(".wav", ".mpeg")
+    if os.path.exists(alt_ref):
+        return alt_ref
+    print(f"Error: Reference voice sample not found at {reference_audio}")
     return None
+
+_session = None
+_session_lock = threading.Lock()
+
+def get_clone_session():
+    """Process-wide cloning session (clients and uploads live as long as the run)."""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = VoiceCloneSession()
+        return _session
+
+def clone_voice(text, output_path, reference_audio="assets/voice_sample.wav"):
+    """
+    Clones a voice from a reference sample and generates audio for the given text.
+    Uses free Hugging Face spaces via gradio_client.
+    """
+    return get_clone_session().clone(text, output_path, reference_audio)
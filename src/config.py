@@ -21,3 +21,24 @@ class Config:
     NICHE = os.getenv("NICHE", "Relatable Daily Life Humour and Human Experience")
     VIDEO_LANGUAGE = os.getenv("VIDEO_LANGUAGE", "en-US")
     VOICE_NAME = os.getenv("VOICE_NAME", "en-US-ChristopherNeural") # Deep, professional male voice
+
+    # Scene Pipeline Concurrency (per provider)
+    ELEVENLABS_CONCURRENCY = int(os.getenv("ELEVENLABS_CONCURRENCY", "2"))
+    EDGE_TTS_CONCURRENCY = int(os.getenv("EDGE_TTS_CONCURRENCY", "4"))
+    IMAGE_CONCURRENCY = int(os.getenv("IMAGE_CONCURRENCY", "3")) # Pollinations throttles aggressive clients
+    # Request rate limits (requests/second, token bucket); scenes queue for a slot
+    ELEVENLABS_RATE = float(os.getenv("ELEVENLABS_RATE", "2"))
+    EDGE_TTS_RATE = float(os.getenv("EDGE_TTS_RATE", "5"))
+
+    # Gemini async client: concurrent requests, and opt-in hedging (a second model gets the
+    # same prompt once the first is slower than this percentile of its recent latencies for
+    # the same kind of call). Off by default: a hedge is a second full request on the quota.
+    GEMINI_CONCURRENCY = int(os.getenv("GEMINI_CONCURRENCY", "3"))
+    GEMINI_HEDGE = os.getenv("GEMINI_HEDGE", "0") == "1"
+    GEMINI_HEDGE_PERCENTILE = float(os.getenv("GEMINI_HEDGE_PERCENTILE", "95"))
+    GEMINI_HEDGE_AFTER = float(os.getenv("GEMINI_HEDGE_AFTER", "25")) # Seconds, never hedge sooner than this
+
+    # ElevenLabs HTTP client
+    ELEVENLABS_API_BASE = os.getenv("ELEVENLABS_API_BASE", "https://api.elevenlabs.io")
+    ELEVENLABS_TIMEOUT = float(os.getenv("ELEVENLABS_TIMEOUT", "60")) # Seconds between streamed chunks
+    ELEVENLABS_CHAR_RESERVE = int(os.getenv("ELEVENLABS_CHAR_RESERVE", "200")) # Switch to Edge TTS this far from the quota
@@ -9,6 +9,7 @@ from video_editor import VideoEditor
 from generator import generate_audio
 from gemini_visual_engine import generate_gemini_image
 from llm_wrapper import llm
+from telemetry import span, tracer
 
 def clear_screen():
     os.system('cls' if os.name == 'nt' else 'clear')
@@ -44,7 +45,7 @@ async def run_director():
     if topic_source == "Generate Viral Hooks (Dark Psych)":
         print("\n[*] Brainstorming viral hooks...")
         # Use LLM to generate hooks
-        hooks = llm.generate_psychology_titles()
+        hooks = llm.generate_psychology_titles(cache=False) # Fresh ideas every session
         if not hooks:
             print("[!] Failed to generate hooks. Please enter manually.")
             selected_topic = get_user_input("Enter your topic")
@@ -81,7 +82,7 @@ async def run_director():
             break
         elif action == "Regenerate Script":
             print("[*] Regenerating...")
-            script_data = llm.generate_psychology_short_script(selected_topic)
+            script_data = llm.generate_psychology_short_script(selected_topic, cache=False)
         elif action == "Edit Manually (JSON)":
             # Simple dump to temp file and await press
             with open("temp_script_edit.json", "w") as f:
@@ -149,13 +150,27 @@ async def run_director():
     if not os.path.exists(bg_music_path):
         bg_music_path = None # Silent if missing
         
-    editor.create_video(processed_scenes, final_output, is_short=True, bg_music_path=bg_music_path, style="noir")
+    # Fast draft preview first, so the cut can be judged before paying for the final encode
+    preview_output = os.path.join(output_dir, "preview_draft.mp4")
+    print("[*] Rendering draft preview...")
+    editor.create_video(processed_scenes, preview_output, is_short=True, bg_music_path=bg_music_path, style="noir", profile="draft")
+    print(f"[*] Preview saved to: {preview_output}")
+    os.system(f"start {preview_output}")
+
+    if select_option(["Render Final Cut", "Keep Draft Only"], "Preview ready. Continue?") == "Keep Draft Only":
+        print(f"\n[SUCCESS] Draft saved to: {preview_output}")
+        return
+
+    editor.create_video(processed_scenes, final_output, is_short=True, bg_music_path=bg_music_path, style="noir", profile="final")
     
     print(f"\n[SUCCESS] Video saved to: {final_output}")
     os.system(f"start {final_output}")
 
 if __name__ == "__main__":
     try:
-        asyncio.run(run_director())
+        with span("director"):
+            asyncio.run(run_director())
     except KeyboardInterrupt:
         print("\n[!] Production Cancelled.")
+    finally:
+        tracer.write()
@@ -1,27 +1,97 @@
 import requests
 import os
+import shutil
+import threading
+from concurrent.futures import Future
+from requests.adapters import HTTPAdapter
 from .config import Config
+from .silence_trim import trim_audio_file
+
+class CharacterBudget:
+    """
+    Tracks ElevenLabs character usage locally so we can switch to Edge TTS *before*
+    a request is rejected for quota. Seeded once from /v1/user/subscription.
+    """
+
+    def __init__(self, reserve=Config.ELEVENLABS_CHAR_RESERVE):
+        self.reserve = reserve
+        self.used = None
+        self.limit = None
+        self.exhausted = False
+        self._lock = threading.Lock()
+
+    def load(self, session, base_url):
+        try:
+            response = session.get(f"{base_url}/v1/user/subscription", timeout=10)
+            if response.status_code == 200:
+                data = response.json()
+                with self._lock:
+                    self.used = data.get("character_count", 0)
+                    self.limit = data.get("character_limit")
+                print(f"  [ELEVENLABS] Character budget: {self.remaining()} left")
+        except Exception as e:
+            print(f"  [WARN] Could not read ElevenLabs quota: {e}")
+
+    def remaining(self):
+        if self.limit is None or self.used is None:
+            return None
+        return self.limit - self.used
+
+    def reserve_chars(self, n):
+        """Claims n characters. Returns False when the call would run into the quota."""
+        with self._lock:
+            if self.exhausted:
+                return False
+            if self.limit is not None and self.used is not None:
+                if self.used + n > self.limit - self.reserve:
+                    self.exhausted = True
+                    return False
+                self.used += n
+            return True
+
+    def release(self, n):
+        """Gives back characters of a request that never reached the API."""
+        with self._lock:
+            if self.used is not None:
+                self.used = max(0, self.used - n)
+
+    def mark_exhausted(self):
+        with self._lock:
+            self.exhausted = True
 
 class ElevenLabsEngine:
-    def __init__(self):
+    def __init__(self, base_url=None):
         self.api_key = os.environ.get("ELEVENLABS_API_KEY")
         self.voice_id = os.environ.get("ELEVENLABS_VOICE_ID") # Cloned voice ID
-        self.url = f"https://api.elevenlabs.io/v1/text-to-speech/{self.voice_id}"
+        self.base_url = (base_url or Config.ELEVENLABS_API_BASE).rstrip("/")
+        self.url = f"{self.base_url}/v1/text-to-speech/{self.voice_id}/stream"
+
+        # One keep-alive pool per engine, sized for the scene pipeline's concurrency
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max(2, Config.ELEVENLABS_CONCURRENCY))
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+        self.session.headers.update({
+            "Accept": "audio/mpeg",
+            "Content-Type": "application/json",
+            "xi-api-key": self.api_key or ""
+        })
+
+        self.budget = CharacterBudget()
+        self._budget_loaded = False
+        self._budget_lock = threading.Lock()
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
 
     def generate_audio(self, text, output_path, voice_settings=None, remove_silence=False):
         """
         Generates high-quality cloned audio using ElevenLabs API.
+        Returns the final audio path (a .wav when remove_silence=True) or False.
         """
         if not self.api_key or not self.voice_id:
             print("ElevenLabs credentials missing. Falling back to default voice.")
             return False
 
-        headers = {
-            "Accept": "audio/mpeg",
-            "Content-Type": "application/json",
-            "xi-api-key": self.api_key
-        }
-
         # Default settings or user override
         settings = {
             "stability": 0.5,
@@ -38,36 +108,74 @@ class ElevenLabsEngine:
             "voice_settings": settings
         }
 
-        try:
-            response = requests.post(self.url, json=data, headers=headers)
-            if response.status_code == 200:
-                with open(output_path, "wb") as f:
-                    f.write(response.content)
-                
-                # Post-Processing: Remove Silence and Speed Adjustment
-                if remove_silence:
-                   try:
-                       import subprocess
-                       # ffmpeg filter: silence remove (start & end, and middle gaps > 0.3s)
-                       # atempo=1.0 is default, user asked for speed 1.
-                       temp_path = output_path + ".tmp.mp3"
-                       cmd = [
-                           "ffmpeg", "-y", "-i", output_path,
-                           "-af", "silenceremove=stop_periods=-1:stop_duration=0.2:stop_threshold=-30dB",
-                           temp_path
-                       ]
-                       subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-                       
-                       if os.path.exists(temp_path):
-                           os.replace(temp_path, output_path)
-                           print(f"  [AUDIO] Silence removed from {output_path}")
-                   except Exception as e:
-                       print(f"  [WARN] Failed to remove silence: {e}")
-
-                return True
-            else:
-                print(f"ElevenLabs Error {response.status_code}: {response.text}")
+        # Coalesce identical in-flight requests: one API call, the others copy its file
+        key = (text, tuple(sorted(settings.items())))
+        with self._inflight_lock:
+            leader = self._inflight.get(key)
+            if leader is None:
+                future = self._inflight[key] = Future()
+        if leader is not None:
+            source = leader.result()
+            if not source:
                 return False
+            if os.path.abspath(source) != os.path.abspath(output_path):
+                shutil.copyfile(source, output_path)
+            print(f"  [ELEVENLABS] Reused in-flight synthesis for: '{text[:30]}...'")
+            return self._post_process(output_path, remove_silence)
+
+        result = False
+        try:
+            result = self._synthesize(data, output_path)
+        finally:
+            with self._inflight_lock:
+                del self._inflight[key]
+            future.set_result(result)
+
+        if not result:
+            return False
+        return self._post_process(output_path, remove_silence)
+
+    def _synthesize(self, data, output_path):
+        """Streams one TTS request to output_path. Returns output_path or False."""
+        with self._budget_lock:
+            if not self._budget_loaded:
+                self._budget_loaded = True
+                self.budget.load(self.session, self.base_url)
+        chars = len(data["text"])
+        if not self.budget.reserve_chars(chars):
+            print(f"  [ELEVENLABS] Character budget nearly used up ({self.budget.remaining()} left). Using Edge TTS.")
+            return False
+
+        part_path = output_path + ".part"
+        try:
+            with self.session.post(self.url, json=data, stream=True, timeout=(10, Config.ELEVENLABS_TIMEOUT)) as response:
+                if response.status_code != 200:
+                    body = response.text
+                    print(f"ElevenLabs Error {response.status_code}: {body}")
+                    if response.status_code in (401, 402, 429) and "quota" in body.lower():
+                        self.budget.mark_exhausted()
+                    else:
+                        self.budget.release(chars)
+                    return False
+                # Bytes hit the disk as they arrive; the clip is never held in memory
+                with open(part_path, "wb") as f:
+                    for chunk in response.iter_content(chunk_size=16384):
+                        if chunk:
+                            f.write(chunk)
+            os.replace(part_path, output_path)
+            return output_path
         except Exception as e:
             print(f"ElevenLabs Connection Error: {e}")
+            self.budget.release(chars)
+            if os.path.exists(part_path):
+                os.remove(part_path)
             return False
+
+    def _post_process(self, output_path, remove_silence):
+        # Post-Processing: Remove Silence (in-process on PCM, written as lossless WAV)
+        if remove_silence:
+            try:
+                output_path, _ = trim_audio_file(output_path)
+            except Exception as e:
+                print(f"  [WARN] Failed to remove silence: {e}")
+        return output_path
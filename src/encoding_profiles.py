@@ -0,0 +1,66 @@
+"""
+Encoding Profiles - One place for every render path's encoder settings.
+draft    : fast previews (director mode, --dry-run)
+standard : day-to-day uploads
+final    : slower preset / lower CRF for the best quality per byte
+All paths of one profile share fps and GOP, so segments can be concatenated with
+stream copy (-c copy) instead of a re-encode.
+"""
+
+import os
+
+class EncodingProfile:
+    def __init__(self, name, preset, crf, fps, gop, threads, audio_bitrate):
+        self.name = name
+        self.preset = preset
+        self.crf = crf
+        self.fps = fps
+        self.gop = gop          # Fixed keyframe interval (frames); scene-cut keyframes disabled
+        self.threads = threads  # 0 lets x264 decide
+        self.audio_bitrate = audio_bitrate
+
+    def video_args(self, threads=None):
+        """libx264 output options for ffmpeg command lines."""
+        args = [
+            '-c:v', 'libx264', '-preset', self.preset, '-crf', str(self.crf),
+            '-g', str(self.gop), '-keyint_min', str(self.gop), '-sc_threshold', '0',
+            '-pix_fmt', 'yuv420p', '-r', str(self.fps)
+        ]
+        threads = self.threads if threads is None else threads
+        if threads:
+            args += ['-threads', str(threads)]
+        return args
+
+    def audio_args(self):
+        return ['-c:a', 'aac', '-b:a', self.audio_bitrate, '-ar', '44100', '-ac', '2']
+
+    def frames(self, duration):
+        """Frame count for a duration at this profile's fps (zoompan d=, loops)."""
+        return max(1, int(round(duration * self.fps)))
+
+    def __repr__(self):
+        return f"EncodingProfile({self.name}: {self.preset}, crf {self.crf}, {self.fps}fps)"
+
+PROFILES = {
+    "draft": EncodingProfile("draft", preset="ultrafast", crf=32, fps=24, gop=48, threads=0, audio_bitrate="96k"),
+    "standard": EncodingProfile("standard", preset="veryfast", crf=23, fps=24, gop=48, threads=0, audio_bitrate="128k"),
+    "final": EncodingProfile("final", preset="medium", crf=20, fps=30, gop=60, threads=0, audio_bitrate="192k"),
+}
+
+DEFAULT_PROFILE = "standard"
+
+def get_profile(name=None):
+    """Returns the named profile, or the one selected by ENCODING_PROFILE (default: standard)."""
+    if isinstance(name, EncodingProfile):
+        return name
+    name = (name or os.getenv("ENCODING_PROFILE") or DEFAULT_PROFILE).lower()
+    if name not in PROFILES:
+        print(f"  [WARN] Unknown encoding profile '{name}', using '{DEFAULT_PROFILE}'")
+        name = DEFAULT_PROFILE
+    return PROFILES[name]
+
+def set_profile(name):
+    """Selects the profile for this process (and any child processes)."""
+    profile = get_profile(name)
+    os.environ["ENCODING_PROFILE"] = profile.name
+    return profile
@@ -0,0 +1,152 @@
+"""
+File Cache - Content-addressed on-disk store with size-bounded LRU eviction.
+Used to skip re-encoding render artifacts that are byte-for-byte reproducible,
+and to skip re-synthesizing speech for text we have already voiced.
+"""
+
+import os
+import json
+import shutil
+import hashlib
+import threading
+
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", ".cache/render")
+RENDER_CACHE_MAX_MB = int(os.getenv("RENDER_CACHE_MAX_MB", "2048"))
+TTS_CACHE_DIR = os.getenv("TTS_CACHE_DIR", ".cache/tts")
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "512"))
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """SHA-256 of a file's bytes."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+class FileCache:
+    def __init__(self, cache_dir, max_bytes, suffix=".mp4"):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    def key(self, files=(), **params):
+        """Builds a cache key from input file contents plus any render parameters."""
+        h = hashlib.sha256()
+        for path in files:
+            h.update(hash_file(path).encode())
+        h.update(json.dumps(params, sort_keys=True, default=str).encode())
+        return h.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.cache_dir, key[:2], key + self.suffix)
+
+    def _meta_path(self, entry):
+        return os.path.splitext(entry)[0] + ".meta.json"
+
+    def fetch(self, key, dest_path):
+        """Copies a cached entry to dest_path. Returns True on a hit."""
+        entry = self._entry_path(key)
+        try:
+            shutil.copyfile(entry, dest_path)
+            os.utime(entry) # Mark as most recently used
+        except FileNotFoundError:
+            with self._lock:
+                self.misses += 1
+            return False
+        with self._lock:
+            self.hits += 1
+        return True
+
+    def fetch_meta(self, key):
+        """Metadata stored next to an entry (None if there is none)."""
+        try:
+            with open(self._meta_path(self._entry_path(key))) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return None
+
+    def store(self, key, src_path, meta=None):
+        """Adds src_path (and optional JSON metadata) to the cache under key, then evicts down to the size bound."""
+        entry = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        # Write to a unique temp name first so concurrent writers never expose partial files
+        tmp_path = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            if meta is not None:
+                # Sidecar goes in first: a visible entry always has its metadata
+                with open(tmp_path, "w") as f:
+                    json.dump(meta, f)
+                os.replace(tmp_path, self._meta_path(entry))
+            shutil.copyfile(src_path, tmp_path)
+            os.replace(tmp_path, entry)
+        except Exception as e:
+            print(f"  [WARN] Could not store {src_path} in cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        self._evict()
+        return True
+
+    def _entries(self):
+        entries = []
+        for root, dirs, files in os.walk(self.cache_dir):
+            for name in files:
+                if not name.endswith(self.suffix):
+                    continue
+                path = os.path.join(root, name)
+                try:
+                    st = os.stat(path)
+                except FileNotFoundError:
+                    continue
+                entries.append((st.st_mtime, st.st_size, path))
+        return entries
+
+    def _evict(self):
+        """Removes least recently used entries until the cache fits in max_bytes."""
+        with self._lock:
+            entries = sorted(self._entries())
+            total = sum(size for _, size, _ in entries)
+            for _, size, path in entries:
+                if total <= self.max_bytes:
+                    break
+                for stale in (path, self._meta_path(path)):
+                    try:
+                        os.remove(stale)
+                    except FileNotFoundError:
+                        pass
+                total -= size
+
+    def stats(self):
+        entries = self._entries()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(entries),
+            "bytes": sum(size for _, size, _ in entries)
+        }
+
+_render_cache = None
+
+def get_render_cache():
+    """Shared cache for rendered video segments."""
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = FileCache(RENDER_CACHE_DIR, RENDER_CACHE_MAX_MB * 1024 * 1024)
+    return _render_cache
+
+_tts_cache = None
+
+def get_tts_cache():
+    """Shared cache for synthesized speech (MP3 + word timing sidecar)."""
+    global _tts_cache
+    if _tts_cache is None:
+        _tts_cache = FileCache(TTS_CACHE_DIR, TTS_CACHE_MAX_MB * 1024 * 1024, suffix=".mp3")
+    return _tts_cache
+
+def normalize_tts_text(text):
+    """Cache-key form of a TTS string: whitespace runs collapsed, ends trimmed."""
+    return " ".join((text or "").split())
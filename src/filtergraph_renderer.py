@@ -0,0 +1,154 @@
+"""
+Single-Pass Filtergraph Renderer
+Builds ONE ffmpeg filter_complex that covers every scene (image + motion + captions),
+the narration concat and the background music ducking mix, then encodes the final MP4
+in a single invocation. No intermediate segment files, no extra demux/mux passes.
+"""
+
+import os
+import subprocess
+import logging
+
+try:
+    from .encoding_profiles import get_profile
+except ImportError:
+    from encoding_profiles import get_profile
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MOTION = (
+    "scale={w}:{h}:force_original_aspect_ratio=decrease,pad={w}:{h}:(ow-iw)/2:(oh-ih)/2,"
+    "zoompan=z='min(zoom+0.0015,1.1)':d={frames}:s={w}x{h}:fps={fps}"
+)
+
+def _escape_filter_path(path):
+    """Escapes a file path for use inside a filtergraph option (ass=, subtitles=)."""
+    path = os.path.abspath(path).replace("\\", "/")
+    return path.replace(":", "\\:").replace("'", "\\'")
+
+class SinglePassRenderer:
+    def __init__(self, ffmpeg_path="ffmpeg", fps=None, encoder_args=None, audio_args=None, profile=None):
+        # Defaults come from the encoding profile; explicit arguments override it
+        profile = profile or get_profile()
+        self.ffmpeg_path = ffmpeg_path
+        self.fps = fps or profile.fps
+        self.encoder_args = encoder_args or profile.video_args()
+        self.audio_args = audio_args or profile.audio_args()
+
+    def build_command(self, scenes, output_path, width, height, bg_music_path=None, music_volume=0.10, fade=True):
+        """
+        scenes: list of dicts with
+            'duration' (seconds, required)
+            'image'    path to a still image, or 'color' for a solid lavfi source
+            'audio'    narration path (optional, silence if missing)
+            'motion'   filter chain applied to the visual (defaults to Ken Burns zoom);
+                       may use {w}, {h}, {fps}, {frames} placeholders
+            'captions' .ass file burned in natively, or a caption video overlaid on top
+        """
+        inputs = []
+        filters = []
+        concat_pads = []
+        n_inputs = 0
+        total_duration = 0.0
+
+        for i, scene in enumerate(scenes):
+            duration = float(scene['duration'])
+            frames = max(1, int(round(duration * self.fps)))
+            total_duration += duration
+
+            # Visual input (looped still, bounded to the scene length)
+            if scene.get('image'):
+                inputs += ['-loop', '1', '-framerate', str(self.fps), '-t', f"{duration:.3f}", '-i', scene['image']]
+            else:
+                color = scene.get('color', 'black')
+                inputs += ['-f', 'lavfi', '-i', f"color=c={color}:s={width}x{height}:d={duration:.3f}:r={self.fps}"]
+            v_idx = n_inputs
+            n_inputs += 1
+
+            # Narration input (or generated silence)
+            if scene.get('audio') and os.path.exists(scene['audio']):
+                inputs += ['-i', scene['audio']]
+            else:
+                inputs += ['-f', 'lavfi', '-t', f"{duration:.3f}", '-i', 'anullsrc=r=44100:cl=stereo']
+            a_idx = n_inputs
+            n_inputs += 1
+
+            motion = scene.get('motion') or (DEFAULT_MOTION if scene.get('image') else "null")
+            motion = motion.format(w=width, h=height, fps=self.fps, frames=frames)
+
+            # Normalize every scene to the same size/SAR/fps/pixfmt so concat can join them
+            chain = (
+                f"[{v_idx}:v]{motion},scale={width}:{height},setsar=1,fps={self.fps},"
+                f"trim=duration={duration:.3f},setpts=PTS-STARTPTS"
+            )
+
+            captions = scene.get('captions')
+            if captions and os.path.exists(captions):
+                if captions.lower().endswith(('.ass', '.ssa', '.srt')):
+                    chain += f",subtitles='{_escape_filter_path(captions)}'"
+                    filters.append(f"{chain},format=yuv420p[v{i}]")
+                else:
+                    inputs += ['-i', captions]
+                    c_idx = n_inputs
+                    n_inputs += 1
+                    filters.append(f"{chain}[base{i}]")
+                    filters.append(f"[base{i}][{c_idx}:v]overlay=0:0:format=auto:eof_action=pass,format=yuv420p[v{i}]")
+            else:
+                filters.append(f"{chain},format=yuv420p[v{i}]")
+
+            # Pad/trim narration to exactly the scene length to keep A/V locked across the concat
+            filters.append(
+                f"[{a_idx}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,"
+                f"apad,atrim=duration={duration:.3f},asetpts=PTS-STARTPTS[a{i}]"
+            )
+            concat_pads.append(f"[v{i}][a{i}]")
+
+        filters.append(f"{''.join(concat_pads)}concat=n={len(scenes)}:v=1:a=1[vout][voice]")
+
+        if bg_music_path and os.path.exists(bg_music_path):
+            inputs += ['-stream_loop', '-1', '-i', bg_music_path]
+            m_idx = n_inputs
+            n_inputs += 1
+            # Duck the music under the narration: the voice drives a sidechain compressor
+            filters.append("[voice]asplit=2[narration][sidechain]")
+            filters.append(
+                f"[{m_idx}:a]aresample=44100,aformat=sample_fmts=fltp:channel_layouts=stereo,"
+                f"volume={music_volume}[music]"
+            )
+            filters.append("[music][sidechain]sidechaincompress=threshold=0.02:ratio=6:attack=20:release=400[ducked]")
+            mix = "[narration][ducked]amix=inputs=2:duration=first:dropout_transition=0:normalize=0,alimiter=limit=0.9"
+        else:
+            mix = "[voice]anull"
+
+        if fade and total_duration > 3:
+            mix += f",afade=t=in:st=0:d=1,afade=t=out:st={total_duration - 2:.3f}:d=2"
+        filters.append(f"{mix}[aout]")
+
+        cmd = [self.ffmpeg_path, '-y'] + inputs + [
+            '-filter_complex', ';'.join(filters),
+            '-map', '[vout]', '-map', '[aout]'
+        ] + self.encoder_args + ['-r', str(self.fps)] + self.audio_args + [
+            '-t', f"{total_duration:.3f}",
+            '-movflags', '+faststart',
+            output_path
+        ]
+        return cmd
+
+    def render(self, scenes, output_path, width, height, bg_music_path=None, music_volume=0.10, fade=True, timeout=1800):
+        """Encodes the whole video in one ffmpeg invocation. Returns output_path."""
+        if not scenes:
+            raise ValueError("No scenes to render")
+
+        cmd = self.build_command(scenes, output_path, width, height,
+                                 bg_music_path=bg_music_path, music_volume=music_volume, fade=fade)
+        logger.info(f"Single-pass render: {len(scenes)} scenes -> {output_path}")
+
+        try:
+            result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            raise RuntimeError(f"FFmpeg single-pass render timed out after {timeout}s")
+
+        if result.returncode != 0:
+            logger.error(f"FFmpeg error: {result.stderr[-2000:]}")
+            raise RuntimeError(f"FFmpeg single-pass render failed\n{result.stderr[-2000:]}")
+        return output_path
@@ -0,0 +1,106 @@
+"""
+Frame Sink - Streams raw rgb24 frames into one persistent ffmpeg process.
+Drop-in replacement for MoviePy's write_videofile: frames go through a single
+reusable buffer (constant memory), audio is rendered on its own and muxed by the
+same ffmpeg process with a stream copy.
+"""
+
+import os
+import subprocess
+import numpy as np
+
+try:
+    from .encoding_profiles import get_profile
+except ImportError:
+    from encoding_profiles import get_profile
+
+def _default_ffmpeg():
+    try:
+        from moviepy.config import get_setting
+        return get_setting("FFMPEG_BINARY")
+    except Exception:
+        return "ffmpeg"
+
+class FrameSink:
+    def __init__(self, output_path, size, profile=None, audio_path=None, threads=None, ffmpeg_path=None):
+        profile = profile or get_profile()
+        self.output_path = output_path
+        self.width, self.height = size
+        self.fps = profile.fps
+        self.frames_written = 0
+        # One buffer for the whole render; every frame is copied into it before writing
+        self.buffer = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+
+        cmd = [ffmpeg_path or _default_ffmpeg(), '-y', '-loglevel', 'error',
+               '-f', 'rawvideo', '-pix_fmt', 'rgb24', '-s', f"{self.width}x{self.height}",
+               '-r', str(self.fps), '-i', '-']
+        if audio_path:
+            cmd += ['-i', audio_path, '-map', '0:v', '-map', '1:a', '-c:a', 'copy', '-shortest']
+        cmd += profile.video_args(threads=threads) + ['-movflags', '+faststart', output_path]
+
+        self.proc = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def write(self, frame):
+        """Writes one HxWx3 frame. Off-size frames are centered on black, like method="compose"."""
+        if frame.shape[:2] == (self.height, self.width):
+            np.copyto(self.buffer, frame[:, :, :3], casting='unsafe')
+        else:
+            self.buffer.fill(0)
+            h, w = min(frame.shape[0], self.height), min(frame.shape[1], self.width)
+            y, x = (self.height - h) // 2, (self.width - w) // 2
+            fy, fx = (frame.shape[0] - h) // 2, (frame.shape[1] - w) // 2
+            np.copyto(self.buffer[y:y + h, x:x + w], frame[fy:fy + h, fx:fx + w, :3], casting='unsafe')
+        self.proc.stdin.write(self.buffer.data)
+        self.frames_written += 1
+
+    def close(self):
+        self.proc.stdin.close()
+        stderr = self.proc.stderr.read().decode(errors="ignore")
+        self.proc.wait()
+        if self.proc.returncode != 0:
+            raise RuntimeError(f"FFmpeg frame sink failed: {stderr[-1000:]}")
+        return self.output_path
+
+    def abort(self):
+        self.proc.kill()
+        self.proc.wait()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+        return False
+
+def concat_clips(clips):
+    """
+    concatenate_videoclips that only pays for method="compose" when it is needed:
+    same-size clips without masks (no crossfades) are chained without re-blitting.
+    """
+    from moviepy.editor import concatenate_videoclips
+    same_size = len({tuple(c.size) for c in clips}) == 1
+    has_masks = any(c.mask is not None for c in clips)
+    method = "chain" if same_size and not has_masks else "compose"
+    return concatenate_videoclips(clips, method=method)
+
+def write_clip(clip, output_path, profile=None, threads=None, temp_audiofile=None, ffmpeg_path=None):
+    """Replacement for clip.write_videofile(...) that streams frames through a FrameSink."""
+    profile = profile or get_profile()
+    audio_path = None
+    if clip.audio is not None:
+        audio_path = temp_audiofile or os.path.splitext(output_path)[0] + "_sink_audio.m4a"
+        clip.audio.write_audiofile(audio_path, fps=44100, codec="aac", bitrate=profile.audio_bitrate, logger=None)
+
+    print(f"  [SINK] Streaming {clip.duration:.1f}s @ {profile.fps}fps ({profile.name}) to {output_path}")
+    try:
+        with FrameSink(output_path, clip.size, profile=profile, audio_path=audio_path,
+                       threads=threads, ffmpeg_path=ffmpeg_path) as sink:
+            for t in np.arange(0, clip.duration, 1.0 / profile.fps):
+                sink.write(clip.get_frame(t))
+    finally:
+        if audio_path and os.path.exists(audio_path):
+            os.remove(audio_path)
+    return output_path
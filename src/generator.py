@@ -4,10 +4,9 @@ import re
 import requests
 import asyncio
 import subprocess
-import edge_tts
 import json
 import math
-from cloning_engine import clone_voice
+from cloning_engine import clone_voice, get_clone_session
 import time
 from datetime import datetime, timedelta
 from moviepy.editor import *
@@ -15,6 +14,15 @@ from moviepy.video.fx.all import crop, resize
 from stickman_engine import generate_stickman_image
 from captions import generate_word_level_captions
 from thumbnail import create_thumbnail
+from file_cache import get_render_cache, get_tts_cache, normalize_tts_text
+from filtergraph_renderer import SinglePassRenderer
+from frame_sink import write_clip, concat_clips
+from encoding_profiles import get_profile
+from telemetry import traced, span, tracer
+from tts_batch import TTS_BATCH_ENABLED, synthesize_batch, communicate
+from tts_worker import get_tts_worker
+from audio_probe import probe_duration
+from alignment import align_words
 # ============================================================================
 # LOAD CHANNEL CONFIGURATION
 # ============================================================================
@@ -149,6 +157,39 @@ def create_subscribe_hook(duration=2.0):
         print(f"  [WARN] Failed to create subscribe hook: {e}")
         return None
 
+def run_cached_render(cmd, output_path, inputs, filter_graph, resolution="1080x1920", timeout=60):
+    """
+    Runs an FFmpeg segment render unless an identical segment is already in the render cache.
+    The key covers the input file bytes, filter graph, resolution and remaining encoder args.
+    """
+    cache = get_render_cache()
+    encoder_args = [a for a in cmd[1:] if a not in inputs and a != output_path and a != filter_graph]
+    key = cache.key(inputs, filter_graph=filter_graph, resolution=resolution, encoder=encoder_args)
+    if cache.fetch(key, output_path):
+        print(f"  [CACHE] Reusing rendered segment: {output_path}")
+        return
+    subprocess.run(cmd, check=True, capture_output=True, timeout=timeout)
+    cache.store(key, output_path)
+
+def run_cached_single_pass(renderer, scenes, output_path, width, height, **kwargs):
+    """
+    Runs a SinglePassRenderer render unless an identical video is already in the render cache.
+    The key covers every scene's image, audio and captions bytes, the music track, and the
+    full command (filter graph, resolution, profile encoder args) minus the output path.
+    """
+    cache = get_render_cache()
+    inputs = [scene[k] for scene in scenes for k in ('image', 'audio', 'captions') if scene.get(k) and os.path.exists(scene[k])]
+    if kwargs.get('bg_music_path'):
+        inputs.append(kwargs['bg_music_path'])
+    cmd = renderer.build_command(scenes, output_path, width, height, **kwargs)
+    key = cache.key(inputs, command=[a for a in cmd[1:] if a != output_path])
+    if cache.fetch(key, output_path):
+        print(f"  [CACHE] Reusing single-pass render: {output_path}")
+        return output_path
+    renderer.render(scenes, output_path, width, height, **kwargs)
+    cache.store(key, output_path)
+    return output_path
+
 def apply_ffmpeg_template(template_name, image_path, audio_path, output_path, duration):
     """
     Applies the requested FFmpeg template to generate the final video.
@@ -167,16 +208,19 @@ def apply_ffmpeg_template(template_name, image_path, audio_path, output_path, du
         # Calculate dynamic parameters
         # duration is passed in seconds
         
+        profile = get_profile()
+        fps = profile.fps
+        
         # Base input args
         inputs = ['-loop', '1', '-i', image_path, '-i', audio_path]
         
         # Select filter complex based on template
         if template_name == "slow_zoom":
-            # zoompan needs d expressed in frames, assuming fps=25
-            d_frames = int(duration * 25)
+            # zoompan needs d expressed in frames at the profile frame rate
+            d_frames = profile.frames(duration)
             # Gentle zoom in
             filter_complex = (
-                 f"zoompan=z='min(zoom+0.0008,1.08)':d={d_frames}:"
+                 f"zoompan=z='min(zoom+0.0008,1.08)':d={d_frames}:fps={fps}:"
                  "x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)',scale=1080:1920"
             )
         elif template_name == "micro_shake":
@@ -187,21 +231,21 @@ def apply_ffmpeg_template(template_name, image_path, audio_path, output_path, du
             )
         elif template_name == "pan_lr":
             # Slowly pan from left to right center
-            filter_complex = "scale=1920:1920,crop=1080:1920:x='(t/duration)*(iw-ow)':y=0"
+            filter_complex = f"scale=1920:1920,crop=1080:1920:x='(t/{duration})*(iw-ow)':y=0"
         elif template_name == "bounce":
             # Bouncing animation (up and down)
-            d_frames = int(duration * 25)
+            d_frames = profile.frames(duration)
             filter_complex = (
-                f"zoompan=z='1.0':d={d_frames}:"
-                f"x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)+50*sin(2*PI*t/{duration})",
+                f"zoompan=z='1.0':d={d_frames}:fps={fps}:"
+                f"x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)+50*sin(2*PI*ot/{duration})',"
                 "scale=1080:1920"
             )
         elif template_name == "slide_in":
             # Slide in from right
-            d_frames = int(duration * 25)
+            d_frames = profile.frames(duration)
             filter_complex = (
-                f"zoompan=z='1.0':d={d_frames}:"
-                f"x='iw/2-(iw/zoom/2)+(iw*(1-t/{duration}))':y='ih/2-(ih/zoom/2)'",
+                f"zoompan=z='1.0':d={d_frames}:fps={fps}:"
+                f"x='iw/2-(iw/zoom/2)+(iw*(1-ot/{duration}))':y='ih/2-(ih/zoom/2)',"
                 "scale=1080:1920"
             )
         elif template_name == "rotate_subtle":
@@ -209,12 +253,12 @@ def apply_ffmpeg_template(template_name, image_path, audio_path, output_path, du
             filter_complex = "scale=1080:1920"
         elif template_name == "pulse":
             # Pulsing zoom effect - SIMPLIFIED
-            d_frames = int(duration * 25)
-            filter_complex = f"zoompan=z='1.0+0.03*sin(t)':d={d_frames}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)',scale=1080:1920"
+            d_frames = profile.frames(duration)
+            filter_complex = f"zoompan=z='1.0+0.03*sin(ot)':d={d_frames}:fps={fps}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)',scale=1080:1920"
         elif template_name == "zoom_out":
             # Zoom out effect (starts close, pulls back) - SIMPLIFIED
-            d_frames = int(duration * 25)
-            filter_complex = f"zoompan=z='if(lte(zoom,1.0),1.0,max(1.15-0.002*on,1))':d={d_frames}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)',scale=1080:1920"
+            d_frames = profile.frames(duration)
+            filter_complex = f"zoompan=z='if(lte(zoom,1.0),1.0,max(1.15-0.002*on,1))':d={d_frames}:fps={fps}:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)',scale=1080:1920"
         else:
             # Default static scale
             filter_complex = "scale=1080:1920"
@@ -228,9 +272,8 @@ def apply_ffmpeg_template(template_name, image_path, audio_path, output_path, du
             '-filter_complex', filter_complex,
             '-map', '1:a', # Explicitly map audio from input 1
             '-t', str(duration),
-            '-c:v', 'libx264', '-preset', 'veryfast', 
-            '-c:a', 'aac', '-b:a', '128k', '-ar', '44100', '-ac', '2', '-af', 'aresample=44100', '-af', 'aresample=44100',
-            '-pix_fmt', 'yuv420p',
+        ] + profile.video_args() + profile.audio_args() + [
+            '-af', 'aresample=44100',
             '-movflags', '+faststart', # Good for web/youtube playback
             output_path
         ]
@@ -238,7 +281,7 @@ def apply_ffmpeg_template(template_name, image_path, audio_path, output_path, du
         
         print(f"  [FFmpeg] Running template {template_name}...")
         try:
-            subprocess.run(cmd, check=True, capture_output=True, timeout=60)
+            run_cached_render(cmd, output_path, [image_path, audio_path], filter_complex)
             return True
         except subprocess.TimeoutExpired:
             print(f"  [ERROR] FFmpeg template timed out after 60s")
@@ -250,6 +293,156 @@ def apply_ffmpeg_template(template_name, image_path, audio_path, output_path, du
         print(f"  [ERROR] FFmpeg template failed: {e}")
         return False
 
+def render_segments_legacy(render_jobs, output_path, chosen_music, ffmpeg_exe, temp_files_to_clean):
+    """
+    Fallback for the sketch_static pipeline: renders each segment separately,
+    concatenates them with stream copy and mixes background music in a third pass.
+    """
+    profile = get_profile()
+    segment_files = []
+    for job in render_jobs:
+        i = job['index']
+        seg_output_path = f"temp_seg_{i}.mp4"
+        image_path, audio_path, duration = job['image'], job['audio'], job['duration']
+        dynamic_filter = job['motion']
+
+        if job['captions']:
+            try:
+                # Captions are an ASS file in the working dir, burned in by libass
+                cmd = [
+                    ffmpeg_exe, '-y',
+                    '-loop', '1', '-i', image_path,    # 0: Image
+                    '-i', audio_path,                  # 1: Audio
+                    '-filter_complex', 
+                    f"[0:v]{dynamic_filter},subtitles={job['captions']},format=yuv420p[v]",
+                    '-map', '[v]', '-map', '1:a',
+                    '-t', str(duration),
+                ] + profile.video_args() + profile.audio_args() + [
+                    '-af', 'aresample=44100',
+                    seg_output_path
+                ]
+                run_cached_render(cmd, seg_output_path, [image_path, audio_path, job['captions']], dynamic_filter)
+            except Exception as e:
+                print(f"    [ERROR] Caption overlay failed: {e}")
+                # Simple fallback
+                apply_ffmpeg_template(job['template'], image_path, audio_path, seg_output_path, duration)
+        else:
+             # Standard render without captions
+             try:
+                cmd = [
+                    ffmpeg_exe, '-y',
+                    '-loop', '1', '-i', image_path,    # 0: Image
+                    '-i', audio_path,                  # 1: Audio
+                    '-filter_complex', f"[0:v]{dynamic_filter}[v]",
+                    '-map', '[v]', '-map', '1:a',
+                    '-t', str(duration),
+                ] + profile.video_args() + profile.audio_args() + [
+                    '-af', 'aresample=44100',
+                    seg_output_path
+                ]
+                run_cached_render(cmd, seg_output_path, [image_path, audio_path], dynamic_filter)
+             except Exception as e:
+                 print(f"    [ERROR] Standard render failed: {e}")
+        
+        if os.path.exists(seg_output_path):
+            segment_files.append(seg_output_path)
+            temp_files_to_clean.append(seg_output_path)
+        else:
+            print(f"    [ERROR] Segment {i} render failed")
+
+    if not segment_files:
+        return False
+
+    # --- Subscribe Hook (Visual Only) ---
+    print("  [*] Generating Subscribe Hook...")
+    hook_path = "temp_subscribe.mp4"
+    try:
+         cmd_hook = [
+            ffmpeg_exe, '-y',
+            '-f', 'lavfi', '-i', f'color=c=red:s=1080x1920:d=2:r={profile.fps}',
+            '-vf', "drawtext=text='SUBSCRIBE FOR MORE':fontcolor=white:fontsize=80:x=(w-text_w)/2:y=(h-text_h)/2",
+        ] + profile.video_args() + [
+            hook_path
+         ]
+         # TIMEOUT 30s
+         subprocess.run(cmd_hook, check=True, capture_output=True, timeout=30)
+         
+         if os.path.exists(hook_path):
+             hook_audio = "temp_silence.aac"
+             subprocess.run([ffmpeg_exe, '-y', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo', '-t', '2'] + profile.audio_args() + [hook_audio], stdout=subprocess.DEVNULL, timeout=10)
+             
+             hook_with_audio = "temp_subscribe_final.mp4"
+             subprocess.run([
+                 ffmpeg_exe, '-y', '-i', hook_path, '-i', hook_audio, 
+                 '-map', '0:v', '-map', '1:a', '-c:v', 'copy'] + profile.audio_args() + ['-af', 'aresample=44100', '-shortest', hook_with_audio
+             ], stdout=subprocess.DEVNULL, timeout=20)
+             
+             segment_files.append(hook_with_audio)
+             temp_files_to_clean.extend([hook_path, hook_audio, hook_with_audio])
+    except Exception as e:
+        print(f"  [WARN] Subscribe hook failed: {e}")
+
+    # --- Concatenate ---
+    print("  [*] Concatenating segments...")
+    concat_list_path = "concat_list.txt"
+    with open(concat_list_path, "w") as f:
+        for seg in segment_files:
+            clean_path = seg.replace("\\", "/")
+            f.write(f"file '{clean_path}'\n")
+    
+    temp_files_to_clean.append(concat_list_path)
+    
+    cmd_concat = [
+        ffmpeg_exe, '-y', '-f', 'concat', '-safe', '0', '-i', concat_list_path,
+        '-c', 'copy', output_path
+    ]
+    
+    # TIMEOUT 120s
+    try:
+        subprocess.run(cmd_concat, check=True, timeout=120)
+        
+        # --- Audio Engineering (Background Music) ---
+        if chosen_music:
+            print("  [*] Applying Professional Audio Mixing...")
+            mixed_output = "final_video_mixed.mp4"
+            
+            # FFMPEG Audio Mixing Command
+            # 1. Loop music stream
+            # 2. Volume 0.15 (Low background)
+            # 3. Mix with original audio (amix)
+            # 4. Shortest (end when video ends)
+            cmd_mix = [
+                ffmpeg_exe, '-y',
+                '-i', output_path,
+                '-stream_loop', '-1', '-i', chosen_music,
+                # [0:a] is the voice track, [1:a] is background music.
+                # 1. Resample both to 44.1k for identical timebases.
+                # 2. amix=normalize=0 to preserve manual volume control.
+                # 3. alimiter to prevent digital clipping/distortion.
+                '-filter_complex', "[0:a]aresample=44100[v]; [1:a]aresample=44100,volume=0.06[bg]; [v][bg]amix=inputs=2:duration=first:dropout_transition=0:normalize=0,alimiter=limit=0.9[a]",
+                '-map', '0:v', '-map', '[a]',
+                '-c:v', 'copy',
+            ] + profile.audio_args() + [
+                '-shortest',
+                mixed_output
+            ]
+            print(f"    [Mixing] {' '.join(cmd_mix)}")
+            
+            try:
+                 subprocess.run(cmd_mix, check=True, timeout=120)
+                 # Swap files
+                 if os.path.exists(mixed_output):
+                     os.remove(output_path)
+                     os.rename(mixed_output, output_path)
+                     print("    [OK] Background music mixed successfully")
+            except Exception as e:
+                 print(f"    [WARN] Music mixing failed: {e}")
+        
+    except Exception as e:
+         print(f"  [ERROR] Final concat failed: {e}")
+         return False
+    return True
+
 async def generate_audio(text, output_file="audio.mp3", rate=None, pitch=None, voice=None):
     # Load defaults from config if not provided
     voice_config = CHANNEL_CONFIG.get("voice_engine", {}).get("preset", {})
@@ -263,14 +456,22 @@ async def generate_audio(text, output_file="audio.mp3", rate=None, pitch=None, v
     # Ryan: Cheerful, quick, great for Memes/Shorts.
     
     if voice == "cloned":
-        # SPECIAL: Use the custom voice cloning engine
-        cloned_audio = clone_voice(text, output_file)
+        # SPECIAL: Use the custom voice cloning engine (it keeps its own reference-aware cache)
+        cloned_audio = await asyncio.to_thread(clone_voice, text, output_file)
         if cloned_audio and os.path.exists(output_file):
-            return [] # Word metadata is not available for cloned voices yet
+            # Cloned spaces return bare audio; word timings come from local alignment
+            return await asyncio.to_thread(align_words, output_file, text)
         else:
             # NO FALLBACK: Raise exception as requested for "Original Voice" channels
             raise Exception("CRITICAL: Voice cloning failed and fallback is disabled. Stopping workflow.")
 
+    # Recurring lines (avatar intro/outro, CTAs, retried runs) come straight from the TTS cache
+    tts_cache = get_tts_cache()
+    cache_key = tts_cache.key(text=normalize_tts_text(text), provider="edge", voice=voice, rate=rate, pitch=pitch)
+    if text and text.strip() and tts_cache.fetch(cache_key, output_file):
+        print(f"  [CACHE] TTS hit for: '{text[:30]}...'")
+        return tts_cache.fetch_meta(cache_key) or []
+
     word_metadata = []
     
     max_retries = 5
@@ -280,10 +481,10 @@ async def generate_audio(text, output_file="audio.mp3", rate=None, pitch=None, v
             if not text or not text.strip():
                 raise Exception("Cannot generate audio for empty/whitespace text")
 
-            communicate = edge_tts.Communicate(text, voice, rate=rate, pitch=pitch)
+            stream = communicate(text, voice, rate=rate, pitch=pitch)
             
             with open(output_file, "wb") as file:
-                async for chunk in communicate.stream():
+                async for chunk in stream.stream():
                     if chunk["type"] == "audio":
                         file.write(chunk["data"])
                     elif chunk["type"] == "WordBoundary":
@@ -304,19 +505,19 @@ async def generate_audio(text, output_file="audio.mp3", rate=None, pitch=None, v
             if file_size < 1000:  # Less than 1KB is likely corrupt
                 raise Exception(f"Audio file too small ({file_size} bytes), likely corrupt")
             
-            # VALIDATION: Check audio duration
+            # VALIDATION: Check audio duration (header probe, memoized for later consumers)
             try:
-                test_clip = AudioFileClip(output_file)
-                clip_duration = test_clip.duration
-                test_clip.close()
-                
+                clip_duration = probe_duration(output_file)
+                if clip_duration is None:
+                    raise Exception("No audio frames found")
                 if clip_duration < 0.1:  # Less than 0.1 seconds
                     raise Exception(f"Audio duration too short ({clip_duration}s)")
                     
                 print(f"  [OK] Audio generated: {file_size} bytes, duration: {clip_duration:.2f}s")
             except Exception as validation_error:
                 raise Exception(f"Audio clip validation failed: {str(validation_error)}")
-                        
+
+            tts_cache.store(cache_key, output_file, meta=word_metadata)
             return word_metadata
             
         except Exception as e:
@@ -362,6 +563,51 @@ async def generate_audio(text, output_file="audio.mp3", rate=None, pitch=None, v
                         raise e # Raise original edge-tts error
     return []
 
+async def generate_audio_batch(texts, output_files, rate=None, pitch=None, voice=None):
+    """
+    Voices many scenes in a single edge-tts stream and splits the MP3 per scene.
+    Returns {index: word_metadata} for every file it produced (cache hits included);
+    callers fall back to generate_audio() for anything missing.
+    """
+    voice_config = CHANNEL_CONFIG.get("voice_engine", {}).get("preset", {})
+    if rate is None: rate = voice_config.get("rate", "+0%")
+    if pitch is None: pitch = voice_config.get("pitch", "+0Hz")
+    if voice is None: voice = voice_config.get("voice", "en-US-AndrewNeural")
+
+    results = {}
+    if not TTS_BATCH_ENABLED or voice == "cloned":
+        return results
+
+    tts_cache = get_tts_cache()
+    pending = []
+    for i, (text, output_file) in enumerate(zip(texts, output_files)):
+        if not text or not text.strip():
+            continue
+        cache_key = tts_cache.key(text=normalize_tts_text(text), provider="edge", voice=voice, rate=rate, pitch=pitch)
+        if tts_cache.fetch(cache_key, output_file):
+            results[i] = tts_cache.fetch_meta(cache_key) or []
+        else:
+            pending.append((i, cache_key))
+    if len(pending) < 2:
+        return results # Nothing to batch; per-scene calls handle the rest
+
+    print(f"  [TTS] Batch-synthesizing {len(pending)} scenes in one stream...")
+    try:
+        parts = await synthesize_batch([texts[i] for i, _ in pending], voice, rate=rate, pitch=pitch)
+    except Exception as e:
+        print(f"  [WARN] Batch TTS failed ({e}), falling back to per-scene synthesis")
+        return results
+
+    for (i, cache_key), (data, word_metadata) in zip(pending, parts):
+        if len(data) < 1000: # Same corruption guard as generate_audio
+            continue
+        with open(output_files[i], "wb") as f:
+            f.write(data)
+        tts_cache.store(cache_key, output_files[i], meta=word_metadata)
+        results[i] = word_metadata
+    print(f"  [OK] Batch TTS produced {len(results)}/{len(texts)} scene files")
+    return results
+
 def download_background_video(query="abstract", api_key=None, output_file="bg_raw.mp4", orientation="portrait", segment_index=0):
     """Download a unique background video from Pexels"""
     if not api_key:
@@ -429,8 +675,12 @@ def download_background_video(query="abstract", api_key=None, output_file="bg_ra
     return None
 
 
+@traced("generator.create_video")
 def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
     mode = metadata.get('category', metadata.get('mode', 'fact'))
+    tts = get_tts_worker() # One long-lived loop for every synthesis in this video
+    if CHANNEL_CONFIG.get("voice_engine", {}).get("preset", {}).get("voice") == "cloned":
+        get_clone_session().warm_up() # Connect + upload the voice sample while the script is prepared
     temp_bg_files = [] # Initialize globally for thumbnail fallback
     
     if metadata.get('visual_style') == 'sketch_static':
@@ -442,16 +692,13 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             "slow_zoom": "zoompan=z='min(zoom+0.001,1.1)':d=125:x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)':s=1080x1920"
         })
         
+        profile = get_profile()
         script_segments = metadata.get('script', [])
-        segment_files = []
+        render_jobs = []
         temp_files_to_clean = []
         
-        # 1. Process each segment individually
-        for i, seg in enumerate(script_segments):
-            raw_text = seg.get("text", "")
-            if not raw_text: continue
-            
-            # --- Text Sanitization for Voiceover ---
+        # --- Text Sanitization for Voiceover ---
+        def clean_voice_text(raw_text):
             # 1. Remove "Hook:", "POV:", "Me:", "Subject:" prefixes (case insensitive)
             cleaned_text = re.sub(r'^(Hook|POV|Me|Subject|Situation|Escalation|Punchline|CTA):\s*', '', raw_text, flags=re.IGNORECASE)
             # 2. Remove parentheticals (e.g. "(2s)", "(sad tone)", "[Action]")
@@ -459,7 +706,20 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             # 3. Remove quotes (common in JSON strings)
             cleaned_text = cleaned_text.replace('"', '').replace("'", "")
             # 4. Collapse whitespace
-            cleaned_text = ' '.join(cleaned_text.split())
+            return ' '.join(cleaned_text.split())
+
+        # Voice every segment in one TTS stream up front (per-segment calls below are the fallback)
+        batch_audio = tts.run(generate_audio_batch(
+            [clean_voice_text(seg.get("text", "")) for seg in script_segments],
+            [f"temp_meme_audio_{i}.mp3" for i in range(len(script_segments))]
+        ))
+        
+        # 1. Process each segment individually
+        for i, seg in enumerate(script_segments):
+            raw_text = seg.get("text", "")
+            if not raw_text: continue
+            
+            cleaned_text = clean_voice_text(raw_text)
             
             print(f"  Processing segment {i+1}/{len(script_segments)}: {cleaned_text[:30]}... (Raw: {raw_text[:15]}...)")
             
@@ -473,7 +733,10 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             
             # Using defaults from generate_audio which are loaded from CHANNEL_CONFIG
             # This ensures consistent brand voice (e.g. GuyNeural, +8% rate)
-            word_metadata = asyncio.run(generate_audio(cleaned_text, audio_path))
+            if i in batch_audio:
+                word_metadata = batch_audio[i]
+            else:
+                word_metadata = tts.run(generate_audio(cleaned_text, audio_path))
             
             if os.path.exists(audio_path):
                 temp_files_to_clean.append(audio_path)
@@ -481,15 +744,8 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
                 print(f"    [WARN] Audio failed for segment {i}, using silence")
                 continue
 
-            # Get duration
-            try:
-                # Use FFprobe/MoviePy to get duration reliably
-                from moviepy.audio.AudioClip import AudioFileClip
-                ac = AudioFileClip(audio_path)
-                duration = ac.duration
-                ac.close()
-            except:
-                duration = 3.0
+            # Get duration (already probed when the audio was validated)
+            duration = probe_duration(audio_path) or 3.0
             
             # --- B. Visual Generation (Unique per segment) ---
             topic = metadata.get('topic', 'meme')
@@ -508,208 +764,84 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             temp_files_to_clean.append(image_path)
             
             # --- C. Subtitle Generation (Brainrot Style) ---
-            captions_path = f"temp_captions_{i}.mp4"
+            captions_path = f"temp_captions_{i}.ass"
             has_captions = False
             if word_metadata:
                 try:
-                    # Generate transparent video with captions
+                    # ASS script, burned in by ffmpeg (no per-word TextClip renders)
                     has_captions = generate_word_level_captions(word_metadata, duration, captions_path)
                     if has_captions:
                         temp_files_to_clean.append(captions_path)
                 except Exception as e:
                      print(f"    [WARN] Captions failed: {e}")
 
-            # --- D. Create Segment Video (Compose) ---
-            seg_output_path = f"temp_seg_{i}.mp4"
-            
+            # --- D. Queue Segment for Rendering ---
             # Select template from CONFIG
             template_name = random.choice(list(ffmpeg_templates.keys()))
             filter_complex = ffmpeg_templates.get(template_name)
             
-            # Custom FFmpeg composition to include captions
-            d_frames = int(duration * 25)
-            dynamic_filter = filter_complex.replace("d=125", f"d={d_frames}")
+            d_frames = profile.frames(duration)
+            dynamic_filter = filter_complex.replace("d=125", f"d={d_frames}:fps={profile.fps}")
+            
+            render_jobs.append({
+                'index': i,
+                'image': image_path,
+                'audio': audio_path,
+                'duration': duration,
+                'motion': dynamic_filter,
+                'template': template_name,
+                'captions': captions_path if has_captions else None
+            })
 
-            if has_captions:
-                try:
-                    ffmpeg_exe = "ffmpeg"
-                    if os.name == 'nt':
-                        try: import imageio_ffmpeg; ffmpeg_exe = imageio_ffmpeg.get_ffmpeg_exe()
-                        except: pass
-                    
-                    cmd = [
-                        ffmpeg_exe, '-y',
-                        '-loop', '1', '-i', image_path,    # 0: Image
-                        '-i', audio_path,                  # 1: Audio
-                        '-i', captions_path,               # 2: Visual Captions
-                        '-filter_complex', 
-                        f"[0:v]{dynamic_filter}[base];[base][2:v]overlay=0:0:format=auto,format=yuv420p[v]",
-                        '-map', '[v]', '-map', '1:a',
-                        '-t', str(duration),
-                        '-c:v', 'libx264', '-preset', 'veryfast',
-                        '-c:a', 'aac', '-b:a', '128k', '-ar', '44100', '-ac', '2', '-af', 'aresample=44100',
-                        seg_output_path
-                    ]
-                    subprocess.run(cmd, check=True, capture_output=True, timeout=60)
-                except Exception as e:
-                    print(f"    [ERROR] Caption overlay failed: {e}")
-                    # Simple fallback
-                    apply_ffmpeg_template(template_name, image_path, audio_path, seg_output_path, duration)
-            else:
-                 # Standard render without captions
-                 try:
-                    ffmpeg_exe = "ffmpeg"
-                    if os.name == 'nt':
-                        try: import imageio_ffmpeg; ffmpeg_exe = imageio_ffmpeg.get_ffmpeg_exe()
-                        except: pass
-                    
-                    cmd = [
-                        ffmpeg_exe, '-y',
-                        '-loop', '1', '-i', image_path,    # 0: Image
-                        '-i', audio_path,                  # 1: Audio
-                        '-filter_complex', f"[0:v]{dynamic_filter}[v]",
-                        '-map', '[v]', '-map', '1:a',
-                        '-t', str(duration),
-                        '-c:v', 'libx264', '-preset', 'veryfast',
-                        '-c:a', 'aac', '-b:a', '128k', '-ar', '44100', '-ac', '2', '-af', 'aresample=44100',
-                        seg_output_path
-                    ]
-                    subprocess.run(cmd, check=True, capture_output=True, timeout=60)
-                 except Exception as e:
-                     print(f"    [ERROR] Standard render failed: {e}")
-            
-            if os.path.exists(seg_output_path):
-                segment_files.append(seg_output_path)
-                temp_files_to_clean.append(seg_output_path)
-            else:
-                print(f"    [ERROR] Segment {i} render failed")
-
-        if not segment_files:
+        if not render_jobs:
             return None
 
-        # --- D. Subscribe Hook (Visual Only) ---
-        print("  [*] Generating Subscribe Hook...")
-        hook_path = "temp_subscribe.mp4"
-        try:
-             ffmpeg_exe = "ffmpeg"
-             if os.name == 'nt':
-                 try: import imageio_ffmpeg; ffmpeg_exe = imageio_ffmpeg.get_ffmpeg_exe()
-                 except: pass
-
-             cmd_hook = [
-                ffmpeg_exe, '-y',
-                '-f', 'lavfi', '-i', 'color=c=red:s=1080x1920:d=2',
-                '-vf', "drawtext=text='SUBSCRIBE FOR MORE':fontcolor=white:fontsize=80:x=(w-text_w)/2:y=(h-text_h)/2",
-                '-c:v', 'libx264', '-pix_fmt', 'yuv420p',
-                hook_path
-             ]
-             # TIMEOUT 30s
-             subprocess.run(cmd_hook, check=True, capture_output=True, timeout=30)
-             
-             if os.path.exists(hook_path):
-                 hook_audio = "temp_silence.aac"
-                 subprocess.run([ffmpeg_exe, '-y', '-f', 'lavfi', '-i', 'anullsrc=r=44100:cl=stereo', '-t', '2', '-c:a', 'aac', '-ar', '44100', '-ac', '2', hook_audio], stdout=subprocess.DEVNULL, timeout=10)
-                 
-                 hook_with_audio = "temp_subscribe_final.mp4"
-                 subprocess.run([
-                     ffmpeg_exe, '-y', '-i', hook_path, '-i', hook_audio, 
-                     '-map', '0:v', '-map', '1:a', '-c:v', 'copy', '-c:a', 'aac', '-ar', '44100', '-ac', '2', '-af', 'aresample=44100', '-shortest', hook_with_audio
-                 ], stdout=subprocess.DEVNULL, timeout=20)
-                 
-                 segment_files.append(hook_with_audio)
-                 temp_files_to_clean.extend([hook_path, hook_audio, hook_with_audio])
-        except Exception as e:
-            print(f"  [WARN] Subscribe hook failed: {e}")
-
-        # --- E. Concatenate ---
-        print("  [*] Concatenating segments...")
-        concat_list_path = "concat_list.txt"
-        with open(concat_list_path, "w") as f:
-            for seg in segment_files:
-                clean_path = seg.replace("\\", "/")
-                f.write(f"file '{clean_path}'\n")
-        
-        temp_files_to_clean.append(concat_list_path)
-        
         ffmpeg_exe = "ffmpeg"
         if os.name == 'nt':
              try: import imageio_ffmpeg; ffmpeg_exe = imageio_ffmpeg.get_ffmpeg_exe()
              except: pass
-        
-        cmd_concat = [
-            ffmpeg_exe, '-y', '-f', 'concat', '-safe', '0', '-i', concat_list_path,
-            '-c', 'copy', output_path
-        ]
-        
-        # TIMEOUT 120s
-        # TIMEOUT 120s
-        try:
-            subprocess.run(cmd_concat, check=True, timeout=120)
-            
-            # --- F. Audio Engineering (Background Music) ---
-            print("  [*] Applying Professional Audio Mixing...")
-            mixed_output = "final_video_mixed.mp4"
-            
-            # 1. Ensure we have music
-            music_dir = "assets/music"
-            if not os.path.exists(music_dir): os.makedirs(music_dir)
-            
-            # Download safe royalty-free tracks if empty
-            if not os.listdir(music_dir):
-                print("    [INFO] Downloading royalty-free music library...")
-                # Using known safe direct links to CC0/Royalty Free assets
-                music_urls = {
-                    "sneaky.mp3": "https://files.freemusicarchive.org/storage-freemusicarchive-org/music/no_curator/Kevin_MacLeod/Oddities/Kevin_MacLeod_-_Sneaky_Snitch.mp3",
-                    "monkeys.mp3": "https://files.freemusicarchive.org/storage-freemusicarchive-org/music/no_curator/Kevin_MacLeod/Jazz_Sampler/Kevin_MacLeod_-_Monkeys_Spinning_Monkeys.mp3"
-                }
-                for name, url in music_urls.items():
-                    try:
-                        r = requests.get(url, timeout=30)
-                        if r.status_code == 200:
-                            with open(os.path.join(music_dir, name), "wb") as f:
-                                f.write(r.content)
-                    except: pass
 
-            music_files = [f for f in os.listdir(music_dir) if f.endswith(".mp3")]
-            
-            if music_files:
-                chosen_music = os.path.join(music_dir, random.choice(music_files))
-                
-                # FFMPEG Audio Mixing Command
-                # 1. Loop music stream
-                # 2. Volume 0.15 (Low background)
-                # 3. Mix with original audio (amix)
-                # 4. Shortest (end when video ends)
-                cmd_mix = [
-                    ffmpeg_exe, '-y',
-                    '-i', output_path,
-                    '-stream_loop', '-1', '-i', chosen_music,
-                    # [0:a] is the voice track, [1:a] is background music.
-                    # 1. Resample both to 44.1k for identical timebases.
-                    # 2. amix=normalize=0 to preserve manual volume control.
-                    # 3. alimiter to prevent digital clipping/distortion.
-                    '-filter_complex', "[0:a]aresample=44100[v]; [1:a]aresample=44100,volume=0.06[bg]; [v][bg]amix=inputs=2:duration=first:dropout_transition=0:normalize=0,alimiter=limit=0.9[a]",
-                    '-map', '0:v', '-map', '[a]',
-                    '-c:v', 'copy',
-                    '-c:a', 'aac', '-b:a', '192k', '-ar', '44100', '-ac', '2',
-                    '-shortest',
-                    mixed_output
-                ]
-                print(f"    [Mixing] {' '.join(cmd_mix)}")
-                
+        # --- E. Background Music Library ---
+        music_dir = "assets/music"
+        if not os.path.exists(music_dir): os.makedirs(music_dir)
+        
+        # Download safe royalty-free tracks if empty
+        if not os.listdir(music_dir):
+            print("    [INFO] Downloading royalty-free music library...")
+            # Using known safe direct links to CC0/Royalty Free assets
+            music_urls = {
+                "sneaky.mp3": "https://files.freemusicarchive.org/storage-freemusicarchive-org/music/no_curator/Kevin_MacLeod/Oddities/Kevin_MacLeod_-_Sneaky_Snitch.mp3",
+                "monkeys.mp3": "https://files.freemusicarchive.org/storage-freemusicarchive-org/music/no_curator/Kevin_MacLeod/Jazz_Sampler/Kevin_MacLeod_-_Monkeys_Spinning_Monkeys.mp3"
+            }
+            for name, url in music_urls.items():
                 try:
-                     subprocess.run(cmd_mix, check=True, timeout=120)
-                     # Swap files
-                     if os.path.exists(mixed_output):
-                         os.remove(output_path)
-                         os.rename(mixed_output, output_path)
-                         print("    [OK] Background music mixed successfully")
-                except Exception as e:
-                     print(f"    [WARN] Music mixing failed: {e}")
-            
+                    r = requests.get(url, timeout=30)
+                    if r.status_code == 200:
+                        with open(os.path.join(music_dir, name), "wb") as f:
+                            f.write(r.content)
+                except: pass
+
+        music_files = [f for f in os.listdir(music_dir) if f.endswith(".mp3")]
+        chosen_music = os.path.join(music_dir, random.choice(music_files)) if music_files else None
+
+        # --- F. Single-Pass Render ---
+        # One filter_complex covers every segment, captions, the subscribe hook and the
+        # music mix, so there are no intermediate segment files or extra mux passes.
+        print("  [*] Rendering all segments in a single FFmpeg pass...")
+        subscribe_hook = {
+            'color': 'red',
+            'duration': 2.0,
+            'motion': "drawtext=text='SUBSCRIBE FOR MORE':fontcolor=white:fontsize=80:x=(w-text_w)/2:y=(h-text_h)/2"
+        }
+        try:
+            renderer = SinglePassRenderer(ffmpeg_exe, profile=profile)
+            run_cached_single_pass(renderer, render_jobs + [subscribe_hook], output_path, 1080, 1920,
+                                   bg_music_path=chosen_music, music_volume=0.06, fade=False)
+            print("    [OK] Single-pass render complete")
         except Exception as e:
-             print(f"  [ERROR] Final concat failed: {e}")
-             return None
+            print(f"  [WARN] Single-pass render failed, falling back to segment pipeline: {e}")
+            if not render_segments_legacy(render_jobs, output_path, chosen_music, ffmpeg_exe, temp_files_to_clean):
+                return None
         
         # Cleanup
         for f in temp_files_to_clean:
@@ -735,7 +867,7 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             script = f"{setup} ... ... {punchline} ... Hahaha!"
             
             try:
-                asyncio.run(generate_audio(script, audio_path))
+                tts.run(generate_audio(script, audio_path))
                 
                 # Validate audio file before using
                 if not os.path.exists(audio_path):
@@ -841,8 +973,8 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             meme_clips.append(sub_hook)
 
         # Final Concatenation
-        final_video = concatenate_videoclips(meme_clips, method="compose")
-        final_video.write_videofile(output_path, fps=24, codec="libx264", audio_codec="aac")
+        final_video = concat_clips(meme_clips)
+        write_clip(final_video, output_path, profile=get_profile())
         
         # Cleanup
         for f in temp_audio_files + temp_bg_files:
@@ -863,6 +995,13 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
         # Use "Christopher" (Deep, Documentary Style)
         voice_persona = "en-US-ChristopherNeural"
         print(f"Total segments: {len(segments)} (Target: 8+ minutes) | Voice: {voice_persona}")
+
+        # Every segment uses the same narration settings, so the whole script is one TTS stream
+        batch_audio = tts.run(generate_audio_batch(
+            [seg['text'] for seg in segments],
+            [f"temp_long_audio_{i}.mp3" for i in range(len(segments))],
+            rate="-5%", pitch="-10Hz"
+        ))
         
         for i, seg in enumerate(segments):
             text = seg['text']
@@ -893,7 +1032,8 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             audio_path = f"temp_long_audio_{i}.mp3" 
             rate = "-5%"
             pitch = "-10Hz"
-            asyncio.run(generate_audio(text, audio_path, rate=rate, pitch=pitch))
+            if i not in batch_audio:
+                tts.run(generate_audio(text, audio_path, rate=rate, pitch=pitch))
             audio_clip = AudioFileClip(audio_path)
             temp_audio_files.append(audio_path)
             
@@ -1052,7 +1192,7 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
         # Avatar logic removed
 
         # Final Concatenation
-        final_video = concatenate_videoclips(segment_clips, method="compose")
+        final_video = concat_clips(segment_clips)
         total_duration = final_video.duration
         print(f"\n🎥 Total video duration: {total_duration/60:.2f} minutes ({total_duration:.1f} seconds)")
         
@@ -1062,8 +1202,7 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             print(f"✅ SUCCESS: Video meets 8+ minute requirement!")
         
         # Save with optimized settings
-        final_video.write_videofile(output_path, fps=24, codec="libx264", audio_codec="aac", 
-                                    preset="medium", bitrate="2500k")
+        write_clip(final_video, output_path, profile=get_profile())
         
         # Cleanup
         for f in temp_audio_files + temp_bg_files:
@@ -1098,6 +1237,30 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
         print(f"Generating enhanced sync video with {len(script_segments)} segments...")
         print(f"  [BUDGET] Content limit: {content_budget:.1f}s (Total limit: {MAX_SHORTS_DURATION}s)")
         
+        # 1. Voice
+        # Specialized Voice: Professional & Engaging (Slightly faster but natural)
+        is_meme = (metadata.get('mode') == 'meme' or metadata.get('category') == 'meme')
+        
+        # Use "Ryan" (British, Sarcastic/Funny) for Memes, "Andrew" (Warm/Professional) for Facts
+        voice_persona = metadata.get('voice', "en-GB-RyanNeural" if is_meme else "en-US-AndrewNeural")
+        
+        # Use a more natural speed increase. Too fast = robotic/unpleasant.
+        rate = "+10%" if is_meme else "+0%" 
+        pitch = "+0Hz" 
+        
+        # Every segment (and the avatar lines) is synthesized concurrently up front;
+        # the loop below only waits for the one it is about to use
+        pending_audio = {
+            i: tts.submit(generate_audio(seg['text'], f"temp_voc_{i}.mp3", rate=rate, pitch=pitch, voice=voice_persona))
+            for i, seg in enumerate(script_segments)
+        }
+        use_avatar = metadata.get('use_avatar', False)
+        if use_avatar:
+            intro_text = metadata.get('avatar_intro', "Welcome to another curiosity deep dive.")
+            outro_text = metadata.get('avatar_outro', "Thanks for watching. Subscribe for more curiosity.")
+            pending_audio["intro"] = tts.submit(generate_audio(intro_text, "temp_avatar_intro.mp3", rate="-5%", pitch="-10Hz")) # Use narrative voice
+            pending_audio["outro"] = tts.submit(generate_audio(outro_text, "temp_avatar_outro.mp3", rate="-5%", pitch="-10Hz"))
+        
         for i, seg in enumerate(script_segments):
             # --- SHORTS DURATION GUARD ---
             if current_total_duration >= content_budget:
@@ -1107,20 +1270,9 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             text = seg['text']
             keyword = seg.get('keyword', metadata.get('topic', 'abstract'))
             
-            # 1. Voice
-            # Specialized Voice: Professional & Engaging (Slightly faster but natural)
-            is_meme = (metadata.get('mode') == 'meme' or metadata.get('category') == 'meme')
-            
-            # Use "Ryan" (British, Sarcastic/Funny) for Memes, "Andrew" (Warm/Professional) for Facts
-            voice_persona = metadata.get('voice', "en-GB-RyanNeural" if is_meme else "en-US-AndrewNeural")
-            
-            # Use a more natural speed increase. Too fast = robotic/unpleasant.
-            rate = "+10%" if is_meme else "+0%" 
-            pitch = "+0Hz" 
-            
             audio_path = f"temp_voc_{i}.mp3"
             try:
-                word_metadata = asyncio.run(generate_audio(text, audio_path, rate=rate, pitch=pitch, voice=voice_persona))
+                word_metadata = pending_audio.pop(i).result()
                 
                 # Validate file exists and is readable
                 if not os.path.exists(audio_path) or os.path.getsize(audio_path) < 100:
@@ -1292,14 +1444,20 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             final_clips.append(seg_clip)
             current_total_duration += duration
 
+        # Segments cut by the budget: stop their synthesis and drop whatever already landed
+        for key in [k for k in pending_audio if isinstance(k, int)]:
+            pending_audio.pop(key).cancel()
+            stale = f"temp_voc_{key}.mp3"
+            if os.path.exists(stale):
+                try: os.remove(stale)
+                except: pass
+
         # --- HYBRID AVATAR: Intro/Outro Injection ---
-        use_avatar = metadata.get('use_avatar', False)
         if use_avatar:
             # Intro Avatar
             intro_audio = "temp_avatar_intro.mp3"
             intro_video = "temp_avatar_intro.mp4"
-            intro_text = metadata.get('avatar_intro', "Welcome to another curiosity deep dive.")
-            asyncio.run(generate_audio(intro_text, intro_audio, rate="-5%", pitch="-10Hz")) # Use narrative voice
+            pending_audio.pop("intro").result()
             avatar_path = generate_avatar_video(intro_audio, intro_video)
             if avatar_path:
                 avatar_size = (1080, 1920) if metadata.get('orientation') == 'vertical' else (1920, 1080)
@@ -1312,8 +1470,7 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             # Outro Avatar
             outro_audio = "temp_avatar_outro.mp3"
             outro_video = "temp_avatar_outro.mp4"
-            outro_text = metadata.get('avatar_outro', "Thanks for watching. Subscribe for more curiosity.")
-            asyncio.run(generate_audio(outro_text, outro_audio, rate="-5%", pitch="-10Hz"))
+            pending_audio.pop("outro").result()
             avatar_path = generate_avatar_video(outro_audio, outro_video)
             if avatar_path:
                 avatar_size = (1080, 1920) if metadata.get('orientation') == 'vertical' else (1920, 1080)
@@ -1333,7 +1490,7 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
             # Ideally we'd add a sound effect, but keeping it simple as per plan.
             final_clips.append(sub_hook)
 
-        final_video = concatenate_videoclips(final_clips, method="compose")
+        final_video = concat_clips(final_clips)
         total_duration = final_video.duration
         print(f"\n🎥 Total video duration: {total_duration/60:.2f} minutes ({total_duration:.1f} seconds)")
         
@@ -1345,7 +1502,7 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
         else:
             print(f"✅ SUCCESS: Short video length is perfect ({total_duration:.1f}s)")
 
-        final_video.write_videofile(output_path, fps=24, codec="libx264", audio_codec="aac")
+        write_clip(final_video, output_path, profile=get_profile())
         
         # Cleanup
         for f in temp_files:
@@ -1367,10 +1524,19 @@ def create_video(metadata, output_path="final_video.mp4", pexels_key=None):
 
         return output_path
 
+async def create_video_async(metadata, output_path="final_video.mp4", pexels_key=None):
+    """create_video for async entry points: rendering runs in a thread, TTS on the shared worker loop."""
+    return await asyncio.to_thread(create_video, metadata, output_path, pexels_key)
+
 if __name__ == "__main__":
     # Test run
     test_meta = {
         "text": "Did you know? Honey never spoils. Archaeologists have found pots of honey in ancient Egyptian tombs that are over 3,000 years old.",
         "mode": "fact"
     }
-    create_video(test_meta, "test_output.mp4")
+    try:
+        with span("generator"):
+            create_video(test_meta, "test_output.mp4")
+    finally:
+        # Always leave a trace behind, including for failed runs
+        tracer.write()
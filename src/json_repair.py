@@ -0,0 +1,318 @@
+"""
+JSON Repair - Tolerant parsing and schema checks for LLM script output.
+Fixes the defects Gemini actually produces (markdown fences, comments, trailing or
+missing commas, raw newlines in strings, trailing chatter, truncation) locally,
+validates the result against the script type's schema, and tells the caller when
+the text was cut off so it can ask the model for just the missing tail.
+Outcomes are counted on the tracer (llm.json.*) so repair rates show up in traces.
+"""
+
+import re
+import json
+
+try:
+    from .telemetry import tracer, current_span
+except ImportError:
+    from telemetry import tracer, current_span
+
+MAX_CONTINUATIONS = 2
+CONTINUATION_CONTEXT = 4000 # Chars of the cut-off response shown to the model
+MAX_OVERLAP = 200           # Longest repeated text looked for when joining a continuation
+MIN_SAFE_OVERLAP = 10       # Overlaps up to this long must start on a token boundary
+
+MUSIC_MOODS = ("upbeat", "high_energy", "funny", "chill", "tense", "suspenseful", "dark", "inspirational") # MusicEngine folders
+SCENE_ACTIONS = ("talking", "jumping", "shaking", "bouncing")
+AUDIO_MOODS = ("neutral", "excited", "serious", "whispering", "curious", "funny", "energetic")
+
+_NOIR = {
+    "required": ("title", "scenes"),
+    "fields": {"title": str, "description": str, "tags": list, "music_mood": str, "deduced_angle": str},
+    "defaults": {"description": "", "tags": [], "music_mood": "dark"},
+    "choices": {"music_mood": MUSIC_MOODS},
+    "scene_fields": {"text": str, "visual_prompt": str},
+    "scene_defaults": {},
+    "scene_choices": {},
+}
+_STICKMAN = {
+    "required": ("title", "scenes"),
+    "fields": {"title": str, "description": str, "music_mood": str},
+    "defaults": {"description": "", "music_mood": "chill"},
+    "choices": {"music_mood": MUSIC_MOODS},
+    "scene_fields": {"text": str, "visual_prompt": str, "audio_mood": str, "vocal_action": str},
+    "scene_defaults": {"audio_mood": "neutral", "vocal_action": "talking"},
+    "scene_choices": {"audio_mood": AUDIO_MOODS, "vocal_action": SCENE_ACTIONS},
+}
+
+SCHEMAS = {
+    "psychology_titles": {"items": str, "min_items": 1},
+    "psychology_script": dict(_NOIR, min_scenes=5),
+    "psychology_short_script": dict(_NOIR, defaults={"description": "", "tags": [], "music_mood": "tense"}, min_scenes=3),
+    "relatable_comedy_script": dict(_STICKMAN, fields=dict(_STICKMAN["fields"], bg_color=str),
+                                    defaults={"description": "", "music_mood": "funny", "bg_color": "#FFFFFF"}, min_scenes=3),
+    "conversational_script": dict(_STICKMAN, min_scenes=3),
+    "psychology_stickman_script": dict(_STICKMAN, min_scenes=3),
+}
+
+def _strip_fences(text):
+    return re.sub(r"```(?:json|JSON)?", "", text).strip()
+
+def repair_json(text):
+    """
+    Parses the first JSON value in text, repairing what it can.
+    Returns (value or None, [repair kinds], truncated).
+    """
+    if not text:
+        return None, [], False
+    text = _strip_fences(text)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        return None, [], False
+    text = text[min(starts):]
+    try:
+        value, end = json.JSONDecoder().raw_decode(text)
+        return value, (["trailing_text"] if text[end:].strip() else []), False
+    except ValueError:
+        pass
+
+    repairs = set()
+    out = []
+    stack = []       # Expected closers
+    cuts = []        # (len(out), stack) where the document can be cut and closed
+    in_string = escape = False
+    last = ""        # Last significant char emitted outside strings
+    spaced = False   # Whitespace since `last`
+    i, n = 0, len(text)
+    while i < n:
+        c = text[i]
+        if in_string:
+            if escape:
+                escape = False
+            elif c == "\\":
+                escape = True
+            elif c == '"':
+                in_string = False
+                last = '"'
+                spaced = False
+            elif c == "\n":
+                c = "\\n"
+                repairs.add("newline_in_string")
+            elif c == "\t":
+                c = "\\t"
+            out.append(c)
+            i += 1
+            continue
+        if c == "/" and text.startswith("//", i):
+            i = text.find("\n", i)
+            i = n if i < 0 else i
+            repairs.add("comment")
+            continue
+        if c == "/" and text.startswith("/*", i):
+            i = text.find("*/", i)
+            i = n if i < 0 else i + 2
+            repairs.add("comment")
+            continue
+        if c.isspace():
+            out.append(c)
+            spaced = True
+            i += 1
+            continue
+        # Two values with nothing between them: the model forgot a comma
+        if (c in '{["-' or c.isalnum()) and stack and (last in '}]"' or last.isalnum()) and (spaced or not last.isalnum()):
+            out.append(",")
+            cuts.append((len(out) - 1, list(stack)))
+            repairs.add("missing_comma")
+        if c in "{[":
+            stack.append("}" if c == "{" else "]")
+            out.append(c)
+            cuts.append((len(out), list(stack)))
+        elif c in "}]":
+            # Trailing comma before a closer
+            while out and out[-1].isspace():
+                out.pop()
+            if out and out[-1] == ",":
+                out.pop()
+                repairs.add("trailing_comma")
+            if stack[-1] == c:
+                stack.pop()
+            elif c in stack:
+                # Closes an outer frame: the model left out the inner closers
+                while stack[-1] != c:
+                    out.append(stack.pop())
+                stack.pop()
+                repairs.add("missing_bracket")
+            else:
+                # Closes nothing that is open: drop it
+                repairs.add("stray_bracket")
+                i += 1
+                continue
+            out.append(c)
+            if not stack:
+                if text[i + 1:].strip():
+                    repairs.add("trailing_text")
+                break
+        elif c == '"':
+            in_string = True
+            out.append(c)
+        elif c == ",":
+            cuts.append((len(out), list(stack)))
+            out.append(c)
+        else:
+            out.append(c)
+        last = c
+        spaced = False
+        i += 1
+
+    truncated = bool(stack)
+    if truncated:
+        repairs.add("truncated")
+        # Drop the incomplete tail back to the last point where the document can be closed
+        for pos, open_stack in reversed(cuts):
+            candidate = "".join(out[:pos]).rstrip().rstrip(",") + "".join(reversed(open_stack))
+            try:
+                return json.loads(candidate), sorted(repairs), True
+            except ValueError:
+                continue
+        return None, sorted(repairs), True
+    try:
+        return json.loads("".join(out)), sorted(repairs), False
+    except ValueError:
+        return None, sorted(repairs), False
+
+def _coerce(value, kind):
+    """value as kind, or None if it cannot be made into one sensibly."""
+    if isinstance(value, kind):
+        return value
+    if kind is str and isinstance(value, (int, float)):
+        return str(value)
+    if kind is list and isinstance(value, str):
+        return [v.strip() for v in value.split(",") if v.strip()]
+    return None
+
+def clean_scene(scene, schema):
+    """A schema-conforming copy of one scene, or None if it has no narration."""
+    if isinstance(schema, str):
+        schema = SCHEMAS.get(schema)
+    if not isinstance(scene, dict):
+        return None
+    if not schema or "scene_fields" not in schema:
+        return scene if scene.get("text") else None
+    scene = dict(scene)
+    for field, kind in schema["scene_fields"].items():
+        if field in scene:
+            scene[field] = _coerce(scene[field], kind)
+            if scene[field] is None:
+                del scene[field]
+    for field, choices in schema["scene_choices"].items():
+        if field in scene and str(scene[field]).lower() not in choices:
+            del scene[field]
+    for field, default in schema["scene_defaults"].items():
+        scene.setdefault(field, default)
+    if not (scene.get("text") or "").strip():
+        return None
+    return scene
+
+def validate(data, schema, defaults=None):
+    """
+    Checks data against a schema (a SCHEMAS name or dict), fixing what can be fixed.
+    Returns (data or None, [problems fixed or fatal]).
+    """
+    if isinstance(schema, str):
+        schema = SCHEMAS[schema]
+    problems = []
+    if "items" in schema:
+        items = data if isinstance(data, list) else (data or {}).get("titles") if isinstance(data, dict) else None
+        if not isinstance(items, list):
+            return None, ["not_a_list"]
+        kept = [_coerce(v, schema["items"]) for v in items]
+        kept = [v.strip() for v in kept if isinstance(v, str) and v.strip()]
+        if len(kept) != len(items):
+            problems.append("items")
+        return (kept if len(kept) >= schema["min_items"] else None), problems
+
+    if not isinstance(data, dict):
+        return None, ["not_an_object"]
+    data = dict(data)
+    fallback = dict(schema["defaults"], **(defaults or {}))
+    for field, kind in schema["fields"].items():
+        if field in data:
+            value = _coerce(data[field], kind)
+            if value is None or (field in fallback and value == ""):
+                problems.append(field)
+                del data[field]
+            else:
+                data[field] = value
+    for field, choices in schema["choices"].items():
+        if field in data and str(data[field]).lower() not in choices:
+            problems.append(field)
+            del data[field]
+    for field, default in fallback.items():
+        if field not in data:
+            data[field] = default
+
+    scenes = data.get("scenes")
+    if not isinstance(scenes, list):
+        return None, problems + ["scenes"]
+    kept = [s for s in (clean_scene(s, schema) for s in scenes) if s]
+    if len(kept) != len(scenes):
+        problems.append("scenes")
+    data["scenes"] = kept
+    missing = [f for f in schema["required"] if not data.get(f)]
+    if missing or len(kept) < schema.get("min_scenes", 1):
+        return None, problems + missing + (["min_scenes"] if len(kept) < schema.get("min_scenes", 1) else [])
+    return data, problems
+
+def continuation_prompt(prompt, partial):
+    """Asks the model to write only the rest of a cut-off JSON response."""
+    return f"""
+        Your previous JSON answer was cut off. Continue it EXACTLY from its last character.
+        Output ONLY the missing remainder: no markdown, no explanation, do not repeat anything already written.
+
+        ORIGINAL REQUEST:
+        {prompt}
+
+        ANSWER SO FAR (ends abruptly):
+        {partial[-CONTINUATION_CONTEXT:]}
+        """
+
+def _is_word(c):
+    return c.isalnum() or c == "_"
+
+def join_continuation(partial, tail):
+    """
+    Appends a continuation, dropping fences and any overlap the model repeated.
+    Long overlaps are taken as they are; a short one (a re-sent cut-off word, a quote)
+    only counts if it starts on a token boundary of the partial text, so "...hello wor"
+    + "hello world" joins to "hello world" while "...wor" + "rld" is left alone.
+    """
+    tail = _strip_fences(tail) if "```" in tail else tail
+    for size in range(min(len(partial), len(tail), MAX_OVERLAP), 0, -1):
+        if not partial.endswith(tail[:size]):
+            continue
+        start = len(partial) - size
+        if size > MIN_SAFE_OVERLAP or start == 0 or not (_is_word(partial[start - 1]) and _is_word(partial[start])):
+            return partial + tail[size:]
+    return partial + tail
+
+def finish(value, repairs, truncated, continued=0, schema=None, defaults=None):
+    """Validates a parsed value and records repair metrics. Returns the final value or None."""
+    problems = []
+    if value is not None and schema:
+        value, problems = validate(value, schema, defaults)
+    tracer.incr("llm.json.parsed")
+    if continued:
+        tracer.incr("llm.json.continued")
+        tracer.incr("llm.json.continuation_calls", continued)
+    for kind in repairs:
+        tracer.incr(f"llm.json.repair.{kind}")
+    if value is None:
+        tracer.incr("llm.json.failed")
+        print(f"  [JSON] Unusable response (repairs tried: {', '.join(repairs) or 'none'}; problems: {', '.join(problems) or 'none'})")
+    elif repairs or problems or continued:
+        tracer.incr("llm.json.repaired")
+        print(f"  [JSON] Repaired locally: {', '.join(repairs + problems) or 'tail continued'}"
+              + (f" ({continued} continuation call(s))" if continued else ""))
+    else:
+        tracer.incr("llm.json.clean")
+    current_span().set(json_repairs=repairs, json_problems=problems, json_continued=continued,
+                       json_truncated=truncated)
+    return value
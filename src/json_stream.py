@@ -0,0 +1,109 @@
+"""
+JSON Stream - Incremental parsing of a streamed LLM script.
+Scans text as it arrives and hands back each element of the top-level "scenes"
+array the moment its closing brace shows up, so scene assets can start while
+the model is still writing the rest of the script.
+"""
+
+try:
+    from .json_repair import repair_json
+except ImportError:
+    from json_repair import repair_json
+
+class ScenesStreamParser:
+    """
+    Feed it text chunks; feed() returns (index, element) for each object element completed
+    by that chunk. Indices count every element of the array (unreadable objects, stray
+    strings and numbers too), so they line up with the same array in a full parse.
+    Tolerates markdown fences and // comments around the JSON (both show up in
+    Gemini output for our prompt templates); each element goes through repair_json.
+    """
+
+    def __init__(self, key="scenes"):
+        self.key = key
+        self.text = ""
+        self.pos = 0
+        self.depth = 0            # Nesting depth of {} / []
+        self.in_string = False
+        self.escape = False
+        self.in_comment = False
+        self.string_start = None
+        self.last_string = None   # Most recent complete string (a candidate key)
+        self.array_depth = None   # Depth inside the target array, once found
+        self.element_start = None
+        self.pending = False      # A non-object element is open at array level
+        self.count = 0
+
+    def feed(self, chunk):
+        self.text += chunk
+        completed = []
+        text = self.text
+        # Hold back a trailing '/' until we know whether it starts a comment
+        end = len(text) - 1 if text.endswith("/") else len(text)
+        while self.pos < end:
+            c = text[self.pos]
+            if self.in_comment:
+                if c == "\n":
+                    self.in_comment = False
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif c == "\\":
+                    self.escape = True
+                elif c == '"':
+                    self.in_string = False
+                    self.last_string = text[self.string_start:self.pos]
+            elif c == '"':
+                self._element_begins(False)
+                self.in_string = True
+                self.string_start = self.pos + 1
+            elif c == "/" and text[self.pos + 1] == "/":
+                self.in_comment = True
+            elif c in "{[":
+                self._element_begins(c == "{")
+                self.depth += 1
+                if c == "[" and self.array_depth is None and self.depth == 2 and self.last_string == self.key:
+                    self.array_depth = self.depth
+                elif c == "{" and self.array_depth is not None and self.depth == self.array_depth + 1:
+                    self.element_start = self.pos
+            elif c in "}]":
+                if self.element_start is not None and c == "}" and self.depth == self.array_depth + 1:
+                    index = self.count
+                    element = self._parse(text[self.element_start:self.pos + 1])
+                    if element is not None:
+                        completed.append((index, element))
+                    self.element_start = None
+                elif self.array_depth is not None and c == "]" and self.depth == self.array_depth:
+                    self._element_ends()
+                    self.array_depth = -1 # Array closed; ignore any later "scenes" keys
+                self.depth -= 1
+            elif c == ",":
+                if self.depth == self.array_depth:
+                    self._element_ends()
+            elif not c.isspace() and not self.pending:
+                self._element_begins(False) # Number, true/false/null
+            self.pos += 1
+        return completed
+
+    def _element_begins(self, is_object):
+        """Notes a value starting at array level; objects are counted when they close."""
+        if self.array_depth is None or self.depth != self.array_depth:
+            return
+        self._element_ends() # Missing comma: the previous element ends here
+        self.pending = not is_object
+
+    def _element_ends(self):
+        if self.pending:
+            self.count += 1
+            self.pending = False
+
+    def _parse(self, element):
+        value, repairs, _ = repair_json(element)
+        if not isinstance(value, dict):
+            print(f"  [WARN] Skipping malformed streamed scene {self.count + 1}")
+            self.count += 1
+            return None
+        if repairs:
+            print(f"  [JSON] Repaired streamed scene {self.count + 1}: {', '.join(repairs)}")
+        self.count += 1
+        return value
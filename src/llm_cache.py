@@ -0,0 +1,73 @@
+"""
+LLM Cache - On-disk prompt -> parsed JSON store for Gemini calls.
+Keyed by model policy, prompt hash and generation config; entries expire after a TTL
+and the directory is kept under a size bound, so a replayed run costs no quota.
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+try:
+    from .file_cache import FileCache
+except ImportError:
+    from file_cache import FileCache
+
+LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", ".cache/llm")
+LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "32"))
+LLM_CACHE_TTL_HOURS = float(os.getenv("LLM_CACHE_TTL_HOURS", "72"))
+
+class LLMCache(FileCache):
+    """FileCache of JSON documents: {'created', 'model', 'value'}."""
+
+    def __init__(self, cache_dir=LLM_CACHE_DIR, max_bytes=LLM_CACHE_MAX_MB * 1024 * 1024, ttl=LLM_CACHE_TTL_HOURS * 3600):
+        super().__init__(cache_dir, max_bytes, suffix=".json")
+        self.ttl = ttl
+
+    def prompt_key(self, prompt, models, config):
+        return self.key(prompt=hashlib.sha256(prompt.encode()).hexdigest(), models=list(models), config=config)
+
+    def get(self, key):
+        """Cached value for key, or None when missing or older than the TTL."""
+        entry = self._entry_path(key)
+        try:
+            with open(entry) as f:
+                doc = json.load(f)
+            if time.time() - doc["created"] > self.ttl:
+                os.remove(entry)
+                raise FileNotFoundError(entry)
+            os.utime(entry) # Mark as most recently used
+        except (FileNotFoundError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return doc["value"]
+
+    def put(self, key, value, model=None):
+        entry = self._entry_path(key)
+        os.makedirs(os.path.dirname(entry), exist_ok=True)
+        tmp_path = f"{entry}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"created": time.time(), "model": model, "value": value}, f)
+            os.replace(tmp_path, entry)
+        except Exception as e:
+            print(f"  [WARN] Could not store LLM response in cache: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return False
+        self._evict()
+        return True
+
+_llm_cache = None
+
+def get_llm_cache():
+    """Shared cache for parsed LLM responses."""
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = LLMCache()
+    return _llm_cache
@@ -1,7 +1,12 @@
 import time
-import json
+import asyncio
 from google import genai
 from .config import Config
+from .telemetry import traced, current_span
+from .llm_cache import get_llm_cache
+from .model_health import get_model_health, retry_after_hint
+from .json_stream import ScenesStreamParser
+from .json_repair import repair_json, clean_scene, continuation_prompt, join_continuation, finish, MAX_CONTINUATIONS
 
 class LLMWrapper:
     def __init__(self):
@@ -25,23 +30,33 @@ class LLMWrapper:
             'models/gemini-pro'
         ]
         self.available_gen_models = []
+        # Disable AFC to speed up and save tokens
+        self.generation_config = {'automatic_function_calling': {'disable': True}}
+        self.last_model = None
+        self.health = get_model_health()
+        self._aio_sem = None
+        self._aio_loop = None
         self._refresh_available_models()
 
-    def _refresh_available_models(self):
-        """Fetches and filters models that support content generation."""
+    def _refresh_available_models(self, force=False):
+        """Fetches and filters models that support content generation (cached for MODEL_LIST_TTL_HOURS)."""
+        cached = None if force else self.health.cached_model_list()
+        if cached:
+            self.available_gen_models = cached
+            return
         try:
             print("Refreshing available generative models...")
             models = list(self.client.models.list())
             self.available_gen_models = [m.name for m in models if 'generateContent' in m.supported_actions]
             print(f"DEBUG: Confirmed Generative Models: {self.available_gen_models}")
+            if self.available_gen_models:
+                self.health.store_model_list(self.available_gen_models)
         except Exception as e:
             print(f"Warning: Could not list models, will use hardcoded defaults: {e}")
             self.available_gen_models = self.preferred_models
 
-    def _call_gemini(self, prompt, max_retries=10):
-        """Ultra-robust caller that swaps models if one is rate-limited or missing."""
-        
-        # Build an ordered list of models to try for THIS call
+    def _candidate_models(self, prefer=None):
+        """Ordered list of models to try for one call; `prefer` (if available) goes first."""
         candidate_models = []
         for p in self.preferred_models:
             if p in self.available_gen_models:
@@ -54,85 +69,316 @@ class LLMWrapper:
         
         if not candidate_models:
             candidate_models = ['models/gemini-1.5-flash'] # Final desperation
+        if prefer in candidate_models:
+            candidate_models.remove(prefer)
+            candidate_models.insert(0, prefer)
+        return candidate_models
+
+    def _latency_kind(self, prompt, kind=None):
+        """Latency history bucket: the call kind (schema name) when known, else the prompt size class."""
+        return kind or f"prompt_{min(len(prompt) // 2000, 5)}"
+
+    def _accept(self, model, prompt, response, latency, kind=None):
+        """Validates a response and records the successful call. Returns its text."""
+        if not response or not response.text:
+            raise ValueError("Empty response")
+        current_span().add_bytes(len(str(prompt).encode()) + len(response.text.encode()))
+        current_span().set(model=model)
+        self.health.record_success(model, latency, self._latency_kind(prompt, kind))
+        self.last_model = model
+        return response.text
+
+    def _handle_error(self, current_model, candidate_models, e, attempt, max_retries):
+        """Records a failed attempt against the model's health. Returns True to try again."""
+        err_msg = str(e).lower()
+        # Whatever went wrong, the next attempt starts with a different model
+        candidate_models.remove(current_model)
+        candidate_models.append(current_model)
+        
+        # If 404, the model name is definitely wrong or retired: park it until the model list refreshes
+        if "404" in err_msg or "not found" in err_msg:
+            print(f"Model {current_model} NOT FOUND (404). Swapping...")
+            self.health.record_not_found(current_model)
+            return True
+        
+        # If 429 or Quota, cool this model down for as long as the API asks and move on
+        if "429" in err_msg or "resource_exhausted" in err_msg or "quota" in err_msg:
+            cooldown = self.health.record_rate_limit(current_model, retry_after_hint(str(e)))
+            print(f"Rate Limited on {current_model}. Attempt {attempt+1}/{max_retries}. Cooling it down for {cooldown:.0f}s and swapping...")
+            return True
+        
+        # If it's a different error (like safety), we might need to stop
+        print(f"Gemini API Error on {current_model}: {e}")
+        self.health.record_failure(current_model)
+        return attempt < 3 # Try a few times even for unknown errors
 
-        model_index = 0
+    def _next_model(self, candidate_models):
+        """Next healthy model and how long to wait for it (None when every model is gone)."""
+        # Known-bad models are skipped; if every model is cooling down, wait for the first to recover
+        current_model, wait = self.health.pick(candidate_models)
+        if current_model is None:
+            print("All Gemini models are unavailable (404). Giving up on this call.")
+        elif wait > 0:
+            print(f"All models cooling down. Waiting {wait:.1f}s for {current_model}...")
+        return current_model, wait
+
+    @traced("llm.call_gemini")
+    def _call_gemini(self, prompt, max_retries=10, prefer=None, kind=None):
+        """Ultra-robust caller that swaps models if one is rate-limited or missing."""
+        candidate_models = self._candidate_models(prefer)
         for i in range(max_retries):
-            # Cycle through models if we keep hitting limits
-            current_model = candidate_models[model_index % len(candidate_models)]
+            current_model, wait = self._next_model(candidate_models)
+            if current_model is None:
+                return None
+            if wait > 0:
+                time.sleep(wait)
+            if i > 0:
+                current_span().add_retry()
             
             try:
-                # Disable AFC to speed up and save tokens
-                config = {'automatic_function_calling': {'disable': True}}
+                started = time.monotonic()
                 response = self.client.models.generate_content(
                     model=current_model,
                     contents=prompt,
-                    config=config
+                    config=self.generation_config
                 )
-                if not response or not response.text:
-                    raise ValueError("Empty response")
-                return response.text
-                
+                return self._accept(current_model, prompt, response, time.monotonic() - started, kind)
             except Exception as e:
-                err_msg = str(e).lower()
-                
-                # If 404, the model name is definitely wrong or retired, move to next model immediately
-                if "404" in err_msg or "not found" in err_msg:
-                    print(f"Model {current_model} NOT FOUND (404). Swapping...")
-                    model_index += 1
-                    continue
-                
-                # If 429 or Quota, wait and then try the NEXT model to spread load
-                if "429" in err_msg or "resource_exhausted" in err_msg or "quota" in err_msg:
-                    import random
-                    # Exponential backoff with jitter
-                    wait_time = min(5 * (2 ** (i // 2)), 60) + random.uniform(1, 5)
-                    print(f"Rate Limited on {current_model}. Attempt {i+1}/{max_retries}. Swapping models and waiting {wait_time:.1f}s...")
-                    model_index += 1
-                    time.sleep(wait_time)
-                    continue
-                
-                # If it's a different error (like safety), we might need to stop
-                print(f"Gemini API Error on {current_model}: {e}")
-                if i < 3: # Try a few times even for unknown errors
-                    model_index += 1
-                    continue
+                if not self._handle_error(current_model, candidate_models, e, i, max_retries):
+                    return None
+        return None
+
+    def _aio_limit(self):
+        """Semaphore capping concurrent async Gemini requests (one per event loop)."""
+        loop = asyncio.get_running_loop()
+        if self._aio_loop is not loop:
+            self._aio_sem = asyncio.Semaphore(Config.GEMINI_CONCURRENCY)
+            self._aio_loop = loop
+        return self._aio_sem
+
+    @traced("llm.call_gemini_async")
+    async def _call_gemini_async(self, prompt, max_retries=10, prefer=None, kind=None):
+        """_call_gemini on the async client: never blocks the event loop, at most GEMINI_CONCURRENCY in flight."""
+        candidate_models = self._candidate_models(prefer)
+        for i in range(max_retries):
+            current_model, wait = self._next_model(candidate_models)
+            if current_model is None:
                 return None
+            if wait > 0:
+                await asyncio.sleep(wait)
+            if i > 0:
+                current_span().add_retry()
+            
+            try:
+                async with self._aio_limit():
+                    started = time.monotonic()
+                    response = await self.client.aio.models.generate_content(
+                        model=current_model,
+                        contents=prompt,
+                        config=self.generation_config
+                    )
+                return self._accept(current_model, prompt, response, time.monotonic() - started, kind)
+            except Exception as e:
+                if not self._handle_error(current_model, candidate_models, e, i, max_retries):
+                    return None
         return None
 
-    def _extract_json(self, text):
-        """Robustly Extracts and cleans JSON from LLM response using regex and balance checks."""
-        import re
+    async def _stream_gemini_async(self, prompt, max_retries=10, kind=None):
+        """
+        Yields response text as Gemini writes it. Failed models are swapped like in
+        _call_gemini, but only before the first chunk; a stream that breaks off later ends early.
+        """
+        candidate_models = self._candidate_models()
+        for i in range(max_retries):
+            current_model, wait = self._next_model(candidate_models)
+            if current_model is None:
+                return
+            if wait > 0:
+                await asyncio.sleep(wait)
+
+            received = 0
+            try:
+                async with self._aio_limit():
+                    started = time.monotonic()
+                    stream = await self.client.aio.models.generate_content_stream(
+                        model=current_model,
+                        contents=prompt,
+                        config=self.generation_config
+                    )
+                    async for response in stream:
+                        text = response.text if response else None
+                        if text:
+                            received += len(text)
+                            yield text
+                if not received:
+                    raise ValueError("Empty response")
+                self.health.record_success(current_model, time.monotonic() - started, self._latency_kind(prompt, kind))
+                self.last_model = current_model
+                return
+            except Exception as e:
+                if received:
+                    print(f"Gemini stream from {current_model} broke off after {received} chars: {e}")
+                    self.health.record_failure(current_model)
+                    return
+                if not self._handle_error(current_model, candidate_models, e, i, max_retries):
+                    return
+
+    async def _hedged_json(self, prompt, schema=None, defaults=None):
+        """
+        Sends the prompt to the healthiest model; if it is slower than its usual latency
+        percentile for this kind of call, sends it to a second healthy model too and takes
+        the first valid JSON. Without latency history for the kind there is no hedge.
+        """
+        candidates = self._candidate_models()
+        primary, _ = self.health.pick(candidates)
+        backup, backup_wait = self.health.pick([m for m in candidates if m != primary]) if primary else (None, 0)
+
+        async def attempt(prefer, max_retries):
+            text = await self._call_gemini_async(prompt, max_retries=max_retries, prefer=prefer, kind=schema)
+            return await self._parse_json_async(text, prompt, schema, defaults) if text else None
+
+        pending = {asyncio.create_task(attempt(primary, 10))}
         try:
-            # 1. Strip markdown blocks
-            text = text.replace("```json", "").replace("```", "").strip()
-            
-            # 2. Find anything between { } or [ ]
-            json_match = re.search(r'(\{.*\}|\[.*\])', text, re.DOTALL)
-            if json_match:
-                candidate = json_match.group(1)
-                # 3. Final validation
-                return json.loads(candidate)
-            return json.loads(text)
-        except Exception as e:
-            print(f"JSON Extraction Error: {e}")
+            delay = self.health.hedge_delay(primary, self._latency_kind(prompt, schema), Config.GEMINI_HEDGE_PERCENTILE)
+            if backup and backup_wait <= 0 and delay is not None:
+                delay = max(delay, Config.GEMINI_HEDGE_AFTER)
+                done, pending = await asyncio.wait(pending, timeout=delay)
+                if not done:
+                    print(f"  [LLM] {primary} slower than {delay:.1f}s, hedging with {backup}")
+                    current_span().set(hedged=True)
+                    pending.add(asyncio.create_task(attempt(backup, 3)))
+                else:
+                    pending = done
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    data = task.result()
+                    if data is not None:
+                        return data
             return None
+        finally:
+            for task in pending:
+                task.cancel()
 
-    def generate_psychology_titles(self):
-        """Generates 20 viral psychology titles."""
+    def _cached_json(self, prompt, cache):
+        """(cache key, cached answer or None) for a prompt."""
+        llm_cache = get_llm_cache()
+        key = llm_cache.prompt_key(prompt, self.preferred_models, self.generation_config)
+        if cache:
+            data = llm_cache.get(key)
+            if data is not None:
+                current_span().set(cache_hit=True)
+                print("  [CACHE] LLM response hit, skipping Gemini call")
+                return key, data
+        return key, None
+
+    def _store_json(self, key, data):
+        if data is not None:
+            # Only parsed answers are kept, so a retry after a bad response goes back to the API
+            get_llm_cache().put(key, data, model=self.last_model)
+        return data
+
+    @traced("llm.generate_json")
+    def _generate_json(self, prompt, cache=True, schema=None, defaults=None):
+        """
+        Calls Gemini and parses the JSON answer, replaying it from the on-disk cache when
+        this exact prompt was answered before. cache=False skips the lookup for calls that
+        want a fresh, creative answer; the new answer still replaces the cached one.
+        schema names a json_repair.SCHEMAS entry the answer is validated against
+        (defaults fill fields the model left out).
+        """
+        key, data = self._cached_json(prompt, cache)
+        if data is not None:
+            return data
+        text = self._call_gemini(prompt, kind=schema)
+        if not text:
+            return None
+        return self._store_json(key, self._parse_json(text, prompt, schema, defaults))
+
+    @traced("llm.generate_json_async")
+    async def _generate_json_async(self, prompt, cache=True, hedge=None, schema=None, defaults=None):
+        """Async _generate_json; hedges slow calls across two models when hedge=True (default: GEMINI_HEDGE, off)."""
+        key, data = self._cached_json(prompt, cache)
+        if data is not None:
+            return data
+        if Config.GEMINI_HEDGE if hedge is None else hedge:
+            data = await self._hedged_json(prompt, schema, defaults)
+        else:
+            text = await self._call_gemini_async(prompt, kind=schema)
+            data = await self._parse_json_async(text, prompt, schema, defaults) if text else None
+        return self._store_json(key, data)
+
+    def _parse_json(self, text, prompt, schema=None, defaults=None):
+        """
+        Repairs and validates a JSON answer locally. A cut-off answer is completed by asking
+        the model for just the missing tail (up to MAX_CONTINUATIONS times) rather than
+        regenerating the whole script.
+        """
+        value, repairs, truncated = repair_json(text)
+        continued = 0
+        while truncated and continued < MAX_CONTINUATIONS:
+            print(f"  [JSON] Response cut off after {len(text)} chars, asking for the rest")
+            tail = self._call_gemini(continuation_prompt(prompt, text), max_retries=3, kind="continuation")
+            if not tail:
+                break
+            continued += 1
+            text = join_continuation(text, tail)
+            value, more, truncated = repair_json(text)
+            repairs = sorted(set(repairs + more))
+        return finish(value, repairs, truncated, continued, schema, defaults)
+
+    async def _parse_json_async(self, text, prompt, schema=None, defaults=None):
+        """Async _parse_json."""
+        value, repairs, truncated, continued = await self._complete_json_async(text, prompt)
+        return finish(value, repairs, truncated, continued, schema, defaults)
+
+    async def _complete_json_async(self, text, prompt):
+        """Repair plus tail continuation, without validation: (value, repairs, truncated, continuation calls)."""
+        value, repairs, truncated = repair_json(text)
+        continued = 0
+        while truncated and continued < MAX_CONTINUATIONS:
+            print(f"  [JSON] Response cut off after {len(text)} chars, asking for the rest")
+            tail = await self._call_gemini_async(continuation_prompt(prompt, text), max_retries=3, kind="continuation")
+            if not tail:
+                break
+            continued += 1
+            text = join_continuation(text, tail)
+            value, more, truncated = repair_json(text)
+            repairs = sorted(set(repairs + more))
+        return value, repairs, truncated, continued
+
+    def _extract_json(self, text):
+        """Extracts JSON from an LLM response, repairing fences, comments, stray commas and truncation."""
+        value, repairs, truncated = repair_json(text)
+        if value is None:
+            print(f"JSON Extraction Error: no usable JSON (repairs tried: {', '.join(repairs) or 'none'})")
+        return value
+
+    def _psychology_titles_prompt(self):
         prompt = """
         Objective: Write exactly 20 highly clickable, emotionally intense YouTube psychology titles.
         Return ONLY Valid JSON. A simple list of strings.
         ["Title 1", "Title 2", ...]
         """
+        return prompt
+
+    def generate_psychology_titles(self, cache=True):
+        """Generates 20 viral psychology titles."""
+        prompt = self._psychology_titles_prompt()
         try:
-            text = self._call_gemini(prompt)
-            if not text: return []
-            return self._extract_json(text) or []
+            return self._generate_json(prompt, cache=cache, schema="psychology_titles") or []
         except:
             return []
 
-    def generate_psychology_script(self, title):
-        """Generates a high-retention psychology script with noir-style visuals."""
+    async def generate_psychology_titles_async(self, cache=True):
+        """Async generate_psychology_titles: does not block the event loop, hedges slow calls if GEMINI_HEDGE=1."""
+        prompt = self._psychology_titles_prompt()
+        try:
+            return await self._generate_json_async(prompt, cache=cache, schema="psychology_titles") or []
+        except:
+            return []
+
+    def _psychology_script_prompt(self, title):
         prompt = f"""
         Title: {title}
         Role: A lead writer for a top-tier Psychology & Insight channel.
@@ -160,15 +406,30 @@ class LLMWrapper:
             ]
         }}
         """
+        return prompt
+
+    def generate_psychology_script(self, title, cache=True):
+        """Generates a high-retention psychology script with noir-style visuals."""
+        prompt = self._psychology_script_prompt(title)
         try:
-            text = self._call_gemini(prompt)
-            if not text: return None
-            return self._extract_json(text)
+            return self._generate_json(prompt, cache=cache, schema="psychology_script", defaults={'title': title})
         except:
             return None
 
-    def generate_psychology_short_script(self, title):
-        """Generates a high-retention psychology SHORT script (Noir)."""
+    async def generate_psychology_script_async(self, title, cache=True):
+        """Async generate_psychology_script: does not block the event loop, hedges slow calls if GEMINI_HEDGE=1."""
+        prompt = self._psychology_script_prompt(title)
+        try:
+            return await self._generate_json_async(prompt, cache=cache, schema="psychology_script", defaults={'title': title})
+        except:
+            return None
+
+    def stream_psychology_script(self, title, cache=True):
+        """Streaming generate_psychology_script: a ScriptStream whose scenes() yields scenes as they are written."""
+        return ScriptStream(self, self._psychology_script_prompt(title), cache=cache,
+                            schema="psychology_script", defaults={'title': title})
+
+    def _psychology_short_script_prompt(self, title):
         prompt = f"""
         Title: {title}
         Role: A mysterious storyteller revealing the "Darker Side" of human behavior.
@@ -196,18 +457,25 @@ class LLMWrapper:
             ]
         }}
         """
+        return prompt
+
+    def generate_psychology_short_script(self, title, cache=True):
+        """Generates a high-retention psychology SHORT script (Noir)."""
+        prompt = self._psychology_short_script_prompt(title)
         try:
-            text = self._call_gemini(prompt)
-            if not text: return None
-            return self._extract_json(text)
+            return self._generate_json(prompt, cache=cache, schema="psychology_short_script", defaults={'title': title})
         except:
             return None
 
-    def generate_relatable_comedy_script(self, topic):
-        """
-        Generates a script focused on Relatable Day-to-Day Comedy (POV style).
-        Focus: Observational humor, "That feeling when...", "POV: You just...".
-        """
+    async def generate_psychology_short_script_async(self, title, cache=True):
+        """Async generate_psychology_short_script: does not block the event loop, hedges slow calls if GEMINI_HEDGE=1."""
+        prompt = self._psychology_short_script_prompt(title)
+        try:
+            return await self._generate_json_async(prompt, cache=cache, schema="psychology_short_script", defaults={'title': title})
+        except:
+            return None
+
+    def _relatable_comedy_script_prompt(self, topic):
         prompt = f"""
         Topic: {topic}
         Role: A relatable observational comedian who finds the funny in everyday struggle.
@@ -238,17 +506,30 @@ class LLMWrapper:
             ]
         }}
         """
+        return prompt
+
+    def generate_relatable_comedy_script(self, topic, cache=True):
+        """
+        Generates a script focused on Relatable Day-to-Day Comedy (POV style).
+        Focus: Observational humor, "That feeling when...", "POV: You just...".
+        """
+        prompt = self._relatable_comedy_script_prompt(topic)
         try:
-            text = self._call_gemini(prompt)
-            if not text: return None
-            return self._extract_json(text)
+            return self._generate_json(prompt, cache=cache, schema="relatable_comedy_script", defaults={'title': f"POV: {topic}"})
         except Exception as e:
             print(f"Error parsing relatable comedy script: {e}")
             return None
 
-    def generate_conversational_script(self, topic, type="short"):
-        """Generates a high-SEO, human-like script with dynamic stickman movements."""
-        
+    async def generate_relatable_comedy_script_async(self, topic, cache=True):
+        """Async generate_relatable_comedy_script: does not block the event loop, hedges slow calls if GEMINI_HEDGE=1."""
+        prompt = self._relatable_comedy_script_prompt(topic)
+        try:
+            return await self._generate_json_async(prompt, cache=cache, schema="relatable_comedy_script", defaults={'title': f"POV: {topic}"})
+        except Exception as e:
+            print(f"Error parsing relatable comedy script: {e}")
+            return None
+
+    def _conversational_script_prompt(self, topic, type="short"):
         if type == "short":
             char_count = "500-600"
             scene_count = 10
@@ -286,19 +567,27 @@ class LLMWrapper:
             ]
         }}
         """
+        return prompt
+
+    def generate_conversational_script(self, topic, type="short", cache=True):
+        """Generates a high-SEO, human-like script with dynamic stickman movements."""
+        prompt = self._conversational_script_prompt(topic, type)
         try:
-            text = self._call_gemini(prompt)
-            if not text: return None
-            return self._extract_json(text)
+            return self._generate_json(prompt, cache=cache, schema="conversational_script", defaults={'title': topic})
         except Exception as e:
             print(f"Error parsing conversational script: {e}")
             return None
 
-    def generate_psychology_stickman_script(self, topic):
-        """
-        Generates a high-retention psychology script with STICKMAN visuals.
-        Requested by user feedback: Natural punctuation, stickman synced visuals.
-        """
+    async def generate_conversational_script_async(self, topic, type="short", cache=True):
+        """Async generate_conversational_script: does not block the event loop, hedges slow calls if GEMINI_HEDGE=1."""
+        prompt = self._conversational_script_prompt(topic, type)
+        try:
+            return await self._generate_json_async(prompt, cache=cache, schema="conversational_script", defaults={'title': topic})
+        except Exception as e:
+            print(f"Error parsing conversational script: {e}")
+            return None
+
+    def _psychology_stickman_script_prompt(self, topic):
         scene_count = 10
         duration_note = "CRITICAL: Total video MUST be under 60 seconds."
         
@@ -332,14 +621,96 @@ class LLMWrapper:
             ]
         }}
         """
+        return prompt
+
+    def generate_psychology_stickman_script(self, topic, cache=True):
+        """
+        Generates a high-retention psychology script with STICKMAN visuals.
+        Requested by user feedback: Natural punctuation, stickman synced visuals.
+        """
+        prompt = self._psychology_stickman_script_prompt(topic)
+        try:
+            return self._generate_json(prompt, cache=cache, schema="psychology_stickman_script", defaults={'title': topic})
+        except Exception as e:
+            print(f"Error parsing psychology stickman script: {e}")
+            return None
+
+    async def generate_psychology_stickman_script_async(self, topic, cache=True):
+        """Async generate_psychology_stickman_script: does not block the event loop, hedges slow calls if GEMINI_HEDGE=1."""
+        prompt = self._psychology_stickman_script_prompt(topic)
         try:
-            text = self._call_gemini(prompt)
-            if not text: return None
-            return self._extract_json(text)
+            return await self._generate_json_async(prompt, cache=cache, schema="psychology_stickman_script", defaults={'title': topic})
         except Exception as e:
             print(f"Error parsing psychology stickman script: {e}")
             return None
 
+class ScriptStream:
+    """
+    One streamed script. `async for scene in stream.scenes()` yields each element of
+    "scenes" as soon as its JSON object is complete; afterwards `result` holds the
+    whole validated script (None if it could not be generated). Scenes the stream
+    could not read are yielded at the end, so in_script_order() puts anything
+    collected per yielded scene back into script order.
+    """
+
+    def __init__(self, llm, prompt, cache=True, schema=None, defaults=None):
+        self.llm = llm
+        self.prompt = prompt
+        self.cache = cache
+        self.schema = schema
+        self.defaults = defaults
+        self.positions = [] # Script position of each yielded scene, in yield order
+        self.result = None
+
+    async def scenes(self):
+        key, data = self.llm._cached_json(self.prompt, self.cache)
+        if data is not None:
+            self.result = data
+            for position, scene in enumerate(data.get('scenes', [])):
+                self.positions.append(position)
+                yield scene
+            return
+
+        parser = ScenesStreamParser()
+        sent = {} # Script position -> scene already yielded
+        async for chunk in self.llm._stream_gemini_async(self.prompt, kind=self.schema):
+            for index, scene in parser.feed(chunk):
+                scene = clean_scene(scene, self.schema)
+                if scene:
+                    sent[index] = scene
+                    self.positions.append(index)
+                    yield scene
+
+        # A cut-off stream is completed with a tail continuation; the new scenes follow
+        value, repairs, truncated, continued = (await self.llm._complete_json_async(parser.text, self.prompt)
+                                                if parser.text else (None, [], False, 0))
+        parsed = isinstance(value, dict) and isinstance(value.get('scenes'), list)
+        if not parsed:
+            if sent:
+                # The full document did not parse, but the scenes we already produced assets for did
+                print(f"  [WARN] Streamed script did not parse as a whole; keeping {len(sent)} scenes")
+            value = {'scenes': []}
+        raw = value['scenes']
+        scenes = []
+        # Element i of the full parse is stream element i (the parser counts every array element)
+        for position in sorted(set(sent) | set(range(len(raw)))):
+            if position in sent:
+                scenes.append(sent[position])
+                continue
+            scene = clean_scene(raw[position], self.schema)
+            if scene:
+                scenes.append(scene)
+                self.positions.append(position)
+                yield scene
+        value = dict(value, scenes=scenes)
+        # Same validation as a batch answer: title default, required fields, minimum scene count
+        data = finish(value if scenes else None, repairs, truncated, continued, self.schema, self.defaults)
+        self.result = self.llm._store_json(key, data) if parsed else data
+
+    def in_script_order(self, items):
+        """items (one per yielded scene, in yield order) sorted into script order."""
+        return [item for _, item in sorted(zip(self.positions, items), key=lambda pair: pair[0])]
+
 # Singleton Instance
 try:
     llm = LLMWrapper()
@@ -10,6 +10,9 @@ from src.asset_manager import AssetManager
 from src.video_editor import VideoEditor
 from src.youtube_uploader import YouTubeUploader
 from src.music_engine import MusicEngine
+from src.scene_pipeline import ScenePipeline
+from src.encoding_profiles import PROFILES, set_profile
+from src.telemetry import span, tracer
 
 logger = setup_logging()
 
@@ -20,8 +23,13 @@ async def main():
     parser.add_argument("--type", type=str, choices=["long", "short"], default="long", help="Type of video to generate")
     parser.add_argument("--style", type=str, choices=["noir", "stickman", "psych_stickman"], default="noir", help="Visual style of the video")
     parser.add_argument("--schedule-for", type=str, choices=["morning", "afternoon", "evening", "now"], default="now", help="Time slot for scheduling (US ET)")
+    parser.add_argument("--profile", type=str, choices=list(PROFILES), help="Encoding profile (default: draft with --dry-run, else ENCODING_PROFILE or standard)")
     args = parser.parse_args()
 
+    # Dry runs are previews: render them fast unless a profile was asked for explicitly
+    profile = set_profile(args.profile or ("draft" if args.dry_run else None))
+    logger.info(f"Encoding profile: {profile}")
+
     logger.info(f"Starting Media Automation in {args.style} style...")
     ensure_dir_exists("temp")
     ensure_dir_exists("output")
@@ -43,7 +51,8 @@ async def main():
         except:
             perf_data = None
         
-        title = trend_engine.get_viral_topic(llm, performance_context=perf_data)
+        with span("main.topic"):
+            title = await trend_engine.get_viral_topic_async(llm, performance_context=perf_data)
         if not title:
             logger.error("Failed to discover a viral topic")
             sys.exit(1)
@@ -59,26 +68,49 @@ async def main():
         voice.voice = "en-GB-RyanNeural" 
         logger.info(f"Using deep voice: {voice.voice}")
     
+    # Scene asset pipeline (set up before scripting: long-form scripts feed it while streaming)
+    asset_mgr = AssetManager()
+
+    # Audio Settings for Psych Stickman
+    audio_kwargs = {}
+    if args.style == "psych_stickman":
+        audio_kwargs = {
+            "voice_settings": {"stability": 1.0, "similarity_boost": 0.8},
+            "remove_silence": True
+        }
+
+    # Use landscape for long-form, portrait for shorts
+    orientation = "landscape" if args.type == "long" else "portrait"
+    pipeline = ScenePipeline(voice, asset_mgr)
+
     logger.info(f"Generating {args.type} script for Title: {title}")
     
     script_data = None
-    for attempt in range(2):
-        if args.style == "stickman":
-            if args.type == "short":
-                script_data = llm.generate_relatable_comedy_script(title)
+    processed_scenes = None
+    with span("main.script", style=args.style, type=args.type) as script_span:
+        for attempt in range(2):
+            if args.style == "stickman":
+                if args.type == "short":
+                    script_data = await llm.generate_relatable_comedy_script_async(title)
+                else:
+                    script_data = await llm.generate_conversational_script_async(title, type=args.type)
+            elif args.style == "psych_stickman":
+                 script_data = await llm.generate_psychology_stickman_script_async(title)
+            elif args.type == "long":
+                # 30-40 scenes: stream them, so TTS and images for scene 1 start while scene 30 is being written
+                script_stream = llm.stream_psychology_script(title)
+                with span("main.scenes", streamed=True):
+                    processed_scenes = await pipeline.run_stream(script_stream.scenes(), orientation=orientation, audio_kwargs=audio_kwargs)
+                processed_scenes = script_stream.in_script_order(processed_scenes)
+                script_data = script_stream.result
             else:
-                script_data = llm.generate_conversational_script(title, type=args.type)
-        elif args.style == "psych_stickman":
-             script_data = llm.generate_psychology_stickman_script(title)
-        elif args.type == "long":
-            script_data = llm.generate_psychology_script(title)
-        else:
-            # Noir style shorts use the specific psychology-short engine
-            script_data = llm.generate_psychology_short_script(title)
+                # Noir style shorts use the specific psychology-short engine
+                script_data = await llm.generate_psychology_short_script_async(title)
             
-        if script_data:
-            break
-        logger.warning(f"Script generation attempt {attempt+1} failed. Retrying...")
+            if script_data:
+                break
+            script_span.add_retry()
+            logger.warning(f"Script generation attempt {attempt+1} failed. Retrying...")
 
     if not script_data:
         logger.error(f"Failed to generate {args.type} script after 2 attempts.")
@@ -88,51 +120,10 @@ async def main():
     if script_data.get('deduced_angle'):
         logger.info(f"Deduced Angle: {script_data.get('deduced_angle')}")
     
-    # 2. Process Scenes
-    asset_mgr = AssetManager()
-    processed_scenes = []
-
-    for i, scene in enumerate(script_data['scenes']):
-        logger.info(f"Processing Scene {i+1}...")
-        
-        # Audio
-        audio_path = f"temp/audio_{i}.mp3"
-        mood = scene.get('audio_mood', 'neutral')
-        
-        # Audio Settings for Psych Stickman
-        audio_kwargs = {}
-        if args.style == "psych_stickman":
-            audio_kwargs = {
-                "voice_settings": {"stability": 1.0, "similarity_boost": 0.8},
-                "remove_silence": True
-            }
-
-        await voice.generate_audio(scene['text'], audio_path, mood=mood, **audio_kwargs)
-        
-        # Visuals
-        # Use landscape for long-form, portrait for shorts
-        orientation = "landscape" if args.type == "long" else "portrait"
-        
-        # Save visuals in persistent assets folder for tracking
-        ensure_dir_exists("assets/visuals")
-        video_path = f"assets/visuals/visual_{i}.jpg"
-        
-        prompt = scene.get('visual_prompt', scene.get('text'))
-        logger.info(f"Generating Image with prompt: {prompt}")
-        
-        # Logic to ensure stickman usage for stickman styles even if prompt is generic (though script should provide it)
-        # prompt already comes from script.
-        
-        success = asset_mgr.generate_image(prompt, video_path, orientation=orientation)
-        if not success:
-            logger.warning(f"Image generation failed for scene {i+1}. VideoEditor will use fallback visual.")
-        
-        processed_scenes.append({
-            'audio_path': audio_path,
-            'video_path': video_path if success else None,
-            'text': scene['text'],
-            'is_punchline': scene.get('is_punchline', False)
-        })
+    # 2. Process Scenes (TTS + visuals fan out concurrently, results stay in scene order)
+    if processed_scenes is None:
+        with span("main.scenes", count=len(script_data['scenes'])):
+            processed_scenes = await pipeline.run(script_data['scenes'], orientation=orientation, audio_kwargs=audio_kwargs)
 
     # 3. Create Video
     # Select Background Music
@@ -147,7 +138,8 @@ async def main():
     
     try:
         bg_color = script_data.get('bg_color', "#FFFFFF") # Default to white
-        success = editor.create_video(processed_scenes, output_file, is_short=is_short, bg_music_path=bg_music_path, style=args.style, bg_color=bg_color)
+        with span("main.render", style=args.style, scenes=len(processed_scenes)):
+            success = editor.create_video(processed_scenes, output_file, is_short=is_short, bg_music_path=bg_music_path, style=args.style, bg_color=bg_color)
     except Exception as e:
         logger.error(f"CRITICAL RENDER ERROR: {e}")
         import traceback
@@ -268,7 +260,11 @@ async def main():
 
 if __name__ == "__main__":
     try:
-        asyncio.run(main())
+        with span("main"):
+            asyncio.run(main())
     except Exception as e:
         print(f"FATAL ERROR: {e}")
         sys.exit(1)
+    finally:
+        # Always leave a trace behind, including for failed runs
+        tracer.write()
@@ -0,0 +1,164 @@
+"""
+Model Health - Shared, persisted view of which Gemini models are usable right now.
+Keeps the generative model list with a TTL (no models.list() on every LLMWrapper())
+and a circuit breaker per model: 404s park a model until the list is refreshed,
+429s cool it down for as long as the API's retry hint asks, and repeated unknown
+errors open the breaker for a few minutes. Callers go straight to a healthy model.
+Recent response latencies per model and call kind set the delay before a hedged request.
+"""
+
+import os
+import re
+import json
+import time
+import threading
+
+MODEL_HEALTH_PATH = os.getenv("MODEL_HEALTH_PATH", ".cache/model_health.json")
+MODEL_LIST_TTL_HOURS = float(os.getenv("MODEL_LIST_TTL_HOURS", "24"))
+RATE_LIMIT_COOLDOWN = 30   # Seconds, when a 429 carries no retry hint (doubles per repeat)
+MAX_COOLDOWN = 600
+BREAKER_THRESHOLD = 3      # Consecutive unknown errors before the breaker opens
+BREAKER_COOLDOWN = 300
+MAX_WAIT = 60              # Longest we sleep for a cooling model before trying it anyway
+LATENCY_SAMPLES = 50       # Recent successful call latencies kept per model and kind
+MIN_LATENCY_SAMPLES = 5    # Below this, hedge_delay() has no estimate
+
+def retry_after_hint(error_text):
+    """Seconds the API asked us to wait (RetryInfo retryDelay / 'retry in Ns'), or None."""
+    for pattern in (r"retry_?delay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s",
+                    r"retry in (\d+(?:\.\d+)?)\s*s",
+                    r"retry-after['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)"):
+        match = re.search(pattern, error_text, re.IGNORECASE)
+        if match:
+            return float(match.group(1))
+    return None
+
+class ModelHealth:
+    def __init__(self, path=MODEL_HEALTH_PATH, list_ttl=MODEL_LIST_TTL_HOURS * 3600):
+        self.path = path
+        self.list_ttl = list_ttl
+        self.models = {}   # model -> {'until', 'failures', 'reason'}
+        self.latencies = {} # model -> {kind: [seconds, ...]} of recent successful calls
+        self.model_list = None
+        self.listed_at = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            self.models = data.get("models", {})
+            # Histories from before latencies were split by call kind are dropped
+            self.latencies = {m: k for m, k in data.get("latencies", {}).items() if isinstance(k, dict)}
+            self.model_list = data.get("model_list")
+            self.listed_at = data.get("listed_at", 0)
+        except (FileNotFoundError, ValueError):
+            pass
+
+    def _save(self):
+        """Writes the table atomically (caller holds the lock)."""
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp_path = f"{self.path}.{os.getpid()}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump({"models": self.models, "latencies": self.latencies,
+                           "model_list": self.model_list, "listed_at": self.listed_at}, f, indent=2)
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"  [WARN] Could not persist model health: {e}")
+
+    def cached_model_list(self):
+        """The generative model list if it was fetched within the TTL, else None."""
+        with self._lock:
+            if self.model_list and time.time() - self.listed_at < self.list_ttl:
+                return list(self.model_list)
+            return None
+
+    def store_model_list(self, names):
+        with self._lock:
+            self.model_list = list(names)
+            self.listed_at = time.time()
+            # A fresh list is the authority on which models exist: forget old 404s
+            self.models = {m: h for m, h in self.models.items() if h.get("reason") != "not_found"}
+            self._save()
+
+    def pick(self, candidates):
+        """
+        (model, wait_seconds) for the next attempt: the first candidate whose breaker is
+        closed, else the one that cools down soonest. (None, 0) if every candidate is gone.
+        """
+        now = time.time()
+        with self._lock:
+            soonest = None
+            for model in candidates:
+                until = self.models.get(model, {}).get("until", 0)
+                if until <= now:
+                    return model, 0
+                if self.models[model].get("reason") == "not_found":
+                    continue
+                if soonest is None or until < soonest[1]:
+                    soonest = (model, until)
+        if soonest is None:
+            return None, 0
+        return soonest[0], min(soonest[1] - now, MAX_WAIT)
+
+    def _open(self, model, seconds, reason):
+        with self._lock:
+            entry = self.models.setdefault(model, {"failures": 0})
+            entry["failures"] = entry.get("failures", 0) + 1
+            entry["until"] = time.time() + seconds
+            entry["reason"] = reason
+            self._save()
+
+    def record_success(self, model, latency=None, kind="default"):
+        with self._lock:
+            self.models.pop(model, None)
+            if latency is not None:
+                samples = self.latencies.setdefault(model, {}).setdefault(kind, [])
+                samples.append(round(latency, 3))
+                del samples[:-LATENCY_SAMPLES]
+            self._save()
+
+    def hedge_delay(self, model, kind, percentile):
+        """
+        Latency at the given percentile of recent calls of this kind to model, or None until
+        there is enough history (a 20-title call says nothing about a 40-scene script).
+        """
+        with self._lock:
+            samples = sorted(self.latencies.get(model, {}).get(kind, []))
+        if len(samples) < MIN_LATENCY_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * percentile / 100))]
+
+    def record_not_found(self, model):
+        """Model is retired or misnamed: skip it until the model list is refreshed."""
+        self._open(model, self.list_ttl, "not_found")
+
+    def record_rate_limit(self, model, hint=None):
+        """Cools the model down for the hinted delay (or a doubling default). Returns the cooldown."""
+        failures = self.models.get(model, {}).get("failures", 0)
+        cooldown = hint if hint is not None else min(RATE_LIMIT_COOLDOWN * (2 ** failures), MAX_COOLDOWN)
+        self._open(model, cooldown, "rate_limited")
+        return cooldown
+
+    def record_failure(self, model):
+        """Unknown error: the breaker opens after BREAKER_THRESHOLD in a row."""
+        with self._lock:
+            entry = self.models.setdefault(model, {"failures": 0, "until": 0, "reason": "error"})
+            entry["failures"] = entry.get("failures", 0) + 1
+            if entry["failures"] >= BREAKER_THRESHOLD:
+                entry["until"] = time.time() + BREAKER_COOLDOWN
+                entry["reason"] = "error"
+            self._save()
+
+_health = None
+_health_lock = threading.Lock()
+
+def get_model_health():
+    """Process-wide model health table (shared by every LLMWrapper)."""
+    global _health
+    with _health_lock:
+        if _health is None:
+            _health = ModelHealth()
+        return _health
@@ -0,0 +1,141 @@
+"""
+Motion Compiler - Native ffmpeg backend for VideoEditor animations.
+Compiles the editor's animation vocabulary (floating, jumping, bouncing, shaking,
+punchline zoom, waving, slow_zoom_in/out, subtle_pan) into ffmpeg overlay / scale /
+rotate / zoompan / crop expressions, so per-frame pixel work runs in native code
+instead of MoviePy lambdas + PIL resampling.
+"""
+
+import os
+import random
+import subprocess
+
+def hex_to_rgb(bg_color):
+    """'#RRGGBB' -> (r, g, b). Falls back to white like VideoEditor does."""
+    if isinstance(bg_color, str) and bg_color.startswith('#'):
+        hex_val = bg_color.lstrip('#')
+        return tuple(int(hex_val[i:i+2], 16) for i in (0, 2, 4))
+    return (255, 255, 255)
+
+class MotionCompiler:
+    def __init__(self, ffmpeg_path="ffmpeg", fps=24):
+        self.ffmpeg_path = ffmpeg_path
+        self.fps = fps
+
+    def stickman_graph(self, action, is_punchline, duration, target_size, sprite_size, bg_rgb, style="stickman"):
+        """
+        Character centered on a solid background with 3 drifting particles.
+        sprite_size is the character size after the watermark crop + resize to 70% width.
+        Input [0:v] is the looped source image. Output label is [v].
+        """
+        target_w, target_h = target_size
+        sprite_w, sprite_h = sprite_size
+        base_y = target_h / 2 - sprite_h / 2
+
+        # Same motion curves as the MoviePy lambdas, expressed in ffmpeg's expression language
+        y_expr = f"{base_y:.2f}+15*sin(2*PI*0.33*t)"
+        scale_expr = None
+        rotate_expr = None
+
+        if action == 'jumping':
+            # Stretch at the peak, squash at the landing
+            y_expr = f"{base_y:.2f}-abs(150*sin(2*PI*0.8*t))"
+            scale_expr = "1.0+0.1*(abs(sin(2*PI*0.8*t))-0.5)"
+        elif action == 'bouncing':
+            scale_expr = "1.0+0.15*abs(sin(2*PI*0.7*t))"
+        elif action == 'shaking' or is_punchline:
+            intensity = 35 if is_punchline else 8
+            y_expr = f"{base_y:.2f}+{intensity}*(2*random(0)-1)"
+            if is_punchline:
+                # Sudden Zoom Punch
+                scale_expr = "1.15+0.1*sin(2*PI*5*t)"
+        elif action == 'waving':
+            rotate_expr = "5*PI/180*sin(2*PI*0.5*t)"
+
+        # Breathing (slow scaling) on top of everything except bounces/jumps/punchlines
+        if action not in ['bouncing', 'jumping'] and not is_punchline:
+            breathing = "1.0+0.015*sin(2*PI*0.25*t)"
+            scale_expr = breathing if scale_expr is None else f"({scale_expr})*({breathing})"
+
+        sprite = [f"[0:v]crop=iw:ih-trunc(ih*0.08):0:0,scale={sprite_w}:{sprite_h},format=rgba"]
+        if rotate_expr:
+            sprite.append(f"rotate=a='{rotate_expr}':c=none:ow='rotw(5*PI/180)':oh='roth(5*PI/180)'")
+        if scale_expr:
+            sprite.append(
+                f"scale=w='trunc(iw*({scale_expr})/2)*2':h='trunc(ih*({scale_expr})/2)*2':eval=frame"
+            )
+
+        # Transitions: meme style blinks in/out, psych style only fades in
+        if style == "stickman":
+            sprite.append("fade=t=in:st=0:d=0.4")
+            sprite.append(f"fade=t=out:st={max(0.0, duration - 0.4):.3f}:d=0.4")
+        else:
+            sprite.append("fade=t=in:st=0:d=0.2")
+
+        graph = [",".join(sprite) + "[sprite]"]
+
+        # Background: solid vibrant base + 3 minimalist drifting particles (15% white)
+        color_hex = "0x{:02X}{:02X}{:02X}".format(*bg_rgb)
+        graph.append(f"color=c={color_hex}:s={target_w}x{target_h}:r={self.fps}:d={duration:.3f}[bg0]")
+        for p_idx in range(3):
+            p_size = random.randint(3, 8)
+            start_x = random.randint(0, target_w)
+            start_y = random.randint(0, target_h)
+            speed_x = random.uniform(-15, 15)
+            speed_y = random.uniform(-15, 15)
+            graph.append(f"color=c=white@0.15:s={p_size}x{p_size}:r={self.fps}:d={duration:.3f},format=rgba[p{p_idx}]")
+            graph.append(
+                f"[bg{p_idx}][p{p_idx}]overlay=x='{start_x}+{speed_x:.2f}*t':y='{start_y}+{speed_y:.2f}*t'"
+                f":eval=frame:shortest=1[bg{p_idx + 1}]"
+            )
+
+        graph.append(
+            f"[bg3][sprite]overlay=x='(main_w-overlay_w)/2':y='{y_expr}':eval=frame:shortest=1,format=yuv420p[v]"
+        )
+        return ";".join(graph)
+
+    def noir_graph(self, anim_type, duration, target_size, is_short):
+        """
+        Cinematic slow zoom / pan over an oversized center crop.
+        zoom_in/zoom_out expect a single (non-looped) input frame, subtle_pan a looped one.
+        """
+        target_w, target_h = target_size
+        frames = max(1, int(round(duration * self.fps)))
+
+        # Ensure we have enough resolution to crop/move (1.2x), then center crop to 1.1x
+        base = "crop=iw:ih-trunc(ih*0.08):0:0,"
+        base += f"scale=-2:{int(target_h * 1.2)}," if is_short else f"scale={int(target_w * 1.2)}:-2,"
+        base += f"crop=min(iw\\,{int(target_w * 1.1)}):min(ih\\,{int(target_h * 1.1)})"
+
+        # zoompan shows an iw/zoom window: a 1.1x crop scaled by s(t) then cut to target == zoom 1.1*s(t)
+        center = "x='iw/2-(iw/zoom/2)':y='ih/2-(ih/zoom/2)'"
+        if anim_type == 'slow_zoom_in':
+            motion = f"zoompan=z='1.1*(1.0+0.05*on/{frames})':{center}:d={frames}:s={target_w}x{target_h}:fps={self.fps}"
+        elif anim_type == 'slow_zoom_out':
+            motion = f"zoompan=z='1.1*(1.1-0.05*on/{frames})':{center}:d={frames}:s={target_w}x{target_h}:fps={self.fps}"
+        else: # subtle_pan
+            motion = (
+                f"crop={target_w}:{target_h}:x='(iw-{target_w})/2+0.05*{target_w}*t/{duration:.3f}':y='(ih-{target_h})/2'"
+            )
+        return f"[0:v]{base},{motion},setsar=1,format=yuv420p[v]"
+
+    def render(self, image_path, filter_complex, duration, output_path, loop_input=True, timeout=300):
+        """Renders a silent motion clip for one scene. Returns output_path."""
+        inputs = ['-i', image_path]
+        if loop_input:
+            inputs = ['-loop', '1', '-framerate', str(self.fps), '-t', f"{duration:.3f}"] + inputs
+
+        cmd = [self.ffmpeg_path, '-y'] + inputs + [
+            '-filter_complex', filter_complex,
+            '-map', '[v]',
+            '-t', f"{duration:.3f}",
+            '-r', str(self.fps),
+            # Intermediate clip: fast and near-lossless, MoviePy re-encodes the final cut
+            '-c:v', 'libx264', '-preset', 'veryfast', '-crf', '16', '-pix_fmt', 'yuv420p',
+            '-an',
+            output_path
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        if result.returncode != 0 or not os.path.exists(output_path):
+            raise RuntimeError(f"FFmpeg motion render failed: {result.stderr[-1000:]}")
+        return output_path
@@ -0,0 +1,32 @@
+import time
+import asyncio
+
+class TokenBucket:
+    """
+    Async token bucket: `rate` requests per second with bursts of up to `capacity`.
+    """
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def try_acquire(self):
+        if self.rate <= 0:
+            return True # Unlimited
+        self._refill()
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+    async def acquire(self):
+        """Waits until a token is available."""
+        while not self.try_acquire():
+            await asyncio.sleep((1 - self.tokens) / self.rate)
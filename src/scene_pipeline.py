@@ -0,0 +1,89 @@
+import asyncio
+import logging
+from .config import Config
+from .utils import ensure_dir_exists
+
+logger = logging.getLogger(__name__)
+
+class ScenePipeline:
+    """
+    Produces the audio + visual assets for every scene of a script concurrently.
+    TTS limits live on the VoiceEngine (per provider), image limits live here.
+    """
+
+    def __init__(self, voice, asset_mgr, image_concurrency=None):
+        self.voice = voice
+        self.asset_mgr = asset_mgr
+        self.image_limit = asyncio.Semaphore(image_concurrency or Config.IMAGE_CONCURRENCY)
+
+    async def _generate_image(self, i, scene, orientation):
+        # Save visuals in persistent assets folder for tracking
+        video_path = f"assets/visuals/visual_{i}.jpg"
+        prompt = scene.get('visual_prompt', scene.get('text'))
+
+        async with self.image_limit:
+            logger.info(f"Generating Image for scene {i+1} with prompt: {prompt}")
+            # AssetManager uses blocking requests; run it in a worker thread
+            success = await asyncio.to_thread(self.asset_mgr.generate_image, prompt, video_path, orientation=orientation)
+
+        if not success:
+            logger.warning(f"Image generation failed for scene {i+1}. VideoEditor will use fallback visual.")
+            return None
+        return video_path
+
+    async def run(self, scenes, orientation="landscape", audio_kwargs=None):
+        """Returns processed scenes in script order, ready for VideoEditor.create_video."""
+        ensure_dir_exists("temp")
+        ensure_dir_exists("assets/visuals")
+        audio_kwargs = audio_kwargs or {}
+
+        logger.info(f"Processing {len(scenes)} scenes concurrently...")
+        # All narration goes out as one rate-limited batch while the images render
+        audio_task = self.voice.generate_batch(scenes, audio_dir="temp", **audio_kwargs)
+        image_tasks = [self._generate_image(i, scene, orientation) for i, scene in enumerate(scenes)]
+        # gather() keeps results in submission order regardless of completion order
+        audio_results, *video_paths = await asyncio.gather(audio_task, *image_tasks)
+
+        return [self._processed(i, scene, audio, video_path)
+                for i, (scene, audio, video_path) in enumerate(zip(scenes, audio_results, video_paths))]
+
+    async def run_stream(self, scene_stream, orientation="landscape", audio_kwargs=None):
+        """
+        Like run(), but takes an async iterator of scenes (e.g. LLMWrapper's ScriptStream) and
+        starts each scene's TTS and image the moment it arrives, while later scenes are still
+        being written. Returns processed scenes in script order once the stream is exhausted.
+        """
+        ensure_dir_exists("temp")
+        ensure_dir_exists("assets/visuals")
+        audio_kwargs = audio_kwargs or {}
+
+        scenes, tasks = [], []
+        try:
+            async for scene in scene_stream:
+                i = len(scenes)
+                logger.info(f"Scene {i+1} received from the script stream, starting assets...")
+                scenes.append(scene)
+                tasks.append(asyncio.gather(
+                    self.voice.synthesize_scene(i, scene, audio_dir="temp", **audio_kwargs),
+                    self._generate_image(i, scene, orientation)
+                ))
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        results = await asyncio.gather(*tasks)
+        self.voice.report_batch([audio for audio, _ in results])
+        return [self._processed(i, scene, audio, video_path)
+                for i, (scene, (audio, video_path)) in enumerate(zip(scenes, results))]
+
+    def _processed(self, i, scene, audio, video_path):
+        logger.info(f"Scene {i+1} assets ready ({audio['provider'] or 'no'} audio).")
+        return {
+            # A failed synthesis keeps the expected path so the editor's own fallback kicks in
+            'audio_path': audio['audio_path'] or f"temp/audio_{i}.mp3",
+            'video_path': video_path,
+            'text': scene['text'],
+            'is_punchline': scene.get('is_punchline', False),
+            'duration': audio['duration'], # Measured at synthesis time
+            'provider': audio['provider']
+        }
@@ -0,0 +1,100 @@
+"""
+Silence Trim - In-process replacement for ffmpeg's silenceremove on TTS clips.
+The clip is decoded once to PCM, pauses are found with vectorized RMS windows,
+and the kept spans are written as a lossless WAV (no second MP3 encode). Word
+timings are remapped onto the trimmed timeline so captions stay in sync.
+"""
+
+import os
+import wave
+import subprocess
+import numpy as np
+
+SAMPLE_RATE = 44100
+
+def _ffmpeg_binary():
+    try:
+        from moviepy.config import get_setting
+        return get_setting("FFMPEG_BINARY")
+    except Exception:
+        return "ffmpeg"
+
+def decode_pcm(path, sample_rate=SAMPLE_RATE):
+    """Decodes any audio file to mono int16 PCM."""
+    cmd = [_ffmpeg_binary(), '-v', 'error', '-i', path, '-f', 's16le', '-ac', '1', '-ar', str(sample_rate), '-']
+    result = subprocess.run(cmd, capture_output=True, check=True)
+    return np.frombuffer(result.stdout, dtype=np.int16)
+
+def write_wav(path, pcm, sample_rate=SAMPLE_RATE):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(sample_rate)
+        f.writeframes(pcm.tobytes())
+    return path
+
+def find_silences(pcm, sample_rate=SAMPLE_RATE, threshold_db=-30.0, min_silence=0.2, window=0.01):
+    """Returns [(start_sample, end_sample)] for every pause quieter than threshold_db lasting min_silence+."""
+    win = max(1, int(sample_rate * window))
+    n_win = len(pcm) // win
+    if n_win == 0:
+        return []
+    frames = pcm[:n_win * win].reshape(n_win, win).astype(np.float32) / 32768.0
+    rms_db = 10 * np.log10(np.mean(frames * frames, axis=1) + 1e-12)
+    silent = np.concatenate(([0], (rms_db < threshold_db).astype(np.int8), [0]))
+    edges = np.flatnonzero(np.diff(silent))
+    starts, ends = edges[0::2], edges[1::2]
+    long_enough = (ends - starts) * win >= int(min_silence * sample_rate)
+    return [(int(s) * win, min(int(e) * win, len(pcm))) for s, e in zip(starts[long_enough], ends[long_enough])]
+
+def trim_pcm(pcm, sample_rate=SAMPLE_RATE, threshold_db=-30.0, min_silence=0.2, keep=0.04):
+    """
+    Drops long pauses, leaving `keep` seconds on each side of a cut so words do not click
+    together. Returns (trimmed_pcm, spans) where spans are (src_start, src_end, dst_start) seconds.
+    """
+    pad = int(keep * sample_rate)
+    kept, pos = [], 0
+    for start, end in find_silences(pcm, sample_rate, threshold_db, min_silence):
+        cut_start, cut_end = start + pad if start > 0 else 0, end - pad if end < len(pcm) else len(pcm)
+        if cut_end <= cut_start:
+            continue
+        if cut_start > pos:
+            kept.append((pos, cut_start))
+        pos = cut_end
+    if pos < len(pcm):
+        kept.append((pos, len(pcm)))
+    if not kept:
+        return pcm, [(0.0, len(pcm) / sample_rate, 0.0)]
+
+    trimmed = np.concatenate([pcm[a:b] for a, b in kept])
+    spans, dst = [], 0
+    for a, b in kept:
+        spans.append((a / sample_rate, b / sample_rate, dst / sample_rate))
+        dst += b - a
+    return trimmed, spans
+
+def remap_time(t, spans):
+    """Maps a time on the original clip onto the trimmed one (removed pauses collapse to the cut)."""
+    for src_start, src_end, dst_start in spans:
+        if t < src_start:
+            return dst_start
+        if t <= src_end:
+            return dst_start + (t - src_start)
+    src_start, src_end, dst_start = spans[-1]
+    return dst_start + (src_end - src_start)
+
+def remap_words(words, spans):
+    return [dict(w, start=remap_time(w["start"], spans), end=remap_time(w["end"], spans)) for w in words or []]
+
+def trim_audio_file(path, words=None, output_path=None, **params):
+    """
+    Trims pauses from an audio file in process. Returns (wav_path, remapped_words).
+    The WAV goes next to the source unless output_path is given.
+    """
+    pcm = decode_pcm(path)
+    trimmed, spans = trim_pcm(pcm, **params)
+    output_path = output_path or os.path.splitext(path)[0] + ".wav"
+    write_wav(output_path, trimmed)
+    removed = (len(pcm) - len(trimmed)) / SAMPLE_RATE
+    print(f"  [AUDIO] Trimmed {removed:.2f}s of silence -> {output_path}")
+    return output_path, remap_words(words, spans)
@@ -0,0 +1,210 @@
+"""
+Telemetry - Lightweight span/timer API for the generation pipeline.
+Each stage runs inside a span that records wall time, CPU time (ours and ffmpeg
+children), retries, bytes transferred and peak memory. CPU and RSS figures are
+process-wide counters read at the span's start and end, not per-stage: a stage
+that overlaps others (TTS and asset tasks, to_thread workers) is charged their
+work too, and peak RSS is the process high-water mark. Spans nest through a
+contextvar, so they follow asyncio tasks and to_thread workers. At the end of a
+run the tracer writes one structured JSON trace file.
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import asyncio
+import functools
+import threading
+import contextvars
+
+try:
+    import resource
+except ImportError: # Windows
+    resource = None
+
+TELEMETRY_DIR = os.getenv("TELEMETRY_DIR", "output/traces")
+TELEMETRY_ENABLED = os.getenv("TELEMETRY_ENABLED", "1") != "0"
+
+_current_span = contextvars.ContextVar("telemetry_span", default=None)
+
+def _rusage():
+    """(own cpu, children cpu, peak rss MB) for this process, or Nones where unsupported."""
+    own_cpu = time.process_time()
+    if resource is None:
+        return own_cpu, None, None
+    children = resource.getrusage(resource.RUSAGE_CHILDREN)
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_mb = peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+    return own_cpu, children.ru_utime + children.ru_stime, peak_mb
+
+class Span:
+    """
+    One timed stage. wall_s is the stage's own; cpu_s, child_cpu_s and peak_rss_mb are
+    process-wide deltas/peaks over its lifetime, so concurrent stages share them.
+    """
+
+    def __init__(self, name, parent=None, **attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.name = name
+        self.parent_id = parent.id if parent else None
+        self.attrs = attrs
+        self.retries = 0
+        self.bytes = 0
+        self.status = "ok"
+        self.error = None
+        self._lock = threading.Lock()
+        self.started_at = time.time()
+        self._start_wall = time.perf_counter()
+        self._start_cpu, self._start_child_cpu, self._start_peak = _rusage()
+        self.record = None
+
+    def add_retry(self, n=1):
+        with self._lock:
+            self.retries += n
+
+    def add_bytes(self, n):
+        with self._lock:
+            self.bytes += int(n or 0)
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self, error=None):
+        cpu, child_cpu, peak = _rusage()
+        if error is not None:
+            self.status = "error"
+            self.error = f"{type(error).__name__}: {error}"[:300]
+        self.record = {
+            "id": self.id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "started_at": round(self.started_at, 3),
+            "wall_s": round(time.perf_counter() - self._start_wall, 4),
+            # Process-wide: concurrent stages share these counters
+            "cpu_s": round(cpu - self._start_cpu, 4),
+            "child_cpu_s": round(child_cpu - self._start_child_cpu, 4) if child_cpu is not None else None,
+            "peak_rss_mb": round(peak, 1) if peak is not None else None,
+            "peak_rss_growth_mb": round(peak - self._start_peak, 1) if peak is not None else None,
+            "retries": self.retries,
+            "bytes": self.bytes,
+            "status": self.status,
+            "error": self.error,
+            "attrs": self.attrs
+        }
+        return self.record
+
+class _NullSpan:
+    """Stand-in when telemetry is disabled or no span is active."""
+    id = None
+    def add_retry(self, n=1): pass
+    def add_bytes(self, n): pass
+    def set(self, **attrs): pass
+
+NULL_SPAN = _NullSpan()
+
+class _SpanContext:
+    def __init__(self, tracer, name, attrs):
+        self.tracer = tracer
+        self.name = name
+        self.attrs = attrs
+        self.span = None
+        self.token = None
+
+    def __enter__(self):
+        if not self.tracer.enabled:
+            return NULL_SPAN
+        self.span = Span(self.name, parent=_current_span.get(), **self.attrs)
+        self.token = _current_span.set(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        if self.span is None:
+            return False
+        _current_span.reset(self.token)
+        self.tracer._record(self.span.finish(exc))
+        return False
+
+class Tracer:
+    def __init__(self, enabled=TELEMETRY_ENABLED):
+        self.enabled = enabled
+        self.run_id = time.strftime("%Y%m%d_%H%M%S") + "_" + uuid.uuid4().hex[:6]
+        self.started_at = time.time()
+        self.records = []
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def span(self, name, **attrs):
+        """with tracer.span("tts", provider="edge") as s: ...  (works in sync and async code)"""
+        return _SpanContext(self, name, attrs)
+
+    def _record(self, record):
+        with self._lock:
+            self.records.append(record)
+
+    def incr(self, name, n=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        """Totals per span name, so the trace can be read at a glance."""
+        totals = {}
+        for r in self.records:
+            t = totals.setdefault(r["name"], {"count": 0, "wall_s": 0.0, "cpu_s": 0.0, "retries": 0, "bytes": 0, "errors": 0})
+            t["count"] += 1
+            t["wall_s"] = round(t["wall_s"] + r["wall_s"], 4)
+            t["cpu_s"] = round(t["cpu_s"] + r["cpu_s"], 4)
+            t["retries"] += r["retries"]
+            t["bytes"] += r["bytes"]
+            t["errors"] += r["status"] == "error"
+        return totals
+
+    def write(self, path=None):
+        """Writes the trace file. Returns its path (None when disabled or empty)."""
+        if not self.enabled or not self.records:
+            return None
+        path = path or os.path.join(TELEMETRY_DIR, f"trace_{self.run_id}.json")
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        _, _, peak = _rusage()
+        with self._lock:
+            trace = {
+                "run_id": self.run_id,
+                "started_at": round(self.started_at, 3),
+                "total_wall_s": round(time.time() - self.started_at, 3),
+                "peak_rss_mb": round(peak, 1) if peak is not None else None,
+                "counters": dict(self.counters),
+                "summary": self.summary(),
+                "spans": sorted(self.records, key=lambda r: r["started_at"])
+            }
+        with open(path, "w") as f:
+            json.dump(trace, f, indent=2, default=str)
+        print(f"[TELEMETRY] Trace written to {path}")
+        return path
+
+tracer = Tracer()
+
+def span(name, **attrs):
+    return tracer.span(name, **attrs)
+
+def current_span():
+    """The innermost active span (a no-op stand-in outside of any span)."""
+    return _current_span.get() or NULL_SPAN
+
+def traced(name=None):
+    """Decorator that runs a sync or async function inside a span."""
+    def decorator(func):
+        span_name = name or func.__qualname__
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with tracer.span(span_name):
+                    return await func(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with tracer.span(span_name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,232 @@
+import os
+import sys
+import json
+import uuid
+import shutil
+import tempfile
+import threading
+from urllib.parse import parse_qs, unquote
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Offline checks for VoiceCloneSession against a stand-in gradio space: a local HTTP
+# server speaks the gradio API (config, info, upload, queue, file=) and a real
+# gradio_client Client talks to it.
+# Run from the repo root: python -m src.test_cloning_mock
+
+try:
+    from .cloning_engine import VoiceCloneSession, _default_client
+    from .file_cache import FileCache
+except ImportError:
+    from src.cloning_engine import VoiceCloneSession, _default_client
+    from src.file_cache import FileCache
+
+SPACE_PATH = "/xtts-v2/"
+API = SPACE_PATH + "gradio_api/"
+FILE_DATA = {"type": "object", "properties": {"path": {"type": "string"},
+                                              "meta": {"properties": {"_type": {"const": "gradio.FileData"}}}}}
+INPUTS = [("text", "textbox", {"type": "string"}), ("language", "dropdown", {"type": "string"}),
+          ("speaker_wav", "audio", FILE_DATA), ("mic_wav", "audio", FILE_DATA),
+          ("agree", "checkbox", {"type": "boolean"}), ("split", "checkbox", {"type": "boolean"})]
+CONFIG = {
+    "version": "5.9.1",
+    "protocol": "sse_v3",
+    "api_prefix": "/gradio_api",
+    "connect_heartbeat": False,
+    "components": [{"id": i + 1, "type": kind, "props": {}, "api_info": info} for i, (_, kind, info) in enumerate(INPUTS)]
+                  + [{"id": 7, "type": "audio", "props": {}, "api_info": FILE_DATA}],
+    "dependencies": [{"id": 0, "api_name": "predict", "inputs": [1, 2, 3, 4, 5, 6], "outputs": [7],
+                      "backend_fn": True, "queue": True}],
+}
+INFO = {
+    "named_endpoints": {"/predict": {
+        "parameters": [{"parameter_name": name, "parameter_has_default": False, "component": kind.title(), "type": info}
+                       for name, kind, info in INPUTS],
+        "returns": [{"component": "Audio", "type": FILE_DATA}],
+    }},
+    "unnamed_endpoints": {},
+}
+
+class MockGradioSpace(BaseHTTPRequestHandler):
+    """
+    An XTTS-like gradio 5 space. Like a real server it only accepts file inputs that
+    are FileData with meta and point at something uploaded to it (by server path, or
+    by its own file= URL, which it fetches), and keeps uploads in paths that do not
+    exist on the client's machine.
+    """
+    files = {}       # server path -> bytes
+    uploads = []     # server paths, in upload order
+    downloads = 0    # file= fetches of uploaded samples
+    predicts = []    # (text, server path of the reference sample)
+    events = {}      # session hash -> [(event id, message)]
+    cond = threading.Condition()
+
+    @classmethod
+    def reset(cls):
+        cls.files, cls.uploads, cls.downloads, cls.predicts, cls.events = {}, [], 0, [], {}
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, body, content_type="application/json", status=200):
+        body = json.dumps(body).encode() if content_type == "application/json" else body
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        path, _, query = self.path.partition("?")
+        if path == SPACE_PATH + "config":
+            self._send(CONFIG)
+        elif path == API + "info":
+            self._send(INFO)
+        elif path.startswith(API + "file="):
+            server_path = unquote(path[len(API + "file="):])
+            if server_path not in self.files:
+                return self._send({"detail": "Not Found"}, status=404)
+            if server_path in self.uploads:
+                MockGradioSpace.downloads += 1
+            self._send(self.files[server_path], "audio/wav")
+        elif path == API + "queue/data":
+            session = parse_qs(query)["session_hash"][0]
+            with self.cond:
+                self.cond.wait_for(lambda: self.events.get(session), timeout=10)
+                events = self.events.pop(session, [])
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for event_id, message in events:
+                self.wfile.write(f"data: {json.dumps(dict(message, event_id=event_id))}\n\n".encode())
+            self.wfile.write(b'data: {"msg": "close_stream"}\n\n')
+        else:
+            self._send({"detail": "Not Found"}, status=404)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"]))
+        path = self.path.partition("?")[0]
+        if path == API + "upload":
+            server_path = f"/home/user/app/gradio_cache/upload_{len(self.uploads) + 1}/voice_sample.wav"
+            MockGradioSpace.files[server_path] = body
+            MockGradioSpace.uploads.append(server_path)
+            self._send([server_path])
+        elif path == API + "queue/join":
+            payload = json.loads(body)
+            event_id = uuid.uuid4().hex
+            with self.cond:
+                self.events.setdefault(payload["session_hash"], []).append((event_id, self._predict(payload["data"])))
+                self.cond.notify_all()
+            self._send({"event_id": event_id})
+        else:
+            self._send({"detail": "Not Found"}, status=404)
+
+    def _reference(self, value):
+        """Server path of a file input, as gradio's own checks would resolve it, or None."""
+        if not (isinstance(value, dict) and (value.get("meta") or {}).get("_type") == "gradio.FileData"):
+            return None
+        path = value.get("path", "")
+        own_url = f"http://{self.headers['Host']}{API}file="
+        if path.startswith(own_url):
+            path = unquote(path[len(own_url):])
+            MockGradioSpace.downloads += 1
+        return path if path in self.uploads else None
+
+    def _predict(self, data):
+        reference = self._reference(data[2])
+        if reference is None or self._reference(data[3]) is None:
+            return {"msg": "process_completed", "success": False,
+                    "output": {"error": f"File {data[2]} is not in the cache folder and cannot be accessed."}}
+        MockGradioSpace.predicts.append((data[0], reference))
+        out = f"/tmp/gradio/output_{len(self.predicts)}/audio.wav"
+        MockGradioSpace.files[out] = b"RIFF" + data[0].encode()
+        return {"msg": "process_completed", "success": True,
+                "output": {"data": [{"path": out, "orig_name": "audio.wav", "meta": {"_type": "gradio.FileData"}}]}}
+
+def _serve():
+    MockGradioSpace.reset()
+    server = ThreadingHTTPServer(("127.0.0.1", 0), MockGradioSpace)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}{SPACE_PATH}"
+
+def _reference_sample(workdir, content=b"RIFF-reference-v1"):
+    reference = os.path.join(workdir, "voice_sample.wav")
+    with open(reference, "wb") as f:
+        f.write(content)
+    return reference
+
+def test_clone_session():
+    print("\n--- Testing persistent client, one-time upload and clone cache ---")
+    server, space = _serve()
+    workdir = tempfile.mkdtemp(prefix="clone_mock_")
+    clients = []
+
+    def factory(space):
+        client = _default_client(space)
+        client.output_dir = workdir # Keep downloaded outputs out of the shared gradio temp dir
+        clients.append(client)
+        return client
+
+    try:
+        reference = _reference_sample(workdir)
+        cache = FileCache(os.path.join(workdir, "cache"), 10 * 1024 * 1024, suffix=".mp3")
+        session = VoiceCloneSession(spaces=[space], client_factory=factory, cache=cache)
+
+        for i, text in enumerate(["First line.", "Second line.", "Third line."]):
+            out = os.path.join(workdir, f"out_{i}.mp3")
+            ok = session.clone(text, out, reference) == out and open(out, "rb").read() == b"RIFF" + text.encode()
+            assert ok, f"clone {i} failed"
+        uploads, predicts = MockGradioSpace.uploads, MockGradioSpace.predicts
+        ok = len(clients) == 1 and len(uploads) == 1 and len(predicts) == 3
+        print(f"Clients: {len(clients)}, uploads: {len(uploads)}, predicts: {len(predicts)} -> {'PASS' if ok else 'FAIL'}")
+        assert ok
+
+        ok = {ref for _, ref in predicts} == {uploads[0]} and MockGradioSpace.files[uploads[0]].find(b"RIFF-reference-v1") >= 0
+        print(f"Predict reused the uploaded sample: {'PASS' if ok else 'FAIL'}")
+        assert ok
+
+        out = os.path.join(workdir, "repeat.mp3")
+        session.clone("Second line.", out, reference)
+        ok = len(predicts) == 3 and open(out, "rb").read() == b"RIFFSecond line."
+        print(f"Repeated text served from cache: {'PASS' if ok else 'FAIL'}")
+        assert ok
+
+        _reference_sample(workdir, b"RIFF-reference-v2")
+        session.clone("Second line.", out, reference)
+        ok = len(predicts) == 4 and len(uploads) == 2 and predicts[-1][1] == uploads[1]
+        print(f"New reference sample re-uploads and re-clones: {'PASS' if ok else 'FAIL'}")
+        assert ok
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def test_private_space_uploads_directly():
+    print("\n--- Testing a private space (gradio_client re-uploads server files for those) ---")
+    server, space = _serve()
+    workdir = tempfile.mkdtemp(prefix="clone_mock_")
+
+    def factory(space):
+        client = _default_client(space)
+        client.output_dir = workdir
+        client._space_is_private = True # What huggingface_hub reports for a private space
+        return client
+
+    try:
+        reference = _reference_sample(workdir)
+        cache = FileCache(os.path.join(workdir, "cache"), 10 * 1024 * 1024, suffix=".mp3")
+        session = VoiceCloneSession(spaces=[space], client_factory=factory, cache=cache)
+        for i, text in enumerate(["First line.", "Second line."]):
+            out = os.path.join(workdir, f"out_{i}.mp3")
+            assert session.clone(text, out, reference) == out, f"clone {i} failed"
+        # The client uploads each file input itself; nothing is pre-uploaded and fetched back
+        ok = len(MockGradioSpace.predicts) == 2 and len(MockGradioSpace.uploads) == 4 and MockGradioSpace.downloads == 0
+        print(f"Uploads: {len(MockGradioSpace.uploads)}, sample downloads: {MockGradioSpace.downloads} -> {'PASS' if ok else 'FAIL'}")
+        assert ok
+    finally:
+        server.shutdown()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    test_clone_session()
+    test_private_space_uploads_directly()
+    print("\nAll voice cloning mock tests passed.")
+    sys.exit(0)
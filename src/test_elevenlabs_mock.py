@@ -0,0 +1,132 @@
+import os
+import sys
+import json
+import time
+import shutil
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Offline checks for ElevenLabsEngine against a local mock of the ElevenLabs API.
+# Run from the repo root: python -m src.test_elevenlabs_mock
+
+os.environ["ELEVENLABS_API_KEY"] = "test-key"
+os.environ["ELEVENLABS_VOICE_ID"] = "test-voice"
+
+try:
+    from .elevenlabs_engine import ElevenLabsEngine
+except ImportError:
+    from src.elevenlabs_engine import ElevenLabsEngine
+
+AUDIO_CHUNK = b"\xff\xf3\x64\xc4" + b"\x00" * 1020
+
+class MockElevenLabs(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1" # Keep-alive, like the real API
+    character_limit = 10000
+    posts = []
+    client_ports = set()
+
+    def log_message(self, *args):
+        pass
+
+    def _send(self, status, body, content_type="application/json"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        MockElevenLabs.client_ports.add(self.client_address[1])
+        if self.path == "/v1/user/subscription":
+            body = {"character_count": 0, "character_limit": MockElevenLabs.character_limit}
+            self._send(200, json.dumps(body).encode())
+        else:
+            self._send(404, b"{}")
+
+    def do_POST(self):
+        MockElevenLabs.client_ports.add(self.client_address[1])
+        data = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        MockElevenLabs.posts.append(data["text"])
+        if not self.path.endswith("/stream"):
+            self._send(404, b"{}")
+            return
+        if self.headers.get("xi-api-key") != "test-key":
+            self._send(401, b'{"detail": "invalid api key"}')
+            return
+        time.sleep(0.3) # Long enough for concurrent duplicates to overlap
+        self._send(200, AUDIO_CHUNK * 8, content_type="audio/mpeg")
+
+_server = None
+
+def mock_url():
+    """Starts the mock API once per process and returns its base URL."""
+    global _server
+    if _server is None:
+        _server = ThreadingHTTPServer(("127.0.0.1", 0), MockElevenLabs)
+        threading.Thread(target=_server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{_server.server_address[1]}"
+
+def reset(limit=10000):
+    MockElevenLabs.character_limit = limit
+    MockElevenLabs.posts = []
+    MockElevenLabs.client_ports = set()
+
+def test_streaming_and_keep_alive():
+    print("\n--- Testing streamed download over one pooled connection ---")
+    reset()
+    workdir = tempfile.mkdtemp(prefix="elevenlabs_mock_")
+    engine = ElevenLabsEngine(base_url=mock_url())
+    paths = [os.path.join(workdir, f"stream_{i}.mp3") for i in range(3)]
+    results = [engine.generate_audio(f"Sentence number {i}.", p) for i, p in enumerate(paths)]
+    ok = all(r == p for r, p in zip(results, paths))
+    ok = ok and all(os.path.getsize(p) == len(AUDIO_CHUNK) * 8 for p in paths)
+    ok = ok and not any(os.path.exists(p + ".part") for p in paths)
+    print(f"Files: {'PASS' if ok else 'FAIL'}")
+    # Subscription GET + 3 POSTs should all reuse the same socket
+    reused = len(MockElevenLabs.client_ports) == 1
+    print(f"Keep-alive ({len(MockElevenLabs.client_ports)} connection(s)): {'PASS' if reused else 'FAIL'}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    assert ok and reused
+
+def test_coalescing():
+    print("\n--- Testing coalescing of identical in-flight requests ---")
+    reset()
+    workdir = tempfile.mkdtemp(prefix="elevenlabs_mock_")
+    engine = ElevenLabsEngine(base_url=mock_url())
+    paths = [os.path.join(workdir, f"dup_{i}.mp3") for i in range(4)]
+    threads = [threading.Thread(target=engine.generate_audio, args=("Same line for everyone.", p)) for p in paths]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    ok = MockElevenLabs.posts.count("Same line for everyone.") == 1
+    ok = ok and all(os.path.exists(p) and os.path.getsize(p) == len(AUDIO_CHUNK) * 8 for p in paths)
+    print(f"API calls: {len(MockElevenLabs.posts)} (Expected 1) -> {'PASS' if ok else 'FAIL'}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    assert ok
+
+def test_character_budget():
+    print("\n--- Testing character budget switch-over ---")
+    reset(limit=260) # Default reserve is 200 chars, so only ~60 are usable
+    workdir = tempfile.mkdtemp(prefix="elevenlabs_mock_")
+    engine = ElevenLabsEngine(base_url=mock_url())
+    first = engine.generate_audio("x" * 40, os.path.join(workdir, "budget_0.mp3"))
+    second = engine.generate_audio("y" * 40, os.path.join(workdir, "budget_1.mp3"))
+    ok = bool(first) and second is False and len(MockElevenLabs.posts) == 1 and engine.budget.exhausted
+    print(f"Second call refused before hitting the API: {'PASS' if ok else 'FAIL'}")
+    shutil.rmtree(workdir, ignore_errors=True)
+    assert ok
+
+def main():
+    try:
+        test_streaming_and_keep_alive()
+        test_coalescing()
+        test_character_budget()
+        print("\nAll ElevenLabs mock tests passed.")
+    finally:
+        if _server:
+            _server.shutdown()
+
+if __name__ == "__main__":
+    sys.exit(main())
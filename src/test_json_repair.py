@@ -0,0 +1,138 @@
+import sys
+import json
+
+# Offline checks for the JSON repair / schema layer and the streamed scenes parser.
+# Run from the repo root: python -m src.test_json_repair (or pytest src/test_json_repair.py)
+
+try:
+    from .json_repair import repair_json, validate, join_continuation
+    from .json_stream import ScenesStreamParser
+except ImportError:
+    from src.json_repair import repair_json, validate, join_continuation
+    from src.json_stream import ScenesStreamParser
+
+def _scenes(n):
+    return [{"text": f"Scene {i}.", "visual_prompt": f"ink wash {i}"} for i in range(n)]
+
+def test_repair_clean_and_fenced():
+    print("\n--- Testing repair_json on clean and fenced answers ---")
+    assert repair_json('{"a": 1}') == ({"a": 1}, [], False)
+    value, repairs, truncated = repair_json('Sure!\n```json\n{"a": [1, 2]}\n```\nHope this helps.')
+    assert value == {"a": [1, 2]} and repairs == ["trailing_text"] and not truncated
+    assert repair_json("no json here") == (None, [], False)
+    assert repair_json("") == (None, [], False)
+    print("Result: PASS")
+
+def test_repair_defects():
+    print("\n--- Testing repair_json on common defects ---")
+    cases = [
+        ('{"a": 1, // note\n "b": 2 /* c */}', {"a": 1, "b": 2}, "comment"),
+        ('{"a": [1, 2,], "b": 3,}', {"a": [1, 2], "b": 3}, "trailing_comma"),
+        ('{"a": [1, 2 3] "b": "x" "c": true}', {"a": [1, 2, 3], "b": "x", "c": True}, "missing_comma"),
+        ('{"t": "line1\nline2"}', {"t": "line1\nline2"}, "newline_in_string"),
+        ('{"title": "T", "scenes": [{"text": "A"}, {"text": "B"}}', {"title": "T", "scenes": [{"text": "A"}, {"text": "B"}]}, "missing_bracket"),
+        ('{"a": [1]]}', {"a": [1]}, "stray_bracket"),
+        ('{"t": "he said \\"hi\\"",}', {"t": 'he said "hi"'}, "trailing_comma"),
+    ]
+    for text, expected, kind in cases:
+        value, repairs, truncated = repair_json(text)
+        ok = value == expected and kind in repairs and not truncated
+        print(f"{kind}: {'PASS' if ok else 'FAIL'} ({value}, {repairs}, truncated={truncated})")
+        assert ok
+
+def test_repair_truncated():
+    print("\n--- Testing repair_json on cut-off answers ---")
+    cases = [
+        ('{"title": "T", "scenes": [{"text": "A", "visual_prompt": "v"}, {"text": "B", "visual_prompt": "ha',
+         {"title": "T", "scenes": [{"text": "A", "visual_prompt": "v"}, {"text": "B"}]}),
+        ('{"title": "T", "scenes": [{"text": "A"}], "music_mood":', {"title": "T", "scenes": [{"text": "A"}]}),
+        ('["A", "B", "C', ["A", "B"]),
+    ]
+    for text, expected in cases:
+        value, repairs, truncated = repair_json(text)
+        ok = value == expected and truncated and "truncated" in repairs
+        print(f"{text[-20:]!r}: {'PASS' if ok else 'FAIL'} ({value})")
+        assert ok
+
+def test_validate():
+    print("\n--- Testing validate ---")
+    data = {
+        "title": "",
+        "music_mood": "weird",
+        "scenes": [{"text": "A", "vocal_action": "flying", "audio_mood": "serious"}, {"text": ""}, "junk", {"text": "B"}, {"text": 3}],
+    }
+    value, problems = validate(data, "psychology_stickman_script", {"title": "Topic"})
+    assert value["title"] == "Topic" and value["music_mood"] == "chill" and value["description"] == ""
+    assert [s["text"] for s in value["scenes"]] == ["A", "B", "3"]
+    assert value["scenes"][0] == {"text": "A", "vocal_action": "talking", "audio_mood": "serious"}
+    assert {"title", "music_mood", "scenes"} <= set(problems)
+
+    value, problems = validate({"title": "T", "tags": "a, b", "scenes": _scenes(5)}, "psychology_script")
+    assert value["tags"] == ["a", "b"] and value["music_mood"] == "dark" and problems == []
+
+    value, problems = validate({"title": "T", "scenes": _scenes(2)}, "psychology_script")
+    assert value is None and "min_scenes" in problems
+    assert validate({"scenes": _scenes(5)}, "psychology_script")[0] is None
+    assert validate(["x"], "psychology_script")[0] is None
+
+    assert validate(["A", 3, " ", None], "psychology_titles") == (["A", "3"], ["items"])
+    assert validate({"titles": ["A"]}, "psychology_titles") == (["A"], [])
+    assert validate([], "psychology_titles")[0] is None
+    print("Result: PASS")
+
+def test_join_continuation():
+    print("\n--- Testing join_continuation ---")
+    partial = '{"title": "T", "scenes": [{"text": "hello wor'
+    cases = [
+        ('ld"}]}', '{"title": "T", "scenes": [{"text": "hello world"}]}'),
+        ('world"}]}', '{"title": "T", "scenes": [{"text": "hello world"}]}'),
+        ('hello world"}]}', '{"title": "T", "scenes": [{"text": "hello world"}]}'),
+        ('[{"text": "hello world"}]}', '{"title": "T", "scenes": [{"text": "hello world"}]}'),
+        ('```json\nld"}]}\n```', '{"title": "T", "scenes": [{"text": "hello world"}]}'),
+    ]
+    for tail, expected in cases:
+        joined = join_continuation(partial, tail)
+        ok = joined == expected
+        print(f"{tail!r}: {'PASS' if ok else 'FAIL'} ({joined!r})")
+        assert ok
+    assert join_continuation('{"a": "xy', ' z"}') == '{"a": "xy z"}'
+    assert join_continuation('{"a": 1, "', '"b": 2}') == '{"a": 1, "b": 2}'
+
+def test_stream_parser_repairs_elements():
+    print("\n--- Testing ScenesStreamParser with defective scenes ---")
+    text = ('```json\n{"title": "T", // streamed\n "scenes": [\n'
+            '{"text": "A"},\n{"text": "B",},\n{"text": "C\nstill C"},\n{"text": "D" "visual_prompt": "d"}\n]}\n```')
+    parser = ScenesStreamParser()
+    scenes = []
+    for i in range(0, len(text), 7):
+        scenes += parser.feed(text[i:i + 7])
+    ok = [i for i, _ in scenes] == [0, 1, 2, 3]
+    scenes = [s for _, s in scenes]
+    ok = ok and [s["text"] for s in scenes] == ["A", "B", "C\nstill C", "D"] and scenes[3]["visual_prompt"] == "d"
+    print(f"All four scenes parsed: {'PASS' if ok else 'FAIL'} ({scenes})")
+    assert ok
+
+def test_stream_parser_counts_non_object_elements():
+    print("\n--- Testing ScenesStreamParser indices with stray non-object elements ---")
+    scenes = _scenes(4)
+    text = json.dumps({"title": "T", "scenes": [scenes[0], "stray", scenes[1], 42, [1, {"x": 2}], scenes[2], None, scenes[3]]})
+    text = text.replace('"stray", ', '"stray" ') # Missing comma after a stray element
+    parser = ScenesStreamParser()
+    streamed = []
+    for i in range(0, len(text), 5):
+        streamed += parser.feed(text[i:i + 5])
+    full = repair_json(text)[0]["scenes"]
+    ok = [i for i, _ in streamed] == [0, 2, 5, 7] and all(full[i] == scene for i, scene in streamed)
+    print(f"Indices match the full parse: {'PASS' if ok else 'FAIL'} ({[i for i, _ in streamed]})")
+    assert ok
+
+if __name__ == "__main__":
+    test_repair_clean_and_fenced()
+    test_repair_defects()
+    test_repair_truncated()
+    test_validate()
+    test_join_continuation()
+    test_stream_parser_repairs_elements()
+    test_stream_parser_counts_non_object_elements()
+    print("\nAll JSON repair tests passed.")
+    sys.exit(0)
@@ -0,0 +1,96 @@
+import sys
+import asyncio
+
+# Offline checks for the batched TTS split: frame-boundary MP3 cuts and word-to-scene
+# assignment, on a synthetic MP3 whose frames carry their own index as payload.
+# Run from the repo root: python -m src.test_tts_batch (or pytest src/test_tts_batch.py)
+
+try:
+    from . import tts_batch
+    from .tts_batch import split_mp3, assign_words
+except ImportError:
+    from src import tts_batch
+    from src.tts_batch import split_mp3, assign_words
+
+FRAME_HEADER = b"\xff\xfb\x90\x00"     # MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding
+FRAME_BYTES = 144 * 128000 // 44100    # 417
+FRAME_SECONDS = 1152 / 44100
+
+def _mp3(n_frames):
+    """n_frames frames; every payload byte of frame i is i (sentinel), so cuts can be located."""
+    return b"".join(FRAME_HEADER + bytes([i % 250]) * (FRAME_BYTES - 4) for i in range(n_frames))
+
+def _first_frame(part):
+    assert part[:4] == FRAME_HEADER, "part does not start on a frame header"
+    return part[4]
+
+def test_split_mp3():
+    print("\n--- Testing split_mp3 frame-boundary cuts ---")
+    data = _mp3(100)
+    parts = split_mp3(data, [0.5, 1.3])
+    ok = len(parts) == 3 and b"".join(p for p, _ in parts) == data
+    # Nearest frame start to each cut
+    expected = [0, round(0.5 / FRAME_SECONDS), round(1.3 / FRAME_SECONDS)]
+    firsts = [_first_frame(p) for p, _ in parts]
+    ok = ok and firsts == expected and all(len(p) % FRAME_BYTES == 0 for p, _ in parts)
+    ok = ok and all(abs(start - i * FRAME_SECONDS) < 1e-9 for (_, start), i in zip(parts, expected))
+    print(f"Cuts at frames {firsts} (expected {expected}): {'PASS' if ok else 'FAIL'}")
+    assert ok
+
+    # Cuts out of order or past the end never produce overlapping or negative parts
+    parts = split_mp3(data, [2.0, 1.0, 99.0])
+    ok = b"".join(p for p, _ in parts) == data and [len(p) // FRAME_BYTES for p, _ in parts] == [77, 0, 23, 0]
+    print(f"Degenerate cuts keep every byte exactly once: {'PASS' if ok else 'FAIL'}")
+    assert ok
+
+def test_assign_words():
+    print("\n--- Testing assign_words ---")
+    texts = ["Hello there", "Here we go again", "Go home"]
+    words = [{"word": w} for w in ["Hello", "there", "uh", "Here", "we", "go", "again", "Go", "home"]]
+    per_scene = assign_words(words, texts)
+    got = [[w["word"] for w in scene] for scene in per_scene]
+    # "uh" is not in the script and stays with the scene being spoken; the repeated "go"
+    # is matched in order, so the second one lands in scene 3
+    ok = got == [["Hello", "there", "uh"], ["Here", "we", "go", "again"], ["Go", "home"]]
+    print(f"Words per scene {got}: {'PASS' if ok else 'FAIL'}")
+    assert ok
+
+def test_synthesize_batch_offsets():
+    print("\n--- Testing synthesize_batch with sentinel word offsets ---")
+    data = _mp3(120)
+    # (word, start s, end s): scene 2 starts after a pause around 1.0 s, scene 3 around 2.0 s
+    timings = [("One", 0.10, 0.40), ("two", 0.45, 0.80),
+               ("Three", 1.20, 1.50), ("four", 1.55, 1.85),
+               ("Five", 2.20, 2.60)]
+
+    class FakeCommunicate:
+        async def stream(self):
+            for i in range(0, len(data), 1000):
+                yield {"type": "audio", "data": data[i:i + 1000]}
+            for word, start, end in timings:
+                yield {"type": "WordBoundary", "text": word, "offset": int(start * 1e7), "duration": int((end - start) * 1e7)}
+
+    original = tts_batch.communicate
+    tts_batch.communicate = lambda *args, **kwargs: FakeCommunicate()
+    try:
+        results = asyncio.run(tts_batch.synthesize_batch(["One two", "Three four", "Five"], "voice"))
+    finally:
+        tts_batch.communicate = original
+
+    ok = len(results) == 3 and b"".join(r[0] for r in results) == data
+    cut_frames = [_first_frame(r[0]) for r in results]
+    ok = ok and cut_frames == [0, round(1.0 / FRAME_SECONDS), round(2.025 / FRAME_SECONDS)]
+    # Word times are relative to the start of their own scene's audio
+    scene2_start = cut_frames[1] * FRAME_SECONDS
+    first = results[1][1][0]
+    ok = ok and [w["word"] for w in results[1][1]] == ["Three", "four"] and abs(first["start"] - (1.20 - scene2_start)) < 1e-6
+    ok = ok and results[0][1][0]["start"] == 0.10
+    print(f"Scenes cut at frames {cut_frames}, scene 2 first word at {first['start']:.3f}s: {'PASS' if ok else 'FAIL'}")
+    assert ok
+
+if __name__ == "__main__":
+    test_split_mp3()
+    test_assign_words()
+    test_synthesize_batch_offsets()
+    print("\nAll TTS batch tests passed.")
+    sys.exit(0)
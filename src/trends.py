@@ -31,10 +31,8 @@ class TrendEngine:
         except Exception as e:
             logger.error(f"Failed to save used topic: {e}")
 
-    def get_viral_topic(self, llm, performance_context=None):
-        """
-        Interacts with LLM to fetch trending topics based on the configured niche and returns the best unused one.
-        """
+    def _topic_prompt(self, performance_context=None):
+        """Builds the trend discovery prompt (performance pivot + exclusion list)."""
         niche = Config.NICHE
         logger.info(f"Discovering viral {niche} trends...")
         
@@ -73,33 +71,55 @@ class TrendEngine:
         Format: Return ONLY a JSON list of strings.
         ["Viral Title 1", "Viral Title 2", ...]
         """
+        return prompt
+
+    def _pick_topic(self, candidates):
+        """Top unused candidate (persisted as used). None if the LLM answer is unusable, False if all are used."""
+        if not candidates or not isinstance(candidates, list):
+            return None
         
-        try:
-            response = llm._call_gemini(prompt)
-            if not response:
-                return None
+        # Filter out used topics
+        unused = [c for c in candidates if c not in self.used_topics]
+        if not unused:
+            logger.warning("All discovered trends were already used. Forcing a new angle...")
+            return False
             
-            candidates = llm._extract_json(response)
-            if not candidates or not isinstance(candidates, list):
-                return None
-            
-            # Filter out used topics
-            unused = [c for c in candidates if c not in self.used_topics]
-            
-            if not unused:
-                logger.warning("All discovered trends were already used. Forcing a new angle...")
+        selected = unused[0] # Pick the top one
+        self._save_used_topic(selected)
+        return selected
+
+    def get_viral_topic(self, llm, performance_context=None):
+        """
+        Interacts with LLM to fetch trending topics based on the configured niche and returns the best unused one.
+        """
+        prompt = self._topic_prompt(performance_context)
+        try:
+            # Cached per prompt: the exclusion list and performance data change as topics get used
+            selected = self._pick_topic(llm._generate_json(prompt))
+            if selected is False:
                 return self._get_fallback_topic(llm)
-                
-            selected = unused[0] # Pick the top one
-            self._save_used_topic(selected)
             return selected
-            
         except Exception as e:
             logger.error(f"Trend Engine discovery failed: {e}")
             return None
 
+    async def get_viral_topic_async(self, llm, performance_context=None):
+        """get_viral_topic on the async Gemini client (does not block the event loop)."""
+        prompt = self._topic_prompt(performance_context)
+        try:
+            selected = self._pick_topic(await llm._generate_json_async(prompt))
+            if selected is False:
+                text = await llm._call_gemini_async(self._fallback_prompt())
+                return text.strip().replace('"', '') if text else None
+            return selected
+        except Exception as e:
+            logger.error(f"Trend Engine discovery failed: {e}")
+            return None
+
+    def _fallback_prompt(self):
+        niche = Config.NICHE
+        return f"Give me one unique, viral {niche} topic that is completely different from common ones. Return only the string."
+
     def _get_fallback_topic(self, llm):
         """Force a unique topic if everything else is repeated."""
-        niche = Config.NICHE
-        prompt = f"Give me one unique, viral {niche} topic that is completely different from common ones. Return only the string."
-        return llm._call_gemini(prompt).strip().replace('"', '')
+        return llm._call_gemini(self._fallback_prompt()).strip().replace('"', '')
@@ -0,0 +1,104 @@
+"""
+TTS Batch - Synthesizes a whole script in one edge-tts stream and splits it per scene.
+Scenes are joined as separate paragraphs (each closed with sentence punctuation, so
+the voice pauses between them). The WordBoundary offsets tell us where every scene
+starts and ends; the MP3 is then cut on frame boundaries, so no re-encoding happens.
+"""
+
+import os
+import bisect
+import edge_tts
+
+try:
+    from .audio_probe import mp3_frames
+except ImportError:
+    from audio_probe import mp3_frames
+
+TTS_BATCH_ENABLED = os.getenv("TTS_BATCH", "1") != "0"
+
+def communicate(text, voice, rate="+0%", pitch="+0Hz"):
+    """edge_tts.Communicate that emits WordBoundary events (newer edge-tts defaults to sentences)."""
+    try:
+        return edge_tts.Communicate(text, voice, rate=rate, pitch=pitch, boundary="WordBoundary")
+    except TypeError:
+        return edge_tts.Communicate(text, voice, rate=rate, pitch=pitch)
+
+def split_mp3(data, cut_times):
+    """Cuts data at the frame nearest to each time in cut_times. Returns [(bytes, start_seconds)]."""
+    frames = mp3_frames(data)
+    if not frames:
+        raise ValueError("No MP3 frames found in batch audio")
+
+    times = [t for _, t in frames]
+    bounds = [0]
+    for cut in cut_times:
+        i = bisect.bisect_left(times, cut)
+        if 0 < i < len(times) and cut - times[i - 1] < times[i] - cut:
+            i -= 1
+        bounds.append(max(i, bounds[-1]))
+    bounds.append(len(frames))
+
+    parts = []
+    for a, b in zip(bounds, bounds[1:]):
+        start = frames[a][0] if a < len(frames) else len(data)
+        end = frames[b][0] if b < len(frames) else len(data)
+        parts.append((data[start:end], frames[a][1] if a < len(frames) else frames[-1][1]))
+    return parts
+
+def _scene_text(text):
+    """Closes a scene with sentence punctuation so the voice pauses before the next one."""
+    text = " ".join(text.split())
+    return text if text[-1:] in ".!?" else text + "."
+
+def assign_words(words, texts):
+    """
+    Maps each WordBoundary to the scene it was spoken in by finding its text, in order,
+    inside the joined script. Returns one word list per scene.
+    """
+    joined, ranges = "", []
+    for text in texts:
+        start = len(joined)
+        joined += _scene_text(text) + "\n\n"
+        ranges.append((start, len(joined)))
+    lowered = joined.lower()
+
+    per_scene = [[] for _ in texts]
+    pos, scene = 0, 0
+    for w in words:
+        found = lowered.find(w["word"].lower(), pos)
+        if found >= 0:
+            pos = found + len(w["word"])
+            while scene < len(ranges) - 1 and found >= ranges[scene][1]:
+                scene += 1
+        per_scene[scene].append(w)
+    return per_scene
+
+async def synthesize_batch(texts, voice, rate="+0%", pitch="+0Hz"):
+    """
+    Voices all texts in one stream. Returns [(mp3_bytes, word_metadata)] per text, with
+    word times relative to the start of each scene's audio.
+    """
+    script = "\n\n".join(_scene_text(t) for t in texts)
+    audio = bytearray()
+    words = []
+    async for chunk in communicate(script, voice, rate=rate, pitch=pitch).stream():
+        if chunk["type"] == "audio":
+            audio.extend(chunk["data"])
+        elif chunk["type"] == "WordBoundary":
+            start = chunk["offset"] / 1e7
+            words.append({"word": chunk["text"], "start": start, "end": start + chunk["duration"] / 1e7})
+
+    per_scene = assign_words(words, texts)
+    if any(not scene_words for scene_words in per_scene):
+        raise ValueError("Could not locate every scene in the batch word timings")
+
+    # Cut halfway through the pause between one scene's last word and the next one's first
+    cuts = [(prev[-1]["end"] + nxt[0]["start"]) / 2 for prev, nxt in zip(per_scene, per_scene[1:])]
+    parts = split_mp3(bytes(audio), cuts)
+
+    results = []
+    for (data, offset), scene_words in zip(parts, per_scene):
+        meta = [{"word": w["word"], "start": max(0.0, w["start"] - offset), "end": max(0.0, w["end"] - offset)}
+                for w in scene_words]
+        results.append((data, meta))
+    return results
@@ -0,0 +1,56 @@
+"""
+TTS Worker - One long-lived event loop (on a daemon thread) for speech synthesis.
+Sync code submits coroutines and gets concurrent.futures.Future objects back, so all
+segment syntheses of a video can be in flight at once (bounded by a semaphore)
+instead of paying an asyncio.run() loop setup/teardown per segment.
+Async callers await the same futures with run_async().
+"""
+
+import os
+import asyncio
+import threading
+
+EDGE_TTS_CONCURRENCY = int(os.getenv("EDGE_TTS_CONCURRENCY", "4"))
+
+class TTSWorker:
+    def __init__(self, concurrency=EDGE_TTS_CONCURRENCY):
+        self.concurrency = concurrency
+        self.loop = asyncio.new_event_loop()
+        self._semaphore = asyncio.Semaphore(concurrency) # Binds to the worker loop on first use
+        self._thread = threading.Thread(target=self._run, name="tts-worker", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _limited(self, coro):
+        async with self._semaphore:
+            return await coro
+
+    def submit(self, coro):
+        """Schedules a coroutine on the worker loop. Returns a concurrent.futures.Future."""
+        return asyncio.run_coroutine_threadsafe(self._limited(coro), self.loop)
+
+    def run(self, coro, timeout=None):
+        """Blocking helper for sync code: submit and wait for the result."""
+        return self.submit(coro).result(timeout)
+
+    async def run_async(self, coro):
+        """Awaitable helper for code already running inside another event loop."""
+        return await asyncio.wrap_future(self.submit(coro))
+
+    def close(self):
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout=5)
+
+_worker = None
+_worker_lock = threading.Lock()
+
+def get_tts_worker():
+    """Process-wide TTS worker, started on first use."""
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = TTSWorker()
+        return _worker
@@ -5,6 +5,20 @@ import math
 import random
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
+try:
+    from .motion_compiler import MotionCompiler, hex_to_rgb
+    from .stickman_compositor import StickmanCompositor
+    from .frame_sink import write_clip, concat_clips
+    from .encoding_profiles import get_profile
+    from .telemetry import traced, current_span
+    from .file_cache import get_render_cache
+except ImportError:
+    from motion_compiler import MotionCompiler, hex_to_rgb
+    from stickman_compositor import StickmanCompositor
+    from frame_sink import write_clip, concat_clips
+    from encoding_profiles import get_profile
+    from telemetry import traced, current_span
+    from file_cache import get_render_cache
 
 class VideoEditor:
     def _create_text_clip(self, text, size, fontsize, color, stroke_color, stroke_width, duration):
@@ -58,11 +72,79 @@ class VideoEditor:
         except Exception as e:
             print(f"PIL Text Render failed: {e}")
             return ColorClip(size=size, color=(0,0,0,0), duration=duration)
-    def create_video(self, scenes, output_video_path, is_short=True, bg_music_path=None, style="noir", bg_color="#FFFFFF"):
+
+    def _native_motion_clip(self, i, scene, v_path, img_array, duration, target_w, target_h, is_short, style, bg_color, backend="ffmpeg", profile=None):
+        """
+        Renders the scene's character/camera motion natively and loads the result as a
+        plain VideoFileClip: ffmpeg expressions (MotionCompiler), or for stickman styles
+        with backend="numpy", the in-place NumPy compositor (StickmanCompositor).
+        ffmpeg renders are deterministic, so they go through the render cache keyed on the
+        image, audio, filter graph and profile; the compositor's particles are random.
+        Returns None if the style has no native equivalent or the render fails, so the
+        caller can use the MoviePy lambdas.
+        """
+        if style not in ("stickman", "psych_stickman", "noir"):
+            return None
+        try:
+            from moviepy.config import get_setting
+            ffmpeg_path = get_setting("FFMPEG_BINARY")
+            profile = profile or get_profile()
+            os.makedirs("temp/motion", exist_ok=True)
+            motion_path = f"temp/motion/scene_{i}.mp4"
+
+            if backend == "numpy" and style != "noir":
+                compositor = StickmanCompositor((target_w, target_h), hex_to_rgb(bg_color), fps=profile.fps, ffmpeg_path=ffmpeg_path)
+                compositor.render_scene(
+                    img_array, duration, motion_path,
+                    action=scene.get('vocal_action', 'talking'),
+                    is_punchline=scene.get('is_punchline', False),
+                    style=style
+                )
+                return VideoFileClip(motion_path).set_duration(duration)
+
+            compiler = MotionCompiler(ffmpeg_path=ffmpeg_path, fps=profile.fps)
+            if style == "noir":
+                anim_type = random.choice(['slow_zoom_in', 'slow_zoom_out', 'subtle_pan'])
+                graph = compiler.noir_graph(anim_type, duration, (target_w, target_h), is_short)
+                loop_input = anim_type == 'subtle_pan' # zoompan generates its own frames
+            else:
+                # Character size after the 8% watermark crop + resize to 70% of the frame width
+                h, w = img_array.shape[:2]
+                sprite_w = int(target_w * 0.7)
+                sprite_h = int((h - int(h * 0.08)) * sprite_w / w)
+                graph = compiler.stickman_graph(
+                    scene.get('vocal_action', 'talking'),
+                    scene.get('is_punchline', False),
+                    duration, (target_w, target_h), (sprite_w, sprite_h),
+                    hex_to_rgb(bg_color), style=style
+                )
+                loop_input = True
+
+            cache = get_render_cache()
+            a_path = scene.get('audio_path')
+            key = cache.key([v_path] + ([a_path] if a_path and os.path.exists(a_path) else []),
+                            graph=graph, duration=f"{duration:.3f}", loop_input=loop_input, profile=profile.name, fps=profile.fps)
+            if cache.fetch(key, motion_path):
+                print(f"  [CACHE] Reusing motion clip for scene {i+1}")
+            else:
+                compiler.render(v_path, graph, duration, motion_path, loop_input=loop_input)
+                cache.store(key, motion_path)
+            return VideoFileClip(motion_path).set_duration(duration)
+        except Exception as e:
+            print(f"  [WARN] Native motion render failed for scene {i+1}, using MoviePy: {e}")
+            return None
+
+    @traced("editor.create_video")
+    def create_video(self, scenes, output_video_path, is_short=True, bg_music_path=None, style="noir", bg_color="#FFFFFF", motion_backend="ffmpeg", profile=None):
         """
         Stitches visualization, audio and subtitles with dynamic animations and transitions.
         style: "noir" (Standard dark surreal) or "stickman" (Minimalist stick figures on white)
+        motion_backend: "ffmpeg" compiles the animations into native filter expressions,
+                        "numpy" composites stickman frames in place and pipes them to ffmpeg,
+                        "moviepy" evaluates them per frame in Python (legacy)
+        profile: encoding profile name ("draft", "standard", "final"); defaults to ENCODING_PROFILE
         """
+        profile = get_profile(profile)
         if is_short:
             target_w, target_h = 1080, 1920
         else:
@@ -100,7 +182,15 @@ class VideoEditor:
                             # If we reached here, img_clip is valid. 
                             # Let's handle the style logic inside the try block for safety.
                             
-                            if style == "stickman" or style == "psych_stickman":
+                            if motion_backend in ("ffmpeg", "numpy"):
+                                video_clip = self._native_motion_clip(
+                                    i, scene, v_path, np.array(pil_img.convert('RGB')), duration,
+                                    target_w, target_h, is_short, style, bg_color, backend=motion_backend, profile=profile
+                                )
+
+                            if video_clip is not None:
+                                pass # Motion already rendered natively by ffmpeg
+                            elif style == "stickman" or style == "psych_stickman":
                                 # VIRAL STYLE: Solid Vibrant BG (Selected by AI), Centered, Pleasant Liveness
                                 
                                 # 1. CREATE SOLID BACKGROUND
@@ -355,7 +445,7 @@ class VideoEditor:
                 print(f"Error processing scene: {e}")
         
         if clips:
-            final_video = concatenate_videoclips(clips, method="compose")
+            final_video = concat_clips(clips)
             
             # Add Background Music
             if bg_music_path and os.path.exists(bg_music_path):
@@ -378,6 +468,7 @@ class VideoEditor:
                 
                 final_video = final_video.set_audio(final_audio)
 
-            final_video.write_videofile(output_video_path, fps=24, codec="libx264", audio_codec="aac", temp_audiofile="temp_audio.m4a", threads=4)
+            write_clip(final_video, output_video_path, profile=profile, temp_audiofile="temp_audio.m4a", threads=4)
+            current_span().add_bytes(os.path.getsize(output_video_path))
             return True
         return False
@@ -1,16 +1,37 @@
 import subprocess
 import os
-import json
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+try:
+    from .file_cache import get_render_cache
+    from .filtergraph_renderer import SinglePassRenderer
+    from .encoding_profiles import get_profile
+    from .telemetry import traced, current_span
+    from .audio_probe import probe_duration
+except ImportError:
+    from file_cache import get_render_cache
+    from filtergraph_renderer import SinglePassRenderer
+    from encoding_profiles import get_profile
+    from telemetry import traced, current_span
+    from audio_probe import probe_duration
+
 logger = logging.getLogger(__name__)
 
 class VideoEditorFFmpeg:
     """Direct FFmpeg-based video editor for robust automation."""
     
-    def __init__(self):
+    def __init__(self, parallel=True, x264_threads=2, use_cache=True, profile=None):
         self.ffmpeg_path = self._find_ffmpeg()
+        # Encoder settings (preset/crf/fps/GOP/audio) come from the active encoding profile
+        self.profile = get_profile(profile)
+        # Parallel mode encodes several segments at once, each ffmpeg process
+        # pinned to x264_threads so the workers don't oversubscribe the CPU
+        self.parallel = parallel
+        self.x264_threads = x264_threads
+        # Identical segments (same image/audio/filter/encoder) are reused across retried runs
+        self.cache = get_render_cache() if use_cache else None
         
     def _find_ffmpeg(self):
         """Find FFmpeg executable."""
@@ -34,7 +55,8 @@ class VideoEditorFFmpeg:
             
         raise RuntimeError("FFmpeg not found. Please install FFmpeg or imageio-ffmpeg.")
     
-    def create_video(self, scenes, output_path, is_short=True, bg_music_path=None, style="noir"):
+    @traced("editor_ffmpeg.create_video")
+    def create_video(self, scenes, output_path, is_short=True, bg_music_path=None, style="noir", single_pass=False):
         """
         Create video using direct FFmpeg subprocess calls.
         
@@ -44,6 +66,7 @@ class VideoEditorFFmpeg:
             is_short: True for vertical (1080x1920), False for horizontal (1920x1080)
             bg_music_path: Optional background music path
             style: "noir" or "stickman"
+            single_pass: Encode everything (scenes, concat, music mix) in one ffmpeg invocation
         """
         logger.info(f"Creating video with {len(scenes)} scenes using FFmpeg...")
         
@@ -57,11 +80,9 @@ class VideoEditorFFmpeg:
         temp_dir = Path("temp/ffmpeg_assembly")
         temp_dir.mkdir(parents=True, exist_ok=True)
         
-        # Process each scene into a video segment
-        scene_videos = []
+        # Validate inputs and measure durations up front (cheap, serial)
+        jobs = []
         for i, scene in enumerate(scenes):
-            logger.info(f"Processing scene {i+1}/{len(scenes)}...")
-            
             audio_path = scene['audio_path']
             image_path = scene['video_path']
             
@@ -71,14 +92,36 @@ class VideoEditorFFmpeg:
             if not os.path.exists(image_path):
                 raise FileNotFoundError(f"Image file not found: {image_path}")
             
-            # Get audio duration using ffprobe
-            duration = self._get_audio_duration(audio_path)
+            # Reuse the duration measured at synthesis time when the pipeline passed it along
+            duration = scene.get('duration') or self._get_audio_duration(audio_path)
             logger.info(f"Scene {i+1} duration: {duration}s")
             
-            # Create video segment from image + audio
             segment_path = temp_dir / f"segment_{i:03d}.mp4"
-            self._create_segment(image_path, audio_path, segment_path, width, height, duration)
-            scene_videos.append(str(segment_path))
+            jobs.append((image_path, audio_path, segment_path, width, height, duration))
+        
+        if single_pass:
+            renderer = SinglePassRenderer(self.ffmpeg_path, profile=self.profile)
+            specs = [{'image': image_path, 'audio': audio_path, 'duration': duration}
+                     for image_path, audio_path, _, _, _, duration in jobs]
+            music = bg_music_path if bg_music_path and os.path.exists(bg_music_path) else None
+            renderer.render(specs, output_path, width, height, bg_music_path=music,
+                            music_volume=0.18 if style == "stickman" else 0.10)
+            current_span().add_bytes(os.path.getsize(output_path))
+            logger.info(f"Video created successfully: {output_path}")
+            return output_path
+        
+        # Encode segments (the expensive part) - in parallel when enabled
+        workers = self._render_workers(len(jobs))
+        logger.info(f"Rendering {len(jobs)} segments with {workers} worker(s)...")
+        if workers > 1:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                # Each worker only drives an ffmpeg child process, so threads give real
+                # multi-process parallelism; map() keeps results in scene order for concat
+                scene_videos = list(pool.map(lambda job: self._create_segment(*job), jobs))
+        else:
+            scene_videos = [self._create_segment(*job) for job in jobs]
+        if self.cache:
+            logger.info(f"Render cache: {self.cache.stats()}")
         
         # Concatenate all segments
         logger.info("Concatenating segments...")
@@ -111,42 +154,22 @@ class VideoEditorFFmpeg:
             import shutil
             shutil.copy(str(temp_output), output_path)
         
+        current_span().add_bytes(os.path.getsize(output_path))
         logger.info(f"Video created successfully: {output_path}")
         return output_path
     
+    def _render_workers(self, n_jobs):
+        """Number of concurrent segment encodes: available cores divided by x264's own threads."""
+        if not self.parallel or n_jobs <= 1:
+            return 1
+        cores = len(os.sched_getaffinity(0)) if hasattr(os, 'sched_getaffinity') else (os.cpu_count() or 1)
+        return max(1, min(n_jobs, cores // max(1, self.x264_threads)))
+    
     def _get_audio_duration(self, audio_path):
-        """Get audio duration using ffprobe."""
-        cmd = [
-            'ffprobe',
-            '-v', 'error',
-            '-show_entries', 'format=duration',
-            '-of', 'json',
-            audio_path
-        ]
-        
-        try:
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-            if result.returncode == 0:
-                data = json.loads(result.stdout)
-                return float(data['format']['duration'])
-        except Exception as e:
-            logger.warning(f"ffprobe failed, using fallback: {e}")
-        
-        # Fallback: use ffmpeg to get duration
-        cmd = [
-            self.ffmpeg_path,
-            '-i', audio_path,
-            '-f', 'null',
-            '-'
-        ]
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=10)
-        # Parse duration from stderr
-        for line in result.stderr.split('\n'):
-            if 'Duration:' in line:
-                time_str = line.split('Duration:')[1].split(',')[0].strip()
-                h, m, s = time_str.split(':')
-                return float(h) * 3600 + float(m) * 60 + float(s)
+        """Get audio duration from the (memoized) header probe."""
+        duration = probe_duration(audio_path)
+        if duration:
+            return duration
         
         # Default to 3 seconds if we can't determine
         logger.warning(f"Could not determine duration for {audio_path}, using 3s")
@@ -156,17 +179,25 @@ class VideoEditorFFmpeg:
         """Create a video segment from image and audio."""
         # Use FFmpeg to create video from static image + audio
         # Apply Ken Burns zoom effect for visual interest
+        fps = self.profile.fps
+        vf = f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,zoompan=z='min(zoom+0.0015,1.1)':d={self.profile.frames(duration)}:s={width}x{height}:fps={fps}"
+        encoder_args = self.profile.video_args(threads=0) + self.profile.audio_args()
+        
+        if self.cache:
+            key = self.cache.key([image_path, audio_path], filter_graph=vf, resolution=f"{width}x{height}",
+                                 encoder=encoder_args, duration=duration)
+            if self.cache.fetch(key, str(output_path)):
+                logger.info(f"Render cache hit: {output_path}")
+                return str(output_path)
+        
         cmd = [
             self.ffmpeg_path,
             '-loop', '1',
             '-i', image_path,
             '-i', audio_path,
-            '-vf', f"scale={width}:{height}:force_original_aspect_ratio=decrease,pad={width}:{height}:(ow-iw)/2:(oh-ih)/2,zoompan=z='min(zoom+0.0015,1.1)':d={int(duration*30)}:s={width}x{height}:fps=30",
-            '-c:v', 'libx264',
-            '-preset', 'medium',
-            '-crf', '23',
-            '-c:a', 'aac',
-            '-b:a', '128k',
+            '-vf', vf
+        ] + encoder_args + [
+            '-threads', str(self.x264_threads if self.parallel else 0),
             '-shortest',
             '-t', str(duration),
             '-y',
@@ -174,6 +205,9 @@ class VideoEditorFFmpeg:
         ]
         
         self._run_ffmpeg(cmd, f"Creating segment: {output_path}")
+        if self.cache:
+            self.cache.store(key, str(output_path))
+        return str(output_path)
     
     def _add_background_music(self, video_path, music_path, output_path, style="noir"):
         """Add background music to video with professional mixing."""
@@ -192,9 +226,8 @@ class VideoEditorFFmpeg:
             '-filter_complex', f'[1:a]volume={music_volume}[music];[0:a][music]amix=inputs=2:duration=shortest[aout];[aout]afade=t=in:ss=0:d=1,afade=t=out:st=seek_end-2:d=2[final_a]',
             '-map', '0:v',
             '-map', '[final_a]',
-            '-c:v', 'copy',
-            '-c:a', 'aac',
-            '-b:a', '128k',
+            '-c:v', 'copy'
+        ] + self.profile.audio_args() + [
             '-y',
             output_path
         ]
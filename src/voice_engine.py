@@ -1,30 +1,110 @@
-import edge_tts
 import asyncio
+import os
+import re
 from .config import Config
 from .elevenlabs_engine import ElevenLabsEngine
+from .telemetry import span, current_span
+from .file_cache import get_tts_cache, normalize_tts_text
+from .tts_batch import communicate
+from .audio_probe import probe_duration
+from .silence_trim import trim_audio_file
+from .rate_limit import TokenBucket
 
 class VoiceEngine:
     def __init__(self):
         self.voice = Config.VOICE_NAME
         self.eleven = ElevenLabsEngine()
+        # Per-provider concurrency limits so scenes can be synthesized in parallel
+        self.limits = {
+            "elevenlabs": asyncio.Semaphore(Config.ELEVENLABS_CONCURRENCY),
+            "edge": asyncio.Semaphore(Config.EDGE_TTS_CONCURRENCY)
+        }
+        # Per-provider request rates (token buckets) on top of the concurrency limits
+        self.buckets = {
+            "elevenlabs": TokenBucket(Config.ELEVENLABS_RATE),
+            "edge": TokenBucket(Config.EDGE_TTS_RATE)
+        }
+        self.cache = get_tts_cache()
+        # Edge TTS word timings per output file (cache hits included), for captions
+        self.word_metadata = {}
 
     async def generate_audio(self, text, output_file, mood="neutral", **kwargs):
         """
         Generates speech using ElevenLabs (Primary) or Edge TTS (Fallback).
+        Returns the path of the final audio (a .wav next to output_file when
+        remove_silence=True), or False on failure.
         """
+        final_path, _ = await self._synthesize(text, output_file, mood, **kwargs)
+        return final_path
+
+    async def generate_batch(self, scenes, audio_dir="temp", **kwargs):
+        """
+        Synthesizes every scene concurrently, queueing on each provider's concurrency and
+        rate limits. Scenes only fall back to Edge TTS when ElevenLabs fails or its budget
+        is exhausted, so one script keeps one voice.
+        Returns, in scene order: {'audio_path', 'duration', 'provider'} (audio_path None on failure).
+        """
+        results = await asyncio.gather(*[self.synthesize_scene(i, scene, audio_dir, **kwargs)
+                                         for i, scene in enumerate(scenes)])
+        self.report_batch(results)
+        return list(results)
+
+    async def synthesize_scene(self, i, scene, audio_dir="temp", **kwargs):
+        """One scene of a batch (same provider rules); usable on its own as scenes stream in."""
+        output_file = os.path.join(audio_dir, f"audio_{i}.mp3")
+        mood = scene.get('audio_mood', 'neutral')
+        final_path, provider = await self._synthesize(scene['text'], output_file, mood, **kwargs)
+        return {
+            'audio_path': final_path or None,
+            'duration': probe_duration(final_path) if final_path else None,
+            'provider': provider
+        }
+
+    def report_batch(self, results):
+        providers = [r['provider'] for r in results]
+        print(f"  [TTS] Batch done: {providers.count('elevenlabs')} ElevenLabs, {providers.count('edge')} Edge TTS, "
+              f"{providers.count(None)} failed")
+
+    async def _synthesize(self, text, output_file, mood="neutral", **kwargs):
+        """Returns (final_path or False, provider used)."""
+        with span("voice.generate_audio", chars=len(text), mood=mood) as s:
+            final_path, provider = await self._generate_audio(text, output_file, mood, **kwargs)
+            if final_path and os.path.exists(final_path):
+                s.add_bytes(os.path.getsize(final_path))
+                # Probed once here; editors and renderers reuse the memoized value
+                s.set(duration=probe_duration(final_path))
+            s.set(success=bool(final_path))
+            return final_path, provider if final_path else None
+
+    async def _generate_audio(self, text, output_file, mood="neutral", **kwargs):
+        # Silence trimming runs here, on PCM, for both providers (the cache keeps untrimmed MP3s)
+        remove_silence = kwargs.pop("remove_silence", False)
         try:
             # Clean text
-            import re
             clean_text = re.sub(r'[*_#~>]', '', text)
-            
+
             # 1. Try ElevenLabs first (High Quality / Cloned Voice)
             logger_print = f"--- Using ElevenLabs for: '{clean_text[:30]}...' ---"
-            if self.eleven.api_key and self.eleven.voice_id:
+            if self.eleven.api_key and self.eleven.voice_id and not self.eleven.budget.exhausted:
                 print(logger_print)
-                success = self.eleven.generate_audio(clean_text, output_file, **kwargs)
+                current_span().set(provider="elevenlabs")
+                cache_key = self.cache.key(text=normalize_tts_text(clean_text), provider="elevenlabs",
+                                           voice=self.eleven.voice_id, settings=kwargs.get("voice_settings"))
+                if self._from_cache(cache_key, output_file):
+                    return await self._finish(output_file, remove_silence), "elevenlabs"
+                # Queue for a slot rather than switching voices mid-script
+                await self.buckets["elevenlabs"].acquire()
+                # ElevenLabs client is blocking; keep it off the event loop
+                async with self.limits["elevenlabs"]:
+                    success = await asyncio.to_thread(self.eleven.generate_audio, clean_text, output_file, **kwargs)
                 if success:
-                    return True
+                    # ElevenLabs sends no word boundaries. Nothing downstream of the scene pipeline
+                    # builds word captions, so no alignment here (generator.py aligns its own clips)
+                    self.word_metadata[output_file] = []
+                    self.cache.store(cache_key, output_file, meta=[])
+                    return await self._finish(output_file, remove_silence), "elevenlabs"
                 print("ElevenLabs failed or out of credits. Falling back to Edge TTS.")
+                current_span().add_retry()
 
             # 2. Fallback to Edge TTS (Free Forever)
             mood_params = {
@@ -34,37 +114,55 @@ class VoiceEngine:
                 "curious": {"rate": "+5%", "pitch": "+10Hz"},
                 "neutral": {"rate": "+0%", "pitch": "+0Hz"}
             }
-            
+
             params = mood_params.get(mood.lower(), mood_params["neutral"])
-            
-            communicate = edge_tts.Communicate(
-                clean_text, 
-                self.voice, 
-                rate=params["rate"], 
-                pitch=params["pitch"]
-            )
-            await communicate.save(output_file)
-            
-            # Post-Process Edge TTS if requested
-            if kwargs.get("remove_silence", False):
-                try:
-                   import subprocess
-                   temp_path = output_file + ".tmp.mp3"
-                   # Same ffmpeg filter: silence remove
-                   cmd = [
-                       "ffmpeg", "-y", "-i", output_file,
-                       "-af", "silenceremove=stop_periods=-1:stop_duration=0.2:stop_threshold=-30dB",
-                       temp_path
-                   ]
-                   subprocess.run(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=True)
-                   
-                   if os.path.exists(temp_path):
-                       os.replace(temp_path, output_file)
-                       print(f"  [AUDIO] Silence removed from {output_file} (EdgeTTS)")
-                except Exception as e:
-                   print(f"  [WARN] Failed to remove silence: {e}")
+            current_span().set(provider="edge")
+            cache_key = self.cache.key(text=normalize_tts_text(clean_text), provider="edge", voice=self.voice,
+                                       rate=params["rate"], pitch=params["pitch"])
+            if self._from_cache(cache_key, output_file):
+                return await self._finish(output_file, remove_silence), "edge"
 
-            return True
+            word_metadata = []
+            await self.buckets["edge"].acquire()
+            async with self.limits["edge"]:
+                stream = communicate(
+                    clean_text,
+                    self.voice,
+                    rate=params["rate"],
+                    pitch=params["pitch"]
+                )
+                with open(output_file, "wb") as f:
+                    async for chunk in stream.stream():
+                        if chunk["type"] == "audio":
+                            f.write(chunk["data"])
+                        elif chunk["type"] == "WordBoundary":
+                            start = chunk["offset"] / 1e7
+                            word_metadata.append({"word": chunk["text"], "start": start, "end": start + chunk["duration"] / 1e7})
+
+            self.word_metadata[output_file] = word_metadata
+            self.cache.store(cache_key, output_file, meta=word_metadata)
+            return await self._finish(output_file, remove_silence), "edge"
         except Exception as e:
             print(f"Error generating audio: {e}")
+            return False, None
+
+    async def _finish(self, output_file, remove_silence):
+        """Applies optional silence trimming. Returns the path the render stage should use."""
+        if not remove_silence:
+            return output_file
+        try:
+            final_path, words = await asyncio.to_thread(trim_audio_file, output_file, self.word_metadata.get(output_file))
+        except Exception as e:
+            print(f"  [WARN] Failed to remove silence: {e}")
+            return output_file
+        self.word_metadata[final_path] = words
+        return final_path
+
+    def _from_cache(self, cache_key, output_file):
+        """Copies a cached synthesis to output_file. Returns True on a hit."""
+        if not self.cache.fetch(cache_key, output_file):
             return False
+        self.word_metadata[output_file] = self.cache.fetch_meta(cache_key) or []
+        current_span().set(cache_hit=True)
+        print(f"  [CACHE] TTS hit: {output_file}")
+        return True
@@ -4,6 +4,7 @@ import google_auth_oauthlib.flow
 from googleapiclient.discovery import build
 from googleapiclient.http import MediaFileUpload
 from src.config import Config
+from src.telemetry import traced, current_span
 import logging
 
 logger = logging.getLogger(__name__)
@@ -90,6 +91,7 @@ class YouTubeUploader:
                 logger.error(f"Failed to authenticate with YouTube: {e}")
                 raise
 
+    @traced("youtube.upload_video")
     def upload_video(self, video_path, title, description, tags=None, privacy_status="private", publish_at=None, category_id="27", altered_content=False):
         try:
             logger.info(f"Uploading video: {title}")
@@ -127,6 +129,7 @@ class YouTubeUploader:
                 if status:
                     logger.info(f"Uploaded {int(status.progress() * 100)}%")
 
+            current_span().add_bytes(os.path.getsize(video_path))
             logger.info(f"Upload Complete! Video ID: {response['id']}")
             return response['id']
 